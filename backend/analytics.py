@@ -0,0 +1,228 @@
+"""Waste analytics over Parquet snapshots of the OLTP tables.
+
+A snapshot job copies food, donation_request, waste_report and
+meal_beneficiary into var/analytics/<table>/part-NNNNNN.parquet, appending
+only rows changed since the table's watermark. Rollups are computed with
+pandas/NumPy over the snapshots, so /admin/analytics never runs GROUP BYs
+against the live tables.
+
+    python backend/analytics.py          # incremental refresh
+    python backend/analytics.py --full   # rebuild (also drops rows deleted upstream)
+"""
+import os
+import shutil
+import sys
+import threading
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from snapshots import read_state, write_parquet, write_state
+from workers import PeriodicWorker
+
+# table: (columns, change column, key). food/donation_request track changes via updated_at (migration 004).
+SNAPSHOT_TABLES = {
+    "food": ("food_id, canteen_id, item_name, category, quantity, unit, expiry_time, status, updated_at", "updated_at", "food_id"),
+    "donation_request": ("request_id, food_id, ngo_id, request_time, status, approved_time, completed_time, updated_at", "updated_at", "request_id"),
+    "waste_report": ("report_id, food_id, reported_by, reason, quantity_wasted, report_time", "report_time", "report_id"),
+    "meal_beneficiary": ("beneficiary_id, donation_id, people_served, location, recorded_time", "recorded_time", "beneficiary_id"),
+}
+# Rows are re-read from this far behind the watermark to catch transactions that
+# committed late; ones already in the last part are dropped before appending.
+OVERLAP = timedelta(minutes=5)
+COMPACT_AFTER = 50
+FETCH_CHUNK = 10000
+TREND_WEEKS = 12
+LOCK_NAME = "campus_food_waste_snapshots"     # MySQL named lock: one snapshot writer at a time across workers
+
+_lock = threading.Lock()
+_rollups = {"version": None, "data": None}
+
+
+def _columns(table):
+    return [c.strip() for c in SNAPSHOT_TABLES[table][0].split(",")]
+
+
+def _frame(table, rows):
+    df = pd.DataFrame.from_records(rows, columns=_columns(table))
+    for col in df.columns:
+        if col.endswith(("_time", "_at")):
+            df[col] = pd.to_datetime(df[col])
+    return df
+
+
+def _parts(snapshot_dir, table):
+    path = os.path.join(snapshot_dir, table)
+    return sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith(".parquet")) if os.path.isdir(path) else []
+
+
+def load_table(snapshot_dir, table):
+    """Current snapshot of `table`: all parts, latest version of each key."""
+    parts = _parts(snapshot_dir, table)
+    if not parts:
+        return _frame(table, [])
+    df = pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
+    return df.drop_duplicates(SNAPSHOT_TABLES[table][2], keep="last").reset_index(drop=True)
+
+
+def _refresh_table(conn, snapshot_dir, table, watermark):
+    columns, change_col, key = SNAPSHOT_TABLES[table]
+    cursor = conn.cursor()
+    if watermark:
+        since = pd.Timestamp(watermark).to_pydatetime() - OVERLAP
+        cursor.execute(f"SELECT {columns} FROM {table} WHERE {change_col} >= %s ORDER BY {change_col}, {key}", (since,))
+    else:
+        cursor.execute(f"SELECT {columns} FROM {table} ORDER BY {change_col}, {key}")
+    chunks = []
+    while True:
+        rows = cursor.fetchmany(FETCH_CHUNK)
+        if not rows:
+            break
+        chunks.append(_frame(table, rows))
+    cursor.close()
+    if not chunks:
+        return watermark, 0
+    df = pd.concat(chunks, ignore_index=True)
+
+    parts = _parts(snapshot_dir, table)
+    if parts and watermark:
+        seen = pd.read_parquet(parts[-1], columns=[key, change_col])
+        df = df.merge(seen.assign(_seen=True), on=[key, change_col], how="left")
+        df = df[df["_seen"].isna()].drop(columns="_seen")
+    if df.empty:
+        return watermark, 0
+
+    os.makedirs(os.path.join(snapshot_dir, table), exist_ok=True)
+    number = int(os.path.basename(parts[-1])[5:11]) + 1 if parts else 0
+    write_parquet(df, os.path.join(snapshot_dir, table, f"part-{number:06d}.parquet"))
+    if len(parts) + 1 > COMPACT_AFTER:
+        write_parquet(load_table(snapshot_dir, table), os.path.join(snapshot_dir, table, f"part-{number + 1:06d}.parquet"))
+        for path in parts + [os.path.join(snapshot_dir, table, f"part-{number:06d}.parquet")]:
+            os.remove(path)
+    newest = max(pd.Timestamp(watermark) if watermark else df[change_col].max(), df[change_col].max())
+    return newest.isoformat(), len(df)
+
+
+def refresh_snapshots(conn, snapshot_dir, full=False):
+    """Append rows changed since each table's watermark; returns {table: rows appended}."""
+    with _lock:
+        if full and os.path.isdir(snapshot_dir):
+            shutil.rmtree(snapshot_dir)
+        os.makedirs(snapshot_dir, exist_ok=True)
+        state = read_state(snapshot_dir)
+        watermarks, appended = state.get("watermarks", {}), {}
+        for table in SNAPSHOT_TABLES:
+            watermarks[table], appended[table] = _refresh_table(conn, snapshot_dir, table, watermarks.get(table))
+        state = dict(watermarks=watermarks, refreshed_at=pd.Timestamp.now().isoformat(timespec="seconds"))
+        write_state(snapshot_dir, state)
+    return appended
+
+
+def run_refresh(conn, snapshot_dir, full=False):
+    """refresh_snapshots under LOCK_NAME (_lock only covers this process); returns
+    {table: rows appended}, or None if another process holds the lock."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT GET_LOCK(%s, 0)", (LOCK_NAME,))
+    if not cursor.fetchone()[0]:
+        cursor.close()
+        return None
+    try:
+        return refresh_snapshots(conn, snapshot_dir, full=full)
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+        cursor.fetchall()
+        cursor.close()
+
+
+class SnapshotRefresher(PeriodicWorker):
+    """Runs run_refresh off the request thread for the admin page's refresh button (run_soon)."""
+    name, failure = "snapshot-refresher", "SNAPSHOT REFRESH FAILED"
+
+    def __init__(self, pool, snapshot_dir, interval=3600):
+        super().__init__(pool, interval)
+        self.snapshot_dir = snapshot_dir
+
+    def work(self, conn, full=False):
+        appended = run_refresh(conn, self.snapshot_dir, full=full)
+        if appended is not None:
+            self.last_run = appended
+        return appended
+
+
+def _records(df):
+    return df.replace({np.nan: None}).to_dict("records")
+
+
+def compute_rollups(snapshot_dir):
+    """Waste rollups per canteen, category, reason, hour of day and week."""
+    food = load_table(snapshot_dir, "food")
+    waste = load_table(snapshot_dir, "waste_report")
+    requests = load_table(snapshot_dir, "donation_request")
+    meals = load_table(snapshot_dir, "meal_beneficiary")
+
+    waste = waste.merge(food[["food_id", "canteen_id", "category"]], on="food_id", how="left")
+    done = requests[requests["status"] == "completed"].merge(food[["food_id", "canteen_id", "quantity"]], on="food_id", how="inner")
+
+    by_canteen = pd.DataFrame({
+        "wasted": waste.groupby("canteen_id")["quantity_wasted"].sum(),
+        "reports": waste.groupby("canteen_id").size(),
+        "donated": done.groupby("canteen_id")["quantity"].sum(),
+        "on_hand": food[food["status"].isin(["available", "requested", "approved"])].groupby("canteen_id")["quantity"].sum(),
+    }).fillna(0)
+    handled = by_canteen["wasted"] + by_canteen["donated"]
+    by_canteen["waste_share"] = np.where(handled > 0, by_canteen["wasted"] / handled.where(handled > 0, 1), 0.0).round(3)
+    by_canteen = by_canteen.sort_values("wasted", ascending=False).rename_axis("canteen_id").reset_index()
+
+    total_wasted = waste["quantity_wasted"].sum()
+    by_category = waste.groupby("category", dropna=False)["quantity_wasted"].agg(wasted="sum", reports="size")
+    by_category["share"] = (by_category["wasted"] / total_wasted).round(3) if total_wasted else 0.0
+    by_category = by_category.sort_values("wasted", ascending=False).reset_index()
+    by_category["category"] = by_category["category"].fillna("Unknown (deleted item)")
+
+    by_reason = waste.groupby("reason", dropna=False)["quantity_wasted"].agg(wasted="sum", reports="size").sort_values("wasted", ascending=False).reset_index()
+
+    hours = waste["report_time"].dt.hour.to_numpy(dtype=np.int64)
+    by_hour = pd.DataFrame({
+        "hour": np.arange(24),
+        "wasted": np.bincount(hours, weights=waste["quantity_wasted"].to_numpy(dtype=np.float64), minlength=24).astype(np.int64),
+        "reports": np.bincount(hours, minlength=24),
+    })
+
+    week = lambda times: times.dt.to_period("W").dt.start_time
+    by_week = pd.DataFrame({
+        "wasted": waste.groupby(week(waste["report_time"]))["quantity_wasted"].sum(),
+        "donated": done.groupby(week(done["completed_time"].fillna(done["approved_time"])))["quantity"].sum(),
+        "people_served": meals.groupby(week(meals["recorded_time"]))["people_served"].sum(),
+    }).fillna(0).astype(np.int64).sort_index().tail(TREND_WEEKS).rename_axis("week").reset_index()
+    by_week["week"] = by_week["week"].dt.strftime("%Y-%m-%d")
+
+    return dict(
+        by_canteen=_records(by_canteen), by_category=_records(by_category), by_reason=_records(by_reason),
+        by_hour=_records(by_hour), by_week=_records(by_week),
+        totals=dict(wasted=int(total_wasted), donated=int(done["quantity"].sum()), people_served=int(meals["people_served"].sum()),
+                    food_items=len(food), waste_reports=len(waste)),
+    )
+
+
+def get_rollups(snapshot_dir):
+    """Rollups for the current snapshot, recomputed only after a refresh."""
+    state = read_state(snapshot_dir)
+    version = state.get("refreshed_at")
+    if version is None:
+        return None, state
+    with _lock:
+        if _rollups["version"] != version:
+            _rollups["data"], _rollups["version"] = compute_rollups(snapshot_dir), version
+        return _rollups["data"], state
+
+
+if __name__ == "__main__":
+    import app
+    conn = app._connect()
+    appended = run_refresh(conn, app.ANALYTICS_DIR, full="--full" in sys.argv)
+    conn.close()
+    if appended is None:
+        print("Another process is refreshing the snapshots; nothing done.")
+    for table, n in (appended or {}).items():
+        print(f"{table}: {n} row(s) appended")
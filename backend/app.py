@@ -1,9 +1,31 @@
+import csv
+import logging
 import os
+import re
+import time
 import mysql.connector
-from flask import Flask, render_template, request, redirect, url_for, session, flash, g
+from flask import Flask, Response, make_response, render_template, request, redirect, url_for, session, flash, g, jsonify
+from markupsafe import Markup
 from datetime import datetime, timedelta
 from functools import wraps
 from werkzeug.security import generate_password_hash, check_password_hash
+from db_pool import ConnectionPool
+from audit_writer import AuditWriter, INSERT_SQL
+from counters import read_counters
+from leaderboard import LeaderboardCache
+from refdata import RefDataCache
+from expiry import ExpirySweeper
+from bulk_food import UploadError, iter_upload, validate_row
+from exports import FORMATS, stream_rows
+from analytics import SnapshotRefresher, get_rollups
+from archive import ArchiveScheduler, merge_page
+from metrics import Metrics, RequestTrace, TracedConnection
+from food_events import FoodEventBroadcaster
+from matching import MatchScheduler, run_matching
+from fragments import FragmentCache, fingerprint, make_etag
+from db_router import ReplicaRouter
+from forecast import ForecastCache, ForecastScheduler
+import sqlite_backend
 
 # -------------------------
 # Base Directories & App Setup
@@ -19,23 +41,182 @@ app.secret_key = "supersecretkey"
 # -------------------------
 # DB Config & Management
 # -------------------------
-DB_HOST, DB_USER, DB_PASS, DB_NAME = "localhost", "root", "root", "campus_food_waste"
+# Connection settings come from the environment; the defaults suit a local MySQL.
+# DB_BACKEND=sqlite instead keeps everything in one WAL-mode file at SQLITE_PATH
+# (created and seeded on first use): for single-node campuses and quick local runs.
+env = os.environ.get
+DB_BACKEND = env("DB_BACKEND", "mysql")
+SQLITE_PATH = env("SQLITE_PATH", os.path.join(BASE_DIR, "var", "campus_food_waste.sqlite3"))
+DB_HOST, DB_PORT = env("DB_HOST", "localhost"), int(env("DB_PORT", "3306"))
+DB_USER, DB_PASS, DB_NAME = env("DB_USER", "root"), env("DB_PASS", "root"), env("DB_NAME", "campus_food_waste")
+# Per-worker pool sizing: idle connections kept, extra allowed under load, seconds to wait, max connection age
+DB_POOL_SIZE, DB_POOL_OVERFLOW = int(env("DB_POOL_SIZE", "5")), int(env("DB_POOL_OVERFLOW", "10"))
+DB_POOL_TIMEOUT, DB_POOL_RECYCLE = int(env("DB_POOL_TIMEOUT", "30")), int(env("DB_POOL_RECYCLE", "3600"))
+# Read replicas: comma-separated host[:port] list, same database name as the primary.
+DB_REPLICAS = [r.strip() for r in env("DB_REPLICAS", "").split(",") if r.strip()] if DB_BACKEND == "mysql" else []
+DB_REPLICA_USER, DB_REPLICA_PASS = env("DB_REPLICA_USER", DB_USER), env("DB_REPLICA_PASS", DB_PASS)
+DB_REPLICA_MAX_LAG, DB_REPLICA_CHECK_INTERVAL = float(env("DB_REPLICA_MAX_LAG", "2")), float(env("DB_REPLICA_CHECK_INTERVAL", "5"))
+DB_STICKY_SECONDS = float(env("DB_STICKY_SECONDS", "10"))     # read from the primary this long after a session writes
+
+def _connect(host=None, port=None, user=None, password=None, **kwargs):
+    if DB_BACKEND == "sqlite":
+        return sqlite_backend.connect(SQLITE_PATH)
+    return mysql.connector.connect(
+        host=host or DB_HOST,
+        port=port or DB_PORT,
+        user=user or DB_USER,
+        password=DB_PASS if password is None else password,
+        database=DB_NAME,
+        autocommit=True,
+        **kwargs
+    )
+
+db_pool = ConnectionPool(_connect, size=DB_POOL_SIZE, overflow=DB_POOL_OVERFLOW,
+                         timeout=DB_POOL_TIMEOUT, recycle=DB_POOL_RECYCLE)
+
+def _replica(address):
+    host, _, port = address.partition(":")
+    connect = lambda: _connect(host, int(port or 3306), DB_REPLICA_USER, DB_REPLICA_PASS, connection_timeout=5)
+    return address, ConnectionPool(connect, size=DB_POOL_SIZE, overflow=DB_POOL_OVERFLOW,
+                                   timeout=DB_POOL_TIMEOUT, recycle=DB_POOL_RECYCLE)
+
+# Instrumentation: request/statement timings for /admin/metrics; statements slower
+# than SLOW_QUERY_MS go to var/slow_query.log with their parameters redacted.
+METRICS_ENABLED, SLOW_QUERY_MS = True, 200
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")     # lets a Prometheus scraper in without an admin session
+os.makedirs(os.path.join(BASE_DIR, "var"), exist_ok=True)
+_slow_handler = logging.FileHandler(os.path.join(BASE_DIR, "var", "slow_query.log"), delay=True)
+_slow_handler.setFormatter(logging.Formatter("%(message)s"))
+logging.getLogger("campus.slow_query").addHandler(_slow_handler)
+
+def _traced(conn):
+    return TracedConnection(conn, metrics, g.get('trace')) if METRICS_ENABLED else conn
 
 def get_db():
+    """Write handle: the primary."""
     if 'db' not in g:
-        g.db = mysql.connector.connect(
-            host=DB_HOST, 
-            user=DB_USER, 
-            password=DB_PASS, 
-            database=DB_NAME,
-            autocommit=True
-        )
-    return g.db
+        g.db = db_pool.acquire()
+        g.db_traced = _traced(g.db)
+    return g.db_traced
+
+def get_read_db():
+    """Read handle for read-only endpoints: a replica, or the primary when no replica is
+    usable or this session wrote within DB_STICKY_SECONDS (read-your-writes)."""
+    if 'read_db' not in g:
+        replica = read_replica()
+        if replica is not None:
+            try:
+                g.read_db_raw, g.read_db_pool = replica.pool.acquire(), replica.pool
+            except Exception as e:
+                replica.healthy, replica.error = False, str(e)
+                replica = None
+        g.read_db = _traced(g.read_db_raw) if replica is not None else get_db()
+    return g.read_db
+
+def read_replica():
+    """The replica reads should go to, or None for the primary (read-your-writes included)."""
+    return None if wrote_recently() else replica_router.choose()
+
+def note_write():
+    if DB_REPLICAS:
+        session['_wrote_at'] = time.time()
+
+def wrote_recently():
+    return time.time() - session.get('_wrote_at', 0) < DB_STICKY_SECONDS
+
+@app.after_request
+def stick_to_primary_after_writes(response):
+    if 'db' in g and request.method not in ('GET', 'HEAD', 'OPTIONS'):
+        note_write()
+    return response
+
+@app.before_request
+def start_request_trace():
+    if METRICS_ENABLED:
+        g.trace = RequestTrace(request.endpoint)
+
+@app.after_request
+def record_request_trace(response):
+    trace = g.pop('trace', None)
+    if trace is not None:
+        metrics.observe_request(request.endpoint, request.method, response.status_code, time.perf_counter() - trace.start, trace)
+    return response
+
+# Audit/login rows go through a write-behind queue; set AUDIT_ASYNC = False to insert inline
+AUDIT_ASYNC, AUDIT_BATCH_SIZE, AUDIT_FLUSH_INTERVAL, AUDIT_MAX_QUEUE = True, 200, 0.5, 10000
+
+def _load_leaderboard():
+    cursor = get_db().cursor(dictionary=True)
+    cursor.execute("SELECT l.lb_id, l.canteen_id, c.name AS canteen_name, c.location, l.total_items, l.donated_items, l.waste_score FROM leaderboard l JOIN canteen c ON l.canteen_id = c.canteen_id")
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows
+
+LEADERBOARD_TTL = 30
+REF_CACHE_SIZE, REF_CACHE_TTL = 256, 300
+
+# Page caching: shared fragments (leaderboard table, NGO food results) are cached by a data
+# version every worker derives alike (a hash of the ranking, the latest food_event id), and the
+# same versions drive ETag (plus Last-Modified where the data has a change time) so
+# revalidations get a 304 without rendering. Time-dependent fragments are also keyed by a
+# FRAGMENT_TIME_BUCKET slot.
+FRAGMENT_CACHE_SIZE, FRAGMENT_CACHE_TTL, FRAGMENT_TIME_BUCKET = 512, 300, 60
+STATIC_MAX_AGE = 365 * 24 * 3600
+
+def food_version(conn):
+    """(event_id, created_at) of the newest food_event; every write that changes the available list adds one."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT event_id, created_at FROM food_event ORDER BY event_id DESC LIMIT 1")
+    row = cursor.fetchone()
+    cursor.close()
+    return tuple(row) if row else (0, None)
+
+def not_modified(etag, last_modified):
+    """A 304 response if the client's copy is current, else None. Pending flash messages always force a render."""
+    if session.get('_flashes'):
+        return None
+    if request.if_none_match:
+        fresh = request.if_none_match.contains(etag)
+    else:
+        fresh = bool(request.if_modified_since and last_modified and last_modified <= request.if_modified_since.replace(tzinfo=None))
+    if not fresh:
+        return None
+    return conditional(Response(status=304), etag, last_modified)
+
+def conditional(response, etag, last_modified):
+    # Pages are per-user (nav, flashes): browsers may keep them but must revalidate every time.
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+@app.url_defaults
+def static_fingerprint(endpoint, values):
+    if endpoint == "static" and "filename" in values:
+        digest = fingerprint(os.path.join(app.static_folder, values["filename"]))
+        if digest:
+            values["v"] = digest
+
+@app.after_request
+def static_cache_headers(response):
+    if request.endpoint == "static" and request.args.get("v") and response.status_code in (200, 304):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = STATIC_MAX_AGE
+        response.cache_control.immutable = True
+    return response
 
 @app.teardown_appcontext
 def close_db(e=None):
+    broken = isinstance(e, mysql.connector.errors.OperationalError)
+    g.pop('read_db', None)
+    read_db = g.pop('read_db_raw', None)
+    if read_db is not None: g.pop('read_db_pool').release(read_db, discard=broken)
+    g.pop('db_traced', None)
     db = g.pop('db', None)
-    if db is not None: db.close()
+    if db is not None: db_pool.release(db, discard=broken)
 
 # -------------------------
 # Decorators
@@ -71,14 +252,276 @@ def ngo_required(f):
 # Helpers
 # -------------------------
 def write_audit(conn, action_text, table_name, record_id, performed_by):
+    row = (action_text, table_name, record_id, performed_by, datetime.now())
+    if AUDIT_ASYNC:
+        audit_writer.submit("audit_log", row)
+        return
     try:
         cur = conn.cursor()
-        cur.execute("INSERT INTO audit_log (action, table_name, record_id, performed_by) VALUES (%s,%s,%s,%s)",
-                    (action_text, table_name, record_id, performed_by))
+        cur.execute(INSERT_SQL["audit_log"], row)
         cur.close()
     except Exception as e:
         print(f"--- AUDIT LOG FAILED --- {e}")
 
+def record_login(conn, user_id, ip_address):
+    row = (user_id, ip_address, datetime.now())
+    if AUDIT_ASYNC:
+        audit_writer.submit("login_activity", row)
+    else:
+        cur = conn.cursor()
+        cur.execute(INSERT_SQL["login_activity"], row)
+        cur.close()
+
+# Reference data (roles, canteens, NGOs) is served from ref_cache; call
+# invalidate_reference_data() after writing to any of those tables. Maps derived from
+# a table are keyed under its kind, so invalidating "canteens" drops them too.
+def _fetch_all(sql):
+    cursor = get_db().cursor(dictionary=True)
+    cursor.execute(sql)
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows
+
+def list_canteens():
+    return ref_cache.get(("canteens",), lambda: _fetch_all("SELECT canteen_id, name FROM canteen"))
+
+def list_ngos():
+    return ref_cache.get(("ngos",), lambda: _fetch_all("SELECT ngo_id, name FROM ngo"))
+
+def role_id_for(role_name):
+    roles = ref_cache.get(("roles",), lambda: {r["role_name"]: r["role_id"] for r in _fetch_all("SELECT role_id, role_name FROM roles")})
+    return roles.get(role_name)
+
+def canteen_name(canteen_id):
+    names = ref_cache.get(("canteens", "names"), lambda: {c["canteen_id"]: c["name"] for c in list_canteens()})
+    return names.get(canteen_id)
+
+def ngo_name(ngo_id):
+    names = ref_cache.get(("ngos", "names"), lambda: {n["ngo_id"]: n["name"] for n in list_ngos()})
+    return names.get(ngo_id)
+
+def invalidate_reference_data(*kinds):
+    ref_cache.invalidate(*kinds)
+
+# Expiry: a background sweeper flips overdue food to 'expired'; listings classify
+# the rest in SQL against these windows.
+EXPIRY_SWEEP_INTERVAL, EXPIRY_SWEEP_BATCH = 60, 500
+EXPIRY_CRITICAL, EXPIRY_WARNING = timedelta(hours=1), timedelta(hours=3)
+
+def expiry_windows():
+    now = datetime.now()
+    return now + EXPIRY_CRITICAL, now + EXPIRY_WARNING
+
+def sweeper_audit(conn, action_text, table_name, record_id):
+    write_audit(conn, action_text, table_name, record_id, None)
+
+# Live feed: NGOs' available-food page subscribes to Server-Sent Events served by a
+# per-worker asyncio server on FOOD_EVENTS_PORT, fed by the food_event log (migration 005).
+FOOD_EVENTS_ENABLED, FOOD_EVENTS_HOST, FOOD_EVENTS_PORT, FOOD_EVENTS_POLL = True, "0.0.0.0", 5001, 1.0
+FOOD_EVENTS_URL = os.environ.get("FOOD_EVENTS_URL")     # set when a proxy serves the feed under the app's origin
+
+def ngo_session(cookie):
+    try:
+        data = app.session_interface.get_signing_serializer(app).loads(cookie or "", max_age=app.permanent_session_lifetime.total_seconds())
+    except Exception:
+        return False
+    return str(data.get("role", "")).lower() == "ngo"
+
+def food_events_url():
+    if not FOOD_EVENTS_ENABLED:
+        return None
+    return FOOD_EVENTS_URL or f"{request.scheme}://{request.host.rsplit(':', 1)[0]}:{FOOD_EVENTS_PORT}/ngo/events"
+
+# Auto-matching: every MATCH_INTERVAL seconds available food is assigned to NGOs with
+# spare capacity (backend/matching.py) and filed as pending requests for canteens to approve.
+MATCH_ENABLED, MATCH_INTERVAL = True, 300
+FOOD_CATEGORIES = ('Vegetarian', 'Non-Vegetarian', 'Beverage', 'Bakery', 'Other')
+
+# Retention: audit_log/login_activity rows older than ARCHIVE_HORIZON_DAYS move to monthly
+# Parquet files under ARCHIVE_DIR (backend/archive.py); the log views can include them.
+ARCHIVE_ENABLED, ARCHIVE_INTERVAL = True, 6 * 3600
+ARCHIVE_HORIZON_DAYS, ARCHIVE_BATCH = int(env("ARCHIVE_HORIZON_DAYS", "180")), 5000
+ARCHIVE_DIR = env("ARCHIVE_DIR", os.path.join(BASE_DIR, "var", "archive"))
+
+# Analytics reads Parquet snapshots only; refresh them from the admin page or with `python backend/analytics.py`.
+ANALYTICS_DIR = os.path.join(BASE_DIR, "var", "analytics")
+
+# Forecasting: every FORECAST_INTERVAL seconds the snapshots are refreshed and the per-canteen/category
+# surplus models refit (backend/forecast.py); dashboards read the next service's forecast from FORECAST_PATH.
+FORECAST_ENABLED, FORECAST_INTERVAL = True, 3600
+FORECAST_PATH = env("FORECAST_PATH", os.path.join(BASE_DIR, "var", "forecast", "model.joblib"))
+
+# Everything built from the settings above; create_app builds it again after applying its config.
+def build_components():
+    global replica_router, metrics, audit_writer, leaderboard_cache, ref_cache, fragment_cache
+    global expiry_sweeper, snapshot_refresher, food_events, match_scheduler, archive_scheduler, forecast_cache, forecast_scheduler
+    db_pool.size, db_pool.overflow, db_pool.timeout, db_pool.recycle = DB_POOL_SIZE, DB_POOL_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE
+    replica_router = ReplicaRouter([_replica(a) for a in DB_REPLICAS], max_lag=DB_REPLICA_MAX_LAG,
+                                   check_interval=DB_REPLICA_CHECK_INTERVAL)
+    metrics = Metrics(slow_query_ms=SLOW_QUERY_MS)
+    audit_writer = AuditWriter(db_pool, spill_path=os.path.join(BASE_DIR, "var", "audit_spill.jsonl"),
+                               max_batch=AUDIT_BATCH_SIZE, flush_interval=AUDIT_FLUSH_INTERVAL, max_queue=AUDIT_MAX_QUEUE)
+    leaderboard_cache = LeaderboardCache(_load_leaderboard, ttl=LEADERBOARD_TTL)
+    ref_cache = RefDataCache(maxsize=REF_CACHE_SIZE, ttl=REF_CACHE_TTL)
+    fragment_cache = FragmentCache(maxsize=FRAGMENT_CACHE_SIZE, ttl=FRAGMENT_CACHE_TTL)
+    expiry_sweeper = ExpirySweeper(db_pool, sweeper_audit, interval=EXPIRY_SWEEP_INTERVAL, batch_size=EXPIRY_SWEEP_BATCH)
+    snapshot_refresher = SnapshotRefresher(db_pool, ANALYTICS_DIR)
+    food_events = FoodEventBroadcaster(db_pool, ngo_session, cookie_name=app.config["SESSION_COOKIE_NAME"],
+                                       host=FOOD_EVENTS_HOST, port=FOOD_EVENTS_PORT, poll_interval=FOOD_EVENTS_POLL)
+    match_scheduler = MatchScheduler(db_pool, sweeper_audit, interval=MATCH_INTERVAL)
+    archive_scheduler = ArchiveScheduler(db_pool, ARCHIVE_DIR, horizon_days=ARCHIVE_HORIZON_DAYS,
+                                         batch_size=ARCHIVE_BATCH, interval=ARCHIVE_INTERVAL)
+    forecast_cache = ForecastCache(FORECAST_PATH)
+    forecast_scheduler = ForecastScheduler(db_pool, ANALYTICS_DIR, FORECAST_PATH, interval=FORECAST_INTERVAL)
+
+build_components()
+
+@app.before_request
+def start_background_workers():
+    expiry_sweeper.ensure_started()
+    if FOOD_EVENTS_ENABLED:
+        food_events.ensure_started()
+    if MATCH_ENABLED:
+        match_scheduler.ensure_started()
+    if ARCHIVE_ENABLED:
+        archive_scheduler.ensure_started()
+    if FORECAST_ENABLED:
+        forecast_scheduler.ensure_started()
+
+def retire_food_from_leaderboard(cursor, food_id):
+    # Called before a food row is deleted: its quantity and (cascaded) waste reports leave the canteen's totals.
+    # Callers invalidate leaderboard_cache once the transaction has committed.
+    cursor.execute("""
+        UPDATE leaderboard
+        SET total_items = total_items - (SELECT IFNULL(quantity, 0) FROM food WHERE food_id = %s)
+                                      - (SELECT COALESCE(SUM(quantity_wasted), 0) FROM waste_report WHERE food_id = %s),
+            donated_items = donated_items - (SELECT CASE WHEN status = 'donated' THEN IFNULL(quantity, 0) ELSE 0 END FROM food WHERE food_id = %s)
+        WHERE canteen_id = (SELECT canteen_id FROM food WHERE food_id = %s)
+    """, (food_id, food_id, food_id, food_id))
+
+# Multi-statement writes run through run_in_transaction, which retries the whole
+# unit of work when InnoDB picks it as a deadlock victim or a lock wait times out.
+TXN_RETRIES, TXN_RETRY_BACKOFF = 3, 0.05
+RETRYABLE_ERRNOS = (1213, 1205)
+
+def run_in_transaction(conn, work, retries=TXN_RETRIES, batched=False):
+    """Call work(cursor) inside one transaction and commit; returns work's result.
+
+    With batched=True, work opens and commits the transaction itself through
+    execute_batch(begin=..., commit=...) so no extra round trips are spent on
+    START TRANSACTION / COMMIT.
+    """
+    for attempt in range(retries + 1):
+        cursor = conn.cursor()
+        if not batched:
+            conn.start_transaction()
+        try:
+            result = work(cursor)
+            if not batched or conn.in_transaction:
+                conn.commit()
+            return result
+        except mysql.connector.Error as err:
+            conn.rollback()
+            if err.errno not in RETRYABLE_ERRNOS or attempt == retries:
+                raise
+            time.sleep(TXN_RETRY_BACKOFF * (2 ** attempt))
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+def execute_batch(cursor, statements, begin=False, commit=False):
+    """Send [(sql, params), ...] as one multi-statement round trip.
+
+    Returns the rows of the last statement that produced a result set.
+    """
+    if begin:
+        statements = [("START TRANSACTION", ())] + statements
+    if commit:
+        statements = statements + [("COMMIT", ())]
+    cursor.execute(";\n".join(sql for sql, _ in statements), tuple(p for _, params in statements for p in params))
+    rows = []
+    while True:
+        if cursor.with_rows:
+            rows = cursor.fetchall()
+        if not cursor.nextset():
+            return rows
+
+# Keyset pagination: pages are walked on (time, id) so each page is a bounded
+# index range scan, never an OFFSET over the whole table.
+PAGE_SIZE, MAX_PAGE_SIZE = 50, 500
+
+def _parse_cursor(raw):
+    try:
+        ts, row_id = raw.rsplit("_", 1)
+        return datetime.fromisoformat(ts), int(row_id)
+    except (AttributeError, ValueError):
+        return None
+
+def _parse_day(raw):
+    try:
+        return datetime.strptime(raw, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return None
+
+def _page_url(**cursor):
+    args = {k: v for k, v in request.args.items() if k not in ("after", "before")}
+    return url_for(request.endpoint, **request.view_args, **args, **cursor)
+
+def _date_filters(time_col):
+    """WHERE fragments and params for the ?from/?to day range (both inclusive)."""
+    where, params = [], []
+    day_from, day_to = _parse_day(request.args.get("from")), _parse_day(request.args.get("to"))
+    if day_from:
+        where.append(f"{time_col} >= %s"); params.append(day_from)
+    if day_to:
+        where.append(f"{time_col} < %s"); params.append(day_to + timedelta(days=1))
+    return where, params
+
+def keyset_page(cursor, select_sql, time_col, id_col, where=(), params=(), archive=None):
+    """Fetch one newest-first page of `select_sql`, honouring ?after/?before cursors and ?from/?to dates.
+
+    With `archive=(table, {column: value})` and ?archived=1, archived rows of that
+    table matching the filters are merged into the page.
+    """
+    try:
+        size = min(max(int(request.args.get("size", PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        size = PAGE_SIZE
+    dates, date_params = _date_filters(time_col)
+    where, params = list(where) + dates, list(params) + date_params
+
+    after, before = _parse_cursor(request.args.get("after")), _parse_cursor(request.args.get("before"))
+    order, op = ("ASC", ">") if before else ("DESC", "<")
+    anchor = before or after
+    if anchor:
+        where.append(f"({time_col} {op} %s OR ({time_col} = %s AND {id_col} {op} %s))")
+        params += [anchor[0], anchor[0], anchor[1]]
+
+    sql = select_sql + (" WHERE " + " AND ".join(where) if where else "")
+    cursor.execute(f"{sql} ORDER BY {time_col} {order}, {id_col} {order} LIMIT %s", (*params, size + 1))
+    rows = cursor.fetchall()
+    if archive and request.args.get("archived") == "1":
+        day_to = _parse_day(request.args.get("to"))
+        rows = merge_page(rows, ARCHIVE_DIR, archive[0], size + 1, newest_first=not before, anchor=anchor,
+                          day_from=_parse_day(request.args.get("from")), day_to=day_to and day_to + timedelta(days=1),
+                          where=archive[1])
+    more = len(rows) > size
+    rows = rows[:size]
+    if before:
+        rows.reverse()
+
+    time_key, id_key = time_col.split(".")[-1], id_col.split(".")[-1]
+    cursor_of = lambda row: f"{row[time_key].isoformat()}_{row[id_key]}"
+    has_older = more if not before else True
+    has_newer = more if before else bool(after)
+    return dict(
+        rows=rows, size=size,
+        next_url=_page_url(after=cursor_of(rows[-1])) if rows and has_older else None,
+        prev_url=_page_url(before=cursor_of(rows[0])) if rows and has_newer else None,
+    )
+
 # =============================================================================
 # AUTH & GENERAL ROUTES
 # =============================================================================
@@ -98,8 +541,8 @@ def login():
         # Plaintext password check to match your new SQL file
         if user and user['password'] == password:
             session.update(user_id=user["user_id"], username=user["username"], role=user["role_name"], ref_id=user["ref_id"])
-            cursor.execute("INSERT INTO login_activity (user_id, ip_address) VALUES (%s,%s)", (user["user_id"], request.remote_addr))
             cursor.close()
+            record_login(conn, user["user_id"], request.remote_addr)
             
             flash(f"Welcome back, {user['username']}!", 'success')
             
@@ -133,8 +576,7 @@ def register():
             ref_id = request.form.get('ngo_id')
 
         try:
-            cursor.execute("SELECT role_id FROM roles WHERE role_name = %s", (role_name,))
-            role_id = cursor.fetchone()['role_id']
+            role_id = role_id_for(role_name)
             
             cursor.execute("INSERT INTO users (username, email, password, role_id, ref_id) VALUES (%s, %s, %s, %s, %s)",
                            (username, email, password, role_id, ref_id))
@@ -148,10 +590,7 @@ def register():
         
         return redirect(url_for('register'))
 
-    cursor.execute("SELECT canteen_id, name FROM canteen")
-    canteens = cursor.fetchall()
-    cursor.execute("SELECT ngo_id, name FROM ngo")
-    ngos = cursor.fetchall()
+    canteens, ngos = list_canteens(), list_ngos()
     cursor.close()
     
     return render_template("register.html", canteens=canteens, ngos=ngos)
@@ -168,25 +607,17 @@ def logout():
 @app.route("/admin/dashboard")
 @admin_required
 def admin_dashboard():
-    conn = get_db()
+    conn = get_read_db()
     cursor = conn.cursor(dictionary=True)
     
-    cursor.execute("SELECT COUNT(*) as total_users FROM users")
-    total_users = cursor.fetchone()['total_users']
-    
-    cursor.execute("SELECT SUM(quantity) as total_food FROM food")
-    total_food = cursor.fetchone()['total_food'] or 0
-    
-    cursor.execute("SELECT COUNT(*) as total_donations FROM donation_request WHERE status = 'completed'")
-    total_donations = cursor.fetchone()['total_donations']
-    
+    counters = read_counters(cursor, "global")
     cursor.close()
     
     return render_template("admin/admin.html", 
                            user=session, 
-                           total_users=total_users, 
-                           total_food=total_food, 
-                           total_donations=total_donations)
+                           total_users=counters.get("total_users", 0), 
+                           total_food=counters.get("total_food", 0), 
+                           total_donations=counters.get("total_donations", 0))
 
 @app.route("/admin/add_user", methods=["GET", "POST"])
 @admin_required
@@ -202,8 +633,7 @@ def add_user():
         if role == "canteen": ref_id = request.form.get("canteen_id")
         elif role == "ngo": ref_id = request.form.get("ngo_id")
         
-        cursor.execute("SELECT role_id FROM roles WHERE role_name=%s", (role,))
-        role_id = cursor.fetchone()["role_id"]
+        role_id = role_id_for(role)
         
         try:
             cursor.execute("INSERT INTO users (username, password, email, role_id, ref_id) VALUES (%s,%s,%s,%s,%s)", (username, password, email, role_id, ref_id))
@@ -217,10 +647,7 @@ def add_user():
             else:
                 flash(f"An error occurred: {err.msg}", "danger")
             
-    cursor.execute("SELECT canteen_id, name FROM canteen")
-    canteens = cursor.fetchall()
-    cursor.execute("SELECT ngo_id, name FROM ngo")
-    ngos = cursor.fetchall()
+    canteens, ngos = list_canteens(), list_ngos()
     cursor.close()
     return render_template("admin/add_user.html", canteens=canteens, ngos=ngos, user=session)
 
@@ -243,8 +670,7 @@ def manage_users():
             ref_id = 0
             if role == "canteen": ref_id = request.form.get(f"canteen_id_{uid}")
             elif role == "ngo": ref_id = request.form.get(f"ngo_id_{uid}")
-            cursor.execute("SELECT role_id FROM roles WHERE role_name=%s", (role,))
-            role_id = cursor.fetchone()["role_id"]
+            role_id = role_id_for(role)
             query_parts = ["UPDATE users SET username=%s, email=%s, role_id=%s, ref_id=%s"]
             params = [username, email, role_id, ref_id]
             if password:
@@ -257,54 +683,202 @@ def manage_users():
             flash("Changes saved successfully.", "success")
         return redirect(url_for("manage_users"))
     
-    cursor.execute("SELECT canteen_id, name FROM canteen")
-    canteens = cursor.fetchall()
-    cursor.execute("SELECT ngo_id, name FROM ngo")
-    ngos = cursor.fetchall()
+    canteens, ngos = list_canteens(), list_ngos()
     cursor.execute("SELECT u.user_id, u.username, u.email, u.password, r.role_name, u.ref_id FROM users u JOIN roles r ON u.role_id = r.role_id ORDER BY u.user_id ASC")
     users = cursor.fetchall()
     cursor.close()
     return render_template("admin/manage_users.html", user=session, users=users, canteens=canteens, ngos=ngos)
 
+@app.route("/admin/db_pool")
+@admin_required
+def db_pool_stats():
+    return jsonify(pool=db_pool.stats(), audit_writer=audit_writer.stats(),
+                   read_routing=replica_router.stats())
+
+@app.route("/admin/metrics")
+def metrics_endpoint():
+    token_ok = METRICS_TOKEN and request.headers.get("Authorization") == f"Bearer {METRICS_TOKEN}"
+    if not token_ok and session.get("role", "").lower() != "admin":
+        return Response("forbidden\n", status=403, mimetype="text/plain")
+    gauges = [("db_pool", "Connection pool state.", db_pool.stats()),
+              ("audit_writer", "Write-behind audit queue state.", {k: v for k, v in audit_writer.stats().items() if isinstance(v, (int, float))}),
+              ("food_events", "NGO live feed state.", food_events.stats()),
+              ("auto_matching", "Auto-matching totals.", dict(matched=match_scheduler.matched)),
+              ("archival", "Rows moved to the archive by this worker.", dict(archived=archive_scheduler.archived)),
+              ("forecast", "Surplus series refit by this worker.", dict(refit=forecast_scheduler.refit)),
+              ("read_routing", "Replica reads and primary fallbacks.",
+               replica_router.totals())]
+    return Response(metrics.render(gauges), mimetype="text/plain; version=0.0.4")
+
+@app.route("/admin/cache_stats")
+@admin_required
+def cache_stats():
+    return jsonify(reference_data=ref_cache.stats(), fragments=fragment_cache.stats(),
+                   leaderboard=dict(hits=leaderboard_cache.hits, misses=leaderboard_cache.misses, version=leaderboard_cache.version))
+
+@app.route("/admin/reference_data/refresh", methods=["POST"])
+@admin_required
+def refresh_reference_data():
+    invalidate_reference_data()
+    leaderboard_cache.invalidate()
+    fragment_cache.clear()
+    flash("Reference data cache cleared.", "success")
+    return redirect(url_for("admin_dashboard"))
+
+@app.route("/admin/matching/run", methods=["POST"])
+@admin_required
+def run_matching_now():
+    summary = run_matching(get_db(), sweeper_audit)
+    if summary is None:
+        flash("An auto-matching run is already in progress.", "warning")
+        return redirect(url_for("admin_dashboard"))
+    flash(f"Auto-matching filed {summary['matched']} of {summary['items']} available item(s) ({summary['units']} units) across {summary['ngos']} NGO(s).", "success")
+    return redirect(url_for("admin_dashboard"))
+
+@app.route("/admin/archive/run", methods=["POST"])
+@admin_required
+def run_archival_now():
+    # A large backlog takes longer than a request may; the run continues on the scheduler's pool.
+    if archive_scheduler.run_soon():
+        flash(f"Archival of audit log and login rows older than {ARCHIVE_HORIZON_DAYS} days started in the background.", "success")
+    else:
+        flash("An archival run is already in progress.", "warning")
+    return redirect(url_for("admin_dashboard"))
+
 @app.route("/admin/view_logs")
 @admin_required
 def view_logs():
-    cursor = get_db().cursor(dictionary=True)
-    cursor.execute("SELECT * FROM audit_log ORDER BY event_time DESC")
-    logs = cursor.fetchall()
-    return render_template("admin/view_logs.html", user=session, logs=logs)
+    cursor = get_read_db().cursor(dictionary=True)
+    where, params, archived = [], [], {}
+    if request.args.get("actor", "").isdigit():
+        where.append("performed_by = %s"); params.append(int(request.args["actor"]))
+        archived["performed_by"] = int(request.args["actor"])
+    page = keyset_page(cursor, "SELECT * FROM audit_log", "event_time", "log_id", where, params, archive=("audit_log", archived))
+    cursor.close()
+    return render_template("admin/view_logs.html", user=session, logs=page["rows"], page=page)
 
 @app.route("/admin/view_activity")
 @admin_required
 def view_activity():
-    cursor = get_db().cursor(dictionary=True)
-    cursor.execute("SELECT la.activity_id, u.username, la.login_time, la.logout_time, la.ip_address FROM login_activity la JOIN users u ON la.user_id = u.user_id ORDER BY la.login_time DESC")
-    activities = cursor.fetchall()
-    return render_template("admin/view_activity.html", user=session, activities=activities)
+    cursor = get_read_db().cursor(dictionary=True)
+    where, params, archived = [], [], {}
+    if request.args.get("actor"):
+        where.append("u.username = %s"); params.append(request.args["actor"])
+        archived["username"] = request.args["actor"]
+    page = keyset_page(cursor, "SELECT la.activity_id, u.username, la.login_time, la.logout_time, la.ip_address FROM login_activity la JOIN users u ON la.user_id = u.user_id",
+                       "la.login_time", "la.activity_id", where, params, archive=("login_activity", archived))
+    cursor.close()
+    return render_template("admin/view_activity.html", user=session, activities=page["rows"], page=page)
 
 @app.route("/admin/view_reports")
 @admin_required
 def view_reports():
-    cursor = get_db().cursor(dictionary=True)
-    cursor.execute("SELECT wr.report_id, f.item_name, u.username AS reporter, wr.reason, wr.quantity_wasted, wr.report_time FROM waste_report wr JOIN food f ON wr.food_id=f.food_id JOIN users u ON wr.reported_by=u.user_id ORDER BY wr.report_time DESC")
-    reports = cursor.fetchall()
-    return render_template("admin/view_reports.html", user=session, reports=reports)
+    cursor = get_read_db().cursor(dictionary=True)
+    where, params = [], []
+    if request.args.get("actor"):
+        where.append("u.username = %s"); params.append(request.args["actor"])
+    page = keyset_page(cursor, "SELECT wr.report_id, f.item_name, u.username AS reporter, wr.reason, wr.quantity_wasted, wr.report_time FROM waste_report wr JOIN food f ON wr.food_id=f.food_id JOIN users u ON wr.reported_by=u.user_id",
+                       "wr.report_time", "wr.report_id", where, params)
+    cursor.close()
+    return render_template("admin/view_reports.html", user=session, reports=page["rows"], page=page)
+
+def leaderboard_page(title, your_canteen_id=None):
+    # No Last-Modified: the leaderboard table has no change time, and a worker's own load
+    # time says nothing about when the data changed. The content-derived ETag validates alone.
+    version = leaderboard_cache.current_version()
+    etag = make_etag("leaderboard", version, title, your_canteen_id, session.get('user_id'))
+    cached = not_modified(etag, None)
+    if cached:
+        return cached
+    table_html = fragment_cache.get(("leaderboard", version), lambda: render_template("_leaderboard_table.html", leaderboard=leaderboard_cache.ranked()))
+    if your_canteen_id:
+        marker = f'<tr data-canteen-id="{your_canteen_id}">'
+        table_html = table_html.replace(marker, marker[:-1] + ' class="table-success">', 1)
+    page = render_template("leaderboard.html", user=session, table_html=Markup(table_html), title=title,
+                           canteen_count=leaderboard_cache.count(), your_canteen_id=your_canteen_id,
+                           your_rank=leaderboard_cache.rank_of(your_canteen_id) if your_canteen_id else None)
+    return conditional(make_response(page), etag, None)
 
 @app.route("/admin/view_leaderboard")
 @admin_required
 def view_leaderboard():
-    cursor = get_db().cursor(dictionary=True)
-    cursor.execute("SELECT l.lb_id, c.name AS canteen_name, c.location, l.total_items, l.donated_items, l.waste_score FROM leaderboard l JOIN canteen c ON l.canteen_id=c.canteen_id ORDER BY l.waste_score DESC")
-    leaderboard = cursor.fetchall()
-    return render_template("leaderboard.html", user=session, leaderboard=leaderboard, title="Full Leaderboard")
+    return leaderboard_page("Full Leaderboard")
 
 @app.route("/admin/impact")
 @admin_required
 def impact():
-    cursor = get_db().cursor(dictionary=True)
-    cursor.execute("SELECT mb.beneficiary_id, mb.donation_id, mb.people_served, mb.location, mb.recorded_time FROM meal_beneficiary mb ORDER BY mb.recorded_time DESC")
-    impact_data = cursor.fetchall()
-    return render_template("admin/impact.html", user=session, impact_data=impact_data)
+    cursor = get_read_db().cursor(dictionary=True)
+    where, params = [], []
+    if request.args.get("actor", "").isdigit():
+        where.append("mb.donation_id IN (SELECT request_id FROM donation_request WHERE ngo_id = %s)"); params.append(int(request.args["actor"]))
+    page = keyset_page(cursor, "SELECT mb.beneficiary_id, mb.donation_id, mb.people_served, mb.location, mb.recorded_time FROM meal_beneficiary mb",
+                       "mb.recorded_time", "mb.beneficiary_id", where, params)
+    cursor.close()
+    return render_template("admin/impact.html", user=session, impact_data=page["rows"], page=page)
+
+# Streaming exports: (select, time column, actor filter, actor type), always oldest first.
+EXPORT_CHUNK = 1000
+EXPORTS = {
+    "audit_log": ("SELECT log_id, action, table_name, record_id, performed_by, event_time FROM audit_log",
+                  "event_time", "log_id", "performed_by = %s", int),
+    "waste_report": ("SELECT wr.report_id, wr.food_id, f.item_name, u.username AS reporter, wr.reason, wr.quantity_wasted, wr.report_time FROM waste_report wr JOIN food f ON wr.food_id=f.food_id JOIN users u ON wr.reported_by=u.user_id",
+                      "wr.report_time", "wr.report_id", "u.username = %s", str),
+    "meal_beneficiary": ("SELECT mb.beneficiary_id, mb.donation_id, mb.people_served, mb.location, mb.recorded_time FROM meal_beneficiary mb",
+               "mb.recorded_time", "mb.beneficiary_id", "mb.donation_id IN (SELECT request_id FROM donation_request WHERE ngo_id = %s)", int),
+}
+
+@app.route("/admin/export/<kind>")
+@admin_required
+def export_data(kind):
+    if kind not in EXPORTS:
+        return jsonify(error=f"unknown export {kind!r}"), 404
+    fmt = request.args.get("format", "csv")
+    if fmt not in FORMATS:
+        return jsonify(error=f"format must be one of {', '.join(FORMATS)}"), 400
+    select_sql, time_col, id_col, actor_sql, actor_type = EXPORTS[kind]
+    where, params = _date_filters(time_col)
+    actor = request.args.get("actor", "")
+    if actor and (actor_type is str or actor.isdigit()):
+        where.append(actor_sql); params.append(actor_type(actor))
+    sql = select_sql + (" WHERE " + " AND ".join(where) if where else "") + f" ORDER BY {time_col}, {id_col}"
+
+    compress = request.args.get("gzip") != "0" and "gzip" in request.headers.get("Accept-Encoding", "")
+    headers = {"Content-Disposition": f"attachment; filename={kind}_{datetime.now():%Y%m%d_%H%M}.{fmt}", "Vary": "Accept-Encoding"}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    write_audit(get_db(), f"Exported {kind} as {fmt}", kind, 0, session.get("user_id"))
+    replica = read_replica()
+    pool = replica.pool if replica else db_pool
+    return Response(stream_rows(pool, sql, params, fmt, compress, EXPORT_CHUNK), mimetype=FORMATS[fmt], headers=headers)
+
+@app.route("/admin/analytics")
+@admin_required
+def analytics():
+    rollups, state = get_rollups(ANALYTICS_DIR)
+    if rollups:
+        for row in rollups["by_canteen"]:
+            row["canteen_name"] = canteen_name(row["canteen_id"]) or f"Canteen #{row['canteen_id']}"
+    return render_template("admin/analytics.html", user=session, rollups=rollups, state=state)
+
+@app.route("/admin/analytics/refresh", methods=["POST"])
+@admin_required
+def refresh_analytics():
+    # A full refresh copies whole tables; it runs off the request, under the snapshot lock.
+    if snapshot_refresher.run_soon(full=request.form.get("full") == "1"):
+        flash("Analytics snapshot refresh started in the background.", "success")
+    else:
+        flash("An analytics snapshot refresh is already in progress.", "warning")
+    return redirect(url_for("analytics"))
+
+@app.route("/admin/forecast/retrain", methods=["POST"])
+@admin_required
+def retrain_forecast():
+    # Refreshing the snapshots and refitting can outlast the request timeout; the run continues on the scheduler's pool.
+    if forecast_scheduler.run_soon(full=request.form.get("full") == "1"):
+        flash("Surplus forecast retraining started in the background.", "success")
+    else:
+        flash("A forecast retraining run is already in progress.", "warning")
+    return redirect(url_for("admin_dashboard"))
 
 # =============================================================================
 # CANTEEN ROUTES
@@ -312,32 +886,13 @@ def impact():
 @app.route("/canteen/dashboard")
 @canteen_required
 def canteen_dashboard():
-    conn = get_db()
+    conn = get_read_db()
     cursor = conn.cursor(dictionary=True)
     canteen_id = session['ref_id']
     
-    cursor.execute("SELECT name FROM canteen WHERE canteen_id = %s", (canteen_id,))
-    canteen = cursor.fetchone()
-
-    cursor.execute("""
-        SELECT 
-            SUM(quantity) as total,
-            SUM(CASE WHEN status = 'available' THEN quantity ELSE 0 END) as available,
-            SUM(CASE WHEN status = 'donated' THEN quantity ELSE 0 END) as donated
-        FROM food WHERE canteen_id = %s
-    """, (canteen_id,))
-    stats = cursor.fetchone()
-
-    cursor.execute("""
-        SELECT COUNT(*) as pending
-        FROM donation_request dr
-        JOIN food f ON dr.food_id = f.food_id
-        WHERE f.canteen_id = %s AND dr.status = 'pending'
-    """, (canteen_id,))
-    stats['pending'] = cursor.fetchone()['pending']
+    stats = read_counters(cursor, "canteen", canteen_id)
     
-    cursor.execute("SELECT * FROM leaderboard WHERE canteen_id = %s", (canteen_id,))
-    leaderboard = cursor.fetchone()
+    leaderboard = leaderboard_cache.get(canteen_id)
     
     cursor.execute("""
         SELECT f.item_name, f.quantity, f.unit, n.name as ngo_name, dr.approved_time as donated_time
@@ -353,10 +908,11 @@ def canteen_dashboard():
     
     return render_template("canteen/canteen.html", 
                            user=session, 
-                           canteen_name=canteen['name'],
+                           canteen_name=canteen_name(canteen_id),
                            stats=stats,
                            leaderboard=leaderboard,
-                           recent_donations=recent_donations)
+                           recent_donations=recent_donations,
+                           forecast=forecast_cache.for_canteen(canteen_id))
 
 @app.route("/canteen/add_food", methods=['GET', 'POST'])
 @canteen_required
@@ -372,6 +928,7 @@ def add_food():
             new_food_id = cursor.lastrowid
             
             cursor.execute("UPDATE leaderboard SET total_items = total_items + %s WHERE canteen_id = %s", (int(quantity), canteen_id))
+            leaderboard_cache.adjust(canteen_id, total=int(quantity))
             
             write_audit(conn, f"Added food '{item_name}'", "food", new_food_id, session.get("user_id"))
             flash("Food item added successfully!", "success")
@@ -382,28 +939,78 @@ def add_food():
 
     return render_template("canteen/add_food.html", user=session)
     
+BULK_MAX_ROWS, BULK_CHUNK = 1000, 500
+
+@app.route("/canteen/bulk_add_food", methods=['GET', 'POST'])
+@canteen_required
+def bulk_add_food():
+    if request.method == 'GET':
+        return render_template("canteen/bulk_add_food.html", user=session)
+
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        flash("Please choose a CSV or JSON file to upload.", "danger")
+        return redirect(url_for('bulk_add_food'))
+
+    canteen_id, now = session['ref_id'], datetime.now()
+    rows, errors = [], []
+    try:
+        for line_no, raw in iter_upload(upload):
+            if len(rows) + len(errors) >= BULK_MAX_ROWS:
+                errors.append(dict(line=line_no, error=f"upload limit of {BULK_MAX_ROWS} items reached; remaining lines skipped"))
+                break
+            values, error = validate_row(raw, now)
+            if error:
+                errors.append(dict(line=line_no, error=error))
+            else:
+                rows.append((canteen_id, *values))
+    except (UploadError, UnicodeDecodeError, csv.Error) as e:
+        flash(f"Could not read upload: {e}", "danger")
+        return redirect(url_for('bulk_add_food'))
+
+    inserted = 0
+    if rows:
+        conn = get_db()
+        total_quantity = sum(r[3] for r in rows)
+
+        def work(cursor):
+            first_id = None
+            for i in range(0, len(rows), BULK_CHUNK):
+                cursor.executemany("INSERT INTO food (canteen_id, item_name, category, quantity, unit, expiry_time, notes) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                                   rows[i:i + BULK_CHUNK])
+                first_id = first_id or cursor.lastrowid
+            cursor.execute("UPDATE leaderboard SET total_items = total_items + %s WHERE canteen_id = %s", (total_quantity, canteen_id))
+            return first_id
+
+        try:
+            first_id = run_in_transaction(conn, work)
+            inserted = len(rows)
+        except mysql.connector.Error as err:
+            flash(f"Upload failed, nothing was added: {err.msg}", "danger")
+            return render_template("canteen/bulk_add_food.html", user=session, errors=errors, inserted=0)
+        leaderboard_cache.adjust(canteen_id, total=total_quantity)
+        write_audit(conn, f"Bulk added {inserted} food items ({total_quantity} units)", "food", first_id, session.get("user_id"))
+
+    flash(f"{inserted} item(s) added, {len(errors)} rejected.", "success" if inserted and not errors else "warning")
+    return render_template("canteen/bulk_add_food.html", user=session, errors=errors, inserted=inserted)
+
 @app.route("/canteen/food_list")
 @canteen_required
 def canteen_food_list():
-    conn = get_db()
+    conn = get_read_db()
     cursor = conn.cursor(dictionary=True)
     canteen_id = session['ref_id']
     
-    cursor.execute("SELECT name FROM canteen WHERE canteen_id = %s", (canteen_id,))
-    canteen_name = cursor.fetchone()['name']
+    name = canteen_name(canteen_id)
     
-    cursor.execute("SELECT *, %s as canteen_name FROM food WHERE canteen_id = %s ORDER BY expiry_time ASC", (canteen_name, canteen_id))
+    cursor.execute("""
+        SELECT *, %s as canteen_name,
+            CASE WHEN expiry_time < %s THEN 'expiry-critical' WHEN expiry_time < %s THEN 'expiry-warning' ELSE '' END AS expiry_class
+        FROM food WHERE canteen_id = %s ORDER BY expiry_time ASC
+    """, (name, *expiry_windows(), canteen_id))
     food_items = cursor.fetchall()
-    
-    now = datetime.now()
-    for food in food_items:
-        food['expiry_class'] = ''
-        if food.get('expiry_time'):
-            time_diff = food['expiry_time'] - now
-            if time_diff < timedelta(hours=1): food['expiry_class'] = 'expiry-critical'
-            elif time_diff < timedelta(hours=3): food['expiry_class'] = 'expiry-warning'
 
-    return render_template("food_list.html", user=session, food_items=food_items, title=f"My Food Items ({canteen_name})")
+    return render_template("food_list.html", user=session, food_items=food_items, title=f"My Food Items ({name})")
 
 @app.route("/canteen/edit_food/<int:food_id>", methods=['GET', 'POST'])
 @canteen_required
@@ -420,6 +1027,12 @@ def edit_food(food_id):
         update_cursor = conn.cursor()
         update_cursor.execute("UPDATE food SET item_name=%s, category=%s, quantity=%s, unit=%s, expiry_time=%s, notes=%s WHERE food_id=%s",
                               (item_name, category, quantity, unit, expiry_time, notes, food_id))
+        delta = int(quantity) - (food['quantity'] or 0)
+        if delta:
+            donated_delta = delta if food['status'] == 'donated' else 0
+            update_cursor.execute("UPDATE leaderboard SET total_items = total_items + %s, donated_items = donated_items + %s WHERE canteen_id = %s",
+                                  (delta, donated_delta, food['canteen_id']))
+            leaderboard_cache.adjust(food['canteen_id'], total=delta, donated=donated_delta)
         write_audit(conn, f"Edited food '{item_name}'", "food", food_id, session.get("user_id"))
         flash(f"'{item_name}' updated successfully!", "success")
         return redirect(url_for('canteen_food_list'))
@@ -434,37 +1047,94 @@ def delete_food(food_id):
     food = cursor.fetchone()
     if food:
         item_name = food['item_name']
-        delete_cursor = conn.cursor()
-        delete_cursor.execute("DELETE FROM food WHERE food_id = %s", (food_id,))
+
+        def work(cursor):
+            retire_food_from_leaderboard(cursor, food_id)
+            cursor.execute("DELETE FROM food WHERE food_id = %s", (food_id,))
+
+        run_in_transaction(conn, work)
+        leaderboard_cache.invalidate()
+        note_write()
         write_audit(conn, f"Deleted food '{item_name}'", "food", food_id, session.get("user_id"))
         flash(f"'{item_name}' has been deleted.", "success")
     else:
         flash("Food item not found or you don't have permission to delete it.", "error")
     return redirect(url_for('canteen_food_list'))
 
+def decide_requests(conn, canteen_id, request_ids, action, user_id):
+    """Approve or reject a set of this canteen's pending requests in one transaction.
+
+    Approving keeps the earliest selected request per food item and rejects every
+    other pending request for that item; rejecting frees the food again once no
+    pending or approved request is left on it.
+    """
+    now, placeholders = datetime.now(), ",".join(["%s"] * len(request_ids))
+
+    def work(cursor):
+        pending = execute_batch(cursor, [(f"""
+            SELECT dr.request_id, dr.food_id
+            FROM donation_request dr JOIN food f ON dr.food_id = f.food_id
+            WHERE dr.request_id IN ({placeholders}) AND dr.status = 'pending' AND f.canteen_id = %s
+            ORDER BY dr.request_time, dr.request_id
+            FOR UPDATE
+        """, (*request_ids, canteen_id))], begin=True)
+        winners = {}
+        for request_id, food_id in pending:
+            winners.setdefault(food_id, request_id)
+        decided = list(winners.values()) if action == 'approve' else [r for r, _ in pending]
+        food_ids, auto_rejected = list(winners), 0
+
+        if decided:
+            ids_in, foods_in = ",".join(["%s"] * len(decided)), ",".join(["%s"] * len(food_ids))
+            status = 'approved' if action == 'approve' else 'rejected'
+            statements = [(f"UPDATE donation_request SET status = %s, approved_by = %s, approved_time = %s WHERE request_id IN ({ids_in})",
+                           (status, user_id, now, *decided))]
+            if action == 'approve':
+                statements += [
+                    (f"UPDATE donation_request SET status = 'rejected', approved_by = %s, approved_time = %s WHERE food_id IN ({foods_in}) AND status = 'pending'",
+                     (user_id, now, *food_ids)),
+                    ("SELECT ROW_COUNT()", ()),
+                    (f"UPDATE food SET status = 'approved' WHERE food_id IN ({foods_in})", food_ids),
+                ]
+            else:
+                statements.append((f"""
+                    UPDATE food SET status = 'available'
+                    WHERE food_id IN ({foods_in}) AND status = 'requested'
+                      AND NOT EXISTS (SELECT 1 FROM donation_request dr WHERE dr.food_id = food.food_id AND dr.status IN ('pending', 'approved'))
+                """, food_ids))
+            counts = execute_batch(cursor, statements, commit=True)
+            auto_rejected = counts[0][0] if counts else 0
+        return dict(status='approved' if action == 'approve' else 'rejected', decided=decided,
+                    auto_rejected=auto_rejected, skipped=len(request_ids) - len(pending))
+
+    return run_in_transaction(conn, work, batched=True)
+
 @app.route('/canteen/manage_requests', methods=['GET', 'POST'])
 @canteen_required
 def manage_requests():
     conn, canteen_id = get_db(), session['ref_id']
     if request.method == 'POST':
-        request_id, action = request.form['request_id'], request.form['action']
-        new_status = 'approved' if action == 'approve' else 'rejected'
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("UPDATE donation_request SET status = %s, approved_by = %s, approved_time = NOW() WHERE request_id = %s",
-                       (new_status, session['user_id'], request_id))
-        cursor.execute("SELECT food_id FROM donation_request WHERE request_id = %s", (request_id,))
-        result = cursor.fetchone()
-        if result:
-            food_id_to_update = result['food_id']
-            food_status_update = 'available' if action == 'reject' else 'approved'
-            cursor.execute("UPDATE food SET status = %s WHERE food_id = %s", (food_status_update, food_id_to_update,))
-        write_audit(conn, f"Request {request_id} was {new_status}", "donation_request", request_id, session.get("user_id"))
-        flash(f"Request has been {new_status}.", "success")
+        action = request.form['action']
+        selected = request.form.getlist('request_ids') or [request.form.get('request_id')]
+        request_ids = list(dict.fromkeys(int(r) for r in selected if r and r.isdigit()))
+        if action not in ('approve', 'reject') or not request_ids:
+            flash("Select at least one request.", "warning")
+            return redirect(url_for('manage_requests'))
+        summary = decide_requests(conn, canteen_id, request_ids, action, session['user_id'])
+        if summary['decided']:
+            write_audit(conn, f"{len(summary['decided'])} request(s) {summary['status']} ({summary['auto_rejected']} competing auto-rejected)",
+                        "donation_request", summary['decided'][0], session.get("user_id"))
+        message = f"{len(summary['decided'])} request(s) {summary['status']}."
+        if summary['auto_rejected']:
+            message += f" {summary['auto_rejected']} competing request(s) for the same food were rejected."
+        if summary['skipped']:
+            message += f" {summary['skipped']} request(s) were no longer pending and were skipped."
+        flash(message, "success" if summary['decided'] else "warning")
         return redirect(url_for('manage_requests'))
     
     cursor = conn.cursor(dictionary=True)
     cursor.execute("""
-        SELECT dr.request_id, f.item_name, f.quantity, f.unit, n.name AS ngo_name, n.phone, dr.request_time, dr.status
+        SELECT dr.request_id, f.item_name, f.quantity, f.unit, n.name AS ngo_name, n.phone, dr.request_time, dr.status, dr.auto_matched
         FROM donation_request dr 
         JOIN food f ON dr.food_id = f.food_id 
         JOIN ngo n ON dr.ngo_id = n.ngo_id
@@ -479,41 +1149,47 @@ def manage_requests():
 def file_waste_report():
     if request.method == 'POST':
         conn = get_db()
-        cursor = conn.cursor(dictionary=True)
         food_id, reason, quantity_wasted, reported_by = request.form.get('food_id'), request.form.get('reason'), request.form.get('quantity_wasted'), session['user_id']
-        
-        # 1. Fetch current quantity
-        cursor.execute("SELECT quantity FROM food WHERE food_id = %s", (food_id,))
-        food = cursor.fetchone()
-        
-        if not food:
+        canteen_id = session['ref_id']
+        try:
+            wasted = int(quantity_wasted)
+        except (TypeError, ValueError):
+            wasted = 0
+        if wasted <= 0:
+            flash("Please enter a wasted quantity greater than zero.", "danger")
+            return redirect(url_for('file_waste_report'))
+
+        def work(cursor):
+            # Partial waste is a single conditional decrement; quantity can never go below 1 (CHECK quantity > 0).
+            cursor.execute("UPDATE food SET quantity = quantity - %s WHERE food_id = %s AND canteen_id = %s AND quantity > %s",
+                           (wasted, food_id, canteen_id, wasted))
+            fully_wasted = cursor.rowcount == 0
+            if fully_wasted:
+                cursor.execute("SELECT quantity FROM food WHERE food_id = %s AND canteen_id = %s FOR UPDATE", (food_id, canteen_id))
+                row = cursor.fetchone()
+                if not row:
+                    return "missing", None
+                if row[0] != wasted:
+                    return "insufficient", None
+                retire_food_from_leaderboard(cursor, food_id)
+            cursor.execute("INSERT INTO waste_report (food_id, reported_by, reason, quantity_wasted) VALUES (%s, %s, %s, %s)",
+                           (food_id, reported_by, reason, wasted))
+            report_id = cursor.lastrowid
+            if fully_wasted:
+                cursor.execute("DELETE FROM food WHERE food_id = %s", (food_id,))
+            return ("removed" if fully_wasted else "reduced"), report_id
+
+        outcome, new_report_id = run_in_transaction(conn, work)
+        if outcome == "removed":
+            leaderboard_cache.invalidate()
+        if outcome == "missing":
             flash("Food item not found.", "danger")
             return redirect(url_for('canteen_dashboard'))
-
-        current_quantity = food['quantity']
-        wasted = int(quantity_wasted)
-        
-        if wasted > current_quantity:
+        if outcome == "insufficient":
             flash("Cannot report more waste than available quantity.", "danger")
         else:
-            new_quantity = current_quantity - wasted
-            insert_cursor = conn.cursor()
-            
-            # 2. Insert the waste report
-            insert_cursor.execute("INSERT INTO waste_report (food_id, reported_by, reason, quantity_wasted) VALUES (%s, %s, %s, %s)",
-                                  (food_id, reported_by, reason, wasted))
-            new_report_id = insert_cursor.lastrowid
-            
-            # 3. FIX: Check if new quantity is zero and DELETE the record instead of setting quantity to 0.
-            if new_quantity == 0:
-                insert_cursor.execute("DELETE FROM food WHERE food_id = %s", (food_id,))
-                status_message = "Food item fully wasted and removed from inventory."
-            else:
-                insert_cursor.execute("UPDATE food SET quantity = %s WHERE food_id = %s", (new_quantity, food_id))
-                status_message = "Waste report filed successfully."
-                
             write_audit(conn, f"Filed waste report (qty: {wasted}) for food_id {food_id}", "waste_report", new_report_id, session.get("user_id"))
-            flash(status_message, "success")
+            flash("Food item fully wasted and removed from inventory." if outcome == "removed" else "Waste report filed successfully.", "success")
             return redirect(url_for('canteen_dashboard'))
     
     conn = get_db()
@@ -527,11 +1203,7 @@ def file_waste_report():
 @app.route("/canteen/leaderboard")
 @canteen_required
 def canteen_leaderboard():
-    conn, canteen_id = get_db(), session['ref_id']
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT l.canteen_id, c.name as canteen_name, c.location, l.total_items, l.donated_items, l.waste_score FROM leaderboard l JOIN canteen c ON l.canteen_id = c.canteen_id ORDER BY l.waste_score DESC")
-    full_leaderboard = cursor.fetchall()
-    return render_template("leaderboard.html", user=session, leaderboard=full_leaderboard, title="Canteen Leaderboard", your_canteen_id=canteen_id)
+    return leaderboard_page("Canteen Leaderboard", session['ref_id'])
 
 # =============================================================================
 # NGO ROUTES
@@ -539,54 +1211,166 @@ def canteen_leaderboard():
 @app.route("/ngo/dashboard")
 @ngo_required
 def ngo_dashboard():
-    conn = get_db()
+    conn = get_read_db()
     cursor = conn.cursor(dictionary=True)
     ngo_id = session['ref_id']
     
-    cursor.execute("SELECT name FROM ngo WHERE ngo_id = %s", (ngo_id,))
-    ngo = cursor.fetchone()
+    stats = read_counters(cursor, "ngo", ngo_id)
+    cursor.close()
 
-    cursor.execute("""
-        SELECT 
-            COUNT(*) as total_requests,
-            SUM(CASE WHEN status = 'approved' THEN 1 ELSE 0 END) as approved,
-            SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END) as pending
-        FROM donation_request WHERE ngo_id = %s
-    """, (ngo_id,))
-    stats = cursor.fetchone()
-    
-    cursor.execute("SELECT SUM(people_served) as total_meals FROM meal_beneficiary mb JOIN donation_request dr ON mb.donation_id = dr.request_id WHERE dr.ngo_id = %s", (ngo_id,))
-    stats['total_meals'] = cursor.fetchone()['total_meals'] or 0
+    # Where surplus is expected next, so pickups can be lined up before it is listed.
+    upcoming = forecast_cache.next_service()
+    if upcoming:
+        upcoming = dict(upcoming, canteens=sorted(
+            (dict(entry, canteen_id=cid, canteen_name=canteen_name(cid) or f"Canteen #{cid}") for cid, entry in upcoming["canteens"].items()),
+            key=lambda entry: -entry["total"]))
+
+    return render_template("ngo/ngo.html", user=session, ngo_name=ngo_name(ngo_id), stats=stats, forecast=upcoming)
+
+# Search: FULLTEXT over item name/unit/notes and canteen name/location (migration 007),
+# with category/canteen facets and an expiry window; results are paged by offset.
+SEARCH_WINDOWS = (1, 3, 6, 12, 24)          # ?within=<hours> choices
+SEARCH_MIN_TERM = 3                          # innodb_ft_min_token_size
 
-    return render_template("ngo/ngo.html", user=session, ngo_name=ngo['name'], stats=stats)
+def _boolean_query(q):
+    """Prefix-match every word of `q` (IN BOOLEAN MODE); operators typed by the user are dropped."""
+    terms = re.findall(r"\w+", q or "")
+    return " ".join(f"{t}*" for t in terms if len(t) >= SEARCH_MIN_TERM)
+
+def search_food(cursor, q="", category=None, canteen_id=None, within=None, page=1, size=PAGE_SIZE):
+    """One page of available food matching the filters, plus category/canteen facet counts.
+
+    Each facet is counted with every filter applied except its own, so the
+    counts show what picking another value would return.
+    """
+    now = datetime.now()
+    where, params = ["f.status = 'available'", "f.expiry_time > %s", "f.quantity > 0"], [now]
+    query, relevance, relevance_params = _boolean_query(q) if DB_BACKEND == "mysql" else "", "0", []
+    if query:
+        match_categories = [c for c in FOOD_CATEGORIES if any(c.lower().startswith(t.lower()) for t in re.findall(r"\w+", q))]
+        text = ["MATCH(f.item_name, f.unit, f.notes) AGAINST (%s IN BOOLEAN MODE)",
+                "f.canteen_id IN (SELECT canteen_id FROM canteen WHERE MATCH(name, location) AGAINST (%s IN BOOLEAN MODE))"]
+        params += [query, query]
+        if match_categories:
+            text.append(f"f.category IN ({','.join(['%s'] * len(match_categories))})")
+            params += match_categories
+        where.append("(" + " OR ".join(text) + ")")
+        relevance, relevance_params = "MATCH(f.item_name, f.unit, f.notes) AGAINST (%s IN BOOLEAN MODE)", [query]
+    elif q:
+        where.append("(f.item_name LIKE %s OR f.notes LIKE %s)")      # too short for the FULLTEXT index, or no FULLTEXT (sqlite)
+        params += [f"%{q}%", f"%{q}%"]
+    if within:
+        where.append("f.expiry_time <= %s"); params.append(now + timedelta(hours=within))
+
+    def facet(column, extra, extra_params):
+        # Grouped in index order (migration 007); ranking the handful of groups is left to Python.
+        clauses = where + extra
+        cursor.execute(f"SELECT {column} AS value, COUNT(*) AS n FROM food f WHERE {' AND '.join(clauses)} GROUP BY {column}",
+                       params + extra_params)
+        return sorted(cursor.fetchall(), key=lambda r: -r["n"])
+
+    by_canteen = facet("f.canteen_id", ["f.category = %s"] if category else [], [category] if category else [])
+    by_category = facet("f.category", ["f.canteen_id = %s"] if canteen_id else [], [canteen_id] if canteen_id else [])
+    total = sum(r["n"] for r in by_category if not category or r["value"] == category)
+
+    if category:
+        where.append("f.category = %s"); params.append(category)
+    if canteen_id:
+        where.append("f.canteen_id = %s"); params.append(canteen_id)
+    order = "relevance DESC, f.expiry_time ASC" if query else "f.expiry_time ASC"
+    cursor.execute(f"""
+        SELECT f.*, c.name AS canteen_name, {relevance} AS relevance,
+            CASE WHEN f.expiry_time < %s THEN 'expiry-critical' WHEN f.expiry_time < %s THEN 'expiry-warning' ELSE '' END AS expiry_class
+        FROM food f JOIN canteen c ON f.canteen_id = c.canteen_id
+        WHERE {' AND '.join(where)}
+        ORDER BY {order}, f.food_id LIMIT %s OFFSET %s
+    """, (*relevance_params, *expiry_windows(), *params, size, (page - 1) * size))
+    rows = cursor.fetchall()
+
+    for r in by_canteen:
+        r["name"] = canteen_name(r["value"]) or f"Canteen #{r['value']}"
+    return dict(rows=rows, total=total, page=page, size=size, pages=max((total + size - 1) // size, 1),
+                facets=dict(category=by_category, canteen=by_canteen))
+
+def _search_args():
+    args = request.args
+    within = args.get("within", type=int)
+    try:
+        size = min(max(int(args.get("size", PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        size = PAGE_SIZE
+    return dict(q=args.get("q", "").strip()[:100],
+                category=args.get("category") if args.get("category") in FOOD_CATEGORIES else None,
+                canteen_id=args.get("canteen", type=int), within=within if within in SEARCH_WINDOWS else None,
+                page=max(args.get("page", 1, type=int), 1), size=size)
 
 @app.route("/ngo/food_list")
 @ngo_required
 def ngo_food_list():
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("""
-        SELECT f.*, c.name as canteen_name 
-        FROM food f JOIN canteen c ON f.canteen_id = c.canteen_id
-        WHERE f.status = 'available' AND f.quantity > 0 
-        ORDER BY f.expiry_time ASC
-    """)
-    food_items = cursor.fetchall()
-    return render_template("food_list.html", user=session, food_items=food_items, title="Available Food for Donation")
+    filters, conn = _search_args(), get_read_db()
+    version, changed_at = food_version(conn)
+    slot = int(time.time() // FRAGMENT_TIME_BUCKET)      # expiry classes and the expiry cut-off move with the clock
+    args_key = tuple(sorted(request.args.items(multi=True)))
+    etag = make_etag("ngo_food_list", version, slot, args_key, session.get('user_id'))
+    last_modified = max(filter(None, (changed_at, datetime.fromtimestamp(slot * FRAGMENT_TIME_BUCKET))))
+    cached = not_modified(etag, last_modified)
+    if cached:
+        return cached
+
+    def render():
+        cursor = conn.cursor(dictionary=True)
+        result = search_food(cursor, **filters)
+        cursor.close()
+        page_url = lambda n: url_for("ngo_food_list", **{**request.args.to_dict(), "page": n})
+        return render_template("_food_results.html", food_items=result["rows"], search=result, filters=filters,
+                               windows=SEARCH_WINDOWS, page_url=page_url)
+
+    results_html = fragment_cache.get(("ngo_food_list", version, slot, args_key), render)
+    filtered = any(filters[k] for k in ("q", "category", "canteen_id", "within"))
+    page = render_template("food_list.html", user=session, results_html=Markup(results_html), title="Available Food for Donation",
+                           events_url=None if filtered or filters["page"] > 1 else food_events_url(),
+                           expiry_windows=(EXPIRY_CRITICAL.total_seconds(), EXPIRY_WARNING.total_seconds()))
+    return conditional(make_response(page), etag, last_modified)
+
+@app.route("/ngo/search")
+@ngo_required
+def ngo_search():
+    cursor = get_read_db().cursor(dictionary=True)
+    result = search_food(cursor, **_search_args())
+    cursor.close()
+    fields = ("food_id", "item_name", "category", "quantity", "unit", "expiry_time", "notes", "canteen_id", "canteen_name")
+    result["rows"] = [{k: row[k] for k in fields} for row in result["rows"]]
+    return jsonify(result)
 
 @app.route("/ngo/request", methods=['POST'])
 @ngo_required
 def request_pickup():
     food_id, ngo_id = request.form.get('food_id'), session['ref_id']
     conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT 1 FROM donation_request WHERE food_id = %s AND ngo_id = %s", (food_id, ngo_id))
-    if cursor.fetchone():
+
+    def work(cursor):
+        # Lock the food row first so concurrent requests queue here instead of deadlocking later.
+        cursor.execute("SELECT status FROM food WHERE food_id = %s AND quantity > 0 AND expiry_time > %s FOR UPDATE", (food_id, datetime.now()))
+        row = cursor.fetchone()
+        if not row or row[0] not in ('available', 'requested'):
+            return "unavailable", None
+        try:
+            cursor.execute("INSERT INTO donation_request (food_id, ngo_id) VALUES (%s, %s)", (food_id, ngo_id))
+        except mysql.connector.IntegrityError as err:
+            if err.errno == 1062:  # uq_dr_food_ngo
+                return "duplicate", None
+            raise
+        new_request_id = cursor.lastrowid
+        if row[0] == 'available':
+            cursor.execute("UPDATE food SET status = 'requested' WHERE food_id = %s", (food_id,))
+        return "requested", new_request_id
+
+    outcome, new_request_id = run_in_transaction(conn, work)
+    if outcome == "duplicate":
         flash("You have already requested this item.", "error")
+    elif outcome == "unavailable":
+        flash("This item is no longer available.", "error")
     else:
-        cursor.execute("INSERT INTO donation_request (food_id, ngo_id) VALUES (%s, %s)", (food_id, ngo_id))
-        new_request_id = cursor.lastrowid
-        cursor.execute("UPDATE food SET status = 'requested' WHERE food_id = %s", (food_id,))
         write_audit(conn, f"NGO request for food_id {food_id}", "donation_request", new_request_id, session.get("user_id"))
         flash("Request sent successfully!", "success")
     return redirect(url_for('ngo_food_list'))
@@ -594,12 +1378,14 @@ def request_pickup():
 @app.route("/ngo/history")
 @ngo_required
 def ngo_donation_history():
-    conn = get_db()
+    conn = get_read_db()
     cursor = conn.cursor(dictionary=True)
     ngo_id = session['ref_id']
     
-    # THIS IS THE UPDATED QUERY
-    cursor.execute("""
+    where, params = ["dr.ngo_id = %s"], [ngo_id]
+    if request.args.get("status") in ("pending", "approved", "completed", "rejected"):
+        where.append("dr.status = %s"); params.append(request.args["status"])
+    page = keyset_page(cursor, """
         SELECT 
             f.item_name, 
             f.category, 
@@ -615,11 +1401,37 @@ def ngo_donation_history():
         JOIN food f ON dr.food_id = f.food_id 
         JOIN canteen c ON f.canteen_id = c.canteen_id
         JOIN ngo n ON dr.ngo_id = n.ngo_id
-        WHERE dr.ngo_id = %s 
-        ORDER BY dr.request_time DESC
-    """, (ngo_id,))
-    history = cursor.fetchall()
-    return render_template("ngo/donation_history.html", user=session, history=history)
+    """, "dr.request_time", "dr.request_id", where, params)
+    cursor.close()
+    return render_template("ngo/donation_history.html", user=session, history=page["rows"], page=page)
+
+def record_beneficiaries(conn, ngo_id, request_id, people_served, location):
+    """Complete an approved donation and record its beneficiaries in two round trips.
+
+    The first batch opens the transaction and locks the request and its food row;
+    the second writes meal_beneficiary, donation_request, food and leaderboard and
+    commits. Returns None if the request is not an approved request of this NGO.
+    """
+    def work(cursor):
+        found = execute_batch(cursor, [("""
+            SELECT f.food_id, f.quantity, f.canteen_id
+            FROM donation_request dr JOIN food f ON f.food_id = dr.food_id
+            WHERE dr.request_id = %s AND dr.ngo_id = %s AND dr.status = 'approved'
+            FOR UPDATE
+        """, (request_id, ngo_id))], begin=True)
+        if not found:
+            return None
+        food_id, quantity, canteen_id = found[0]
+        inserted = execute_batch(cursor, [
+            ("INSERT INTO meal_beneficiary (donation_id, people_served, location) VALUES (%s, %s, %s)", (request_id, people_served, location)),
+            ("SELECT LAST_INSERT_ID()", ()),
+            ("UPDATE donation_request SET status = 'completed', completed_time = %s WHERE request_id = %s", (datetime.now(), request_id)),
+            ("UPDATE food SET status = 'donated' WHERE food_id = %s", (food_id,)),
+            ("UPDATE leaderboard SET donated_items = donated_items + %s WHERE canteen_id = %s", (int(quantity), canteen_id)),
+        ], commit=True)
+        return dict(beneficiary_id=inserted[0][0], canteen_id=canteen_id, quantity=int(quantity))
+
+    return run_in_transaction(conn, work, batched=True)
 
 @app.route("/ngo/record_beneficiaries", methods=['GET', 'POST'])
 @ngo_required
@@ -634,26 +1446,10 @@ def ngo_record_beneficiaries():
         if not donation_request_id:
             flash("Please select a completed donation to report on.", "error")
         else:
-            cursor.execute("""
-                SELECT f.food_id, f.quantity, f.canteen_id 
-                FROM food f JOIN donation_request dr ON f.food_id = dr.food_id
-                WHERE dr.request_id = %s
-            """, (donation_request_id,))
-            food_info = cursor.fetchone()
-            if food_info:
-                food_id = food_info['food_id']
-                quantity = food_info['quantity']
-                canteen_id_to_update = food_info['canteen_id']
-
-                cursor.execute("INSERT INTO meal_beneficiary (donation_id, people_served, location) VALUES (%s, %s, %s)",
-                                      (donation_request_id, people_served, location))
-                new_beneficiary_id = cursor.lastrowid
-
-                cursor.execute("UPDATE donation_request SET status = 'completed' WHERE request_id = %s", (donation_request_id,))
-                cursor.execute("UPDATE food SET status = 'donated' WHERE food_id = %s", (food_id,))
-                cursor.execute("UPDATE leaderboard SET donated_items = donated_items + %s WHERE canteen_id = %s", (int(quantity), canteen_id_to_update))
-                
-                write_audit(conn, f"Recorded beneficiaries for request_id {donation_request_id}", "meal_beneficiary", new_beneficiary_id, session.get("user_id"))
+            recorded = record_beneficiaries(conn, ngo_id, donation_request_id, people_served, location)
+            if recorded:
+                leaderboard_cache.adjust(recorded['canteen_id'], donated=recorded['quantity'])
+                write_audit(conn, f"Recorded beneficiaries for request_id {donation_request_id}", "meal_beneficiary", recorded['beneficiary_id'], session.get("user_id"))
                 flash("Impact report submitted successfully!", "success")
             else:
                 flash("Could not find the original donation. Report failed.", "error")
@@ -667,8 +1463,106 @@ def ngo_record_beneficiaries():
     completed_donations = cursor.fetchall()
     return render_template("ngo/record_beneficiaries.html", user=session, completed_donations=completed_donations)
 
+def _coordinate(value, limit):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if -limit <= value <= limit else None
+
+@app.route("/ngo/matching", methods=['GET', 'POST'])
+@ngo_required
+def ngo_matching():
+    conn = get_db()
+    ngo_id = session['ref_id']
+    if request.method == 'POST':
+        capacity = request.form.get('capacity', '0')
+        categories = [c for c in request.form.getlist('preferred_categories') if c in FOOD_CATEGORIES]
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE ngo SET capacity = %s, preferred_categories = %s, location = %s, latitude = %s, longitude = %s
+            WHERE ngo_id = %s
+        """, (max(int(capacity), 0) if capacity.isdigit() else 0, ",".join(categories) or None,
+              request.form.get('location') or None, _coordinate(request.form.get('latitude'), 90),
+              _coordinate(request.form.get('longitude'), 180), ngo_id))
+        cursor.close()
+        write_audit(conn, "Updated auto-matching preferences", "ngo", ngo_id, session.get("user_id"))
+        flash("Auto-matching preferences saved.", "success")
+        return redirect(url_for('ngo_matching'))
+
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT capacity, preferred_categories, location, latitude, longitude FROM ngo WHERE ngo_id = %s", (ngo_id,))
+    profile = cursor.fetchone()
+    cursor.execute("""
+        SELECT COALESCE(SUM(f.quantity), 0) AS committed FROM donation_request dr JOIN food f ON f.food_id = dr.food_id
+        WHERE dr.ngo_id = %s AND dr.status IN ('pending', 'approved')
+    """, (ngo_id,))
+    committed = cursor.fetchone()['committed']
+    cursor.close()
+    preferred = profile['preferred_categories'] or set()
+    if isinstance(preferred, str):
+        preferred = set(preferred.split(","))
+    return render_template("ngo/matching.html", user=session, profile=profile, preferred=preferred,
+                           committed=committed, categories=FOOD_CATEGORIES)
+
+# -------------------------
+# App Factory & Worker Lifecycle
+# -------------------------
+# Importing this module builds `app` and its pools, caches and background workers
+# without opening a connection or starting a thread, so a pre-fork server can load
+# it once in the master. Each worker calls init_worker() after fork and shutdown()
+# before it exits (see wsgi.py and gunicorn.conf.py).
+def _pools():
+    return [db_pool] + [r.pool for r in replica_router.replicas]
+
+# Settings read once at import (the template folder, the slow-query log) that create_app cannot change.
+IMPORT_TIME_SETTINGS = {"BASE_DIR"}
+
+def create_app(config=None):
+    """Apply `config` (Flask settings and/or this module's UPPERCASE settings), rebuild the
+    pools' consumers, caches and background workers from it, and precompile templates.
+    Call it before any worker starts (before init_worker)."""
+    config = dict(config or {})
+    fixed = IMPORT_TIME_SETTINGS.intersection(config)
+    if fixed:
+        raise ValueError(f"{', '.join(sorted(fixed))} cannot be changed after import")
+    for key, value in config.items():
+        if key.isupper() and key in globals():
+            globals()[key] = value
+    app.config.update(config)
+    build_components()
+    # Compiled before fork, the templates are shared copy-on-write by every worker.
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+    return app
+
+def init_worker():
+    """Per-worker setup after fork: clean pools, warm reference data and the leaderboard, start background workers."""
+    for pool in _pools():
+        pool.forget()
+    with app.app_context():
+        try:
+            list_canteens(), list_ngos(), role_id_for("admin")
+            leaderboard_cache.ranked()
+        except Exception as e:
+            print(f"--- WARM-UP FAILED --- {e}")      # the caches fill on first use instead
+    start_background_workers()
+
+def shutdown():
+    """Graceful stop once in-flight requests are done: let the running sweep/match finish,
+    flush queued audit rows, then close idle connections."""
+    food_events.stop()
+    match_scheduler.stop()
+    archive_scheduler.stop()
+    forecast_scheduler.stop()
+    expiry_sweeper.stop()
+    snapshot_refresher.stop()
+    audit_writer.stop()
+    for pool in _pools():
+        pool.dispose()
+
 # -------------------------
 # Run App
 # -------------------------
 if __name__ == "__main__":
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    create_app().run(debug=True, port=5000)
\ No newline at end of file
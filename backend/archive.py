@@ -0,0 +1,224 @@
+"""Hot/cold retention for audit_log and login_activity.
+
+Rows older than the retention horizon are copied, oldest first and at most
+`batch_size` at a time, into zstd-compressed Parquet files partitioned by
+month (var/archive/<table>/<YYYY-MM>/part-<first id>-<last id>.parquet) and
+then deleted from the hot table by primary key. A batch that is retried after
+a crash between the write and the delete rewrites the same file, and readers
+drop duplicate ids, so no row is lost or shown twice.
+
+merge_page() folds archived rows into a keyset page of the admin views. It
+opens only the monthly partitions that overlap the page's time range, and
+skips the archive entirely when the page is already filled by hot rows newer
+than anything archived.
+
+    python backend/archive.py [--horizon-days 180] [--batch 5000] [--max-batches 200]
+"""
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from snapshots import read_state, write_parquet, write_state
+from workers import PeriodicWorker
+
+# table: SELECT over the hot rows, its time and key columns, and the archived columns' dtypes.
+# login_activity keeps the username so archived rows still read without the users table.
+ARCHIVE_TABLES = {
+    "audit_log": dict(
+        sql="SELECT log_id, action, table_name, record_id, performed_by, event_time FROM audit_log",
+        time="event_time", key="log_id",
+        columns={"log_id": "int64", "action": "string", "table_name": "string", "record_id": "int64",
+                 "performed_by": "Int64", "event_time": "datetime64[ns]"}),
+    "login_activity": dict(
+        sql="SELECT la.activity_id, la.user_id, u.username, la.login_time, la.logout_time, la.ip_address "
+            "FROM login_activity la LEFT JOIN users u ON u.user_id = la.user_id",
+        time="la.login_time", key="la.activity_id",
+        columns={"activity_id": "int64", "user_id": "int64", "username": "string", "login_time": "datetime64[ns]",
+                 "logout_time": "datetime64[ns]", "ip_address": "string"}),
+}
+COMPRESSION = "zstd"
+LOCK_NAME = "campus_food_waste_archive"       # MySQL named lock: one archiver at a time across workers
+
+_state_lock = threading.Lock()
+
+
+def _bare(col):
+    return col.split(".")[-1]
+
+
+def archive_batch(conn, archive_dir, table, cutoff, batch_size):
+    """Move up to `batch_size` of the oldest rows before `cutoff` into the archive; returns rows moved."""
+    spec = ARCHIVE_TABLES[table]
+    time_key, key = _bare(spec["time"]), _bare(spec["key"])
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(f"{spec['sql']} WHERE {spec['time']} < %s ORDER BY {spec['time']}, {spec['key']} LIMIT %s", (cutoff, batch_size))
+    rows = cursor.fetchall()
+    if not rows:
+        cursor.close()
+        return 0
+    df = pd.DataFrame.from_records(rows, columns=list(spec["columns"])).astype(spec["columns"])
+    for month, part in df.groupby(df[time_key].dt.strftime("%Y-%m")):
+        name = f"part-{part[key].min():010d}-{part[key].max():010d}.parquet"
+        write_parquet(part.reset_index(drop=True), os.path.join(archive_dir, table, month, name), COMPRESSION)
+    ids = df[key].tolist()
+    cursor.execute(f"DELETE FROM {table} WHERE {key} IN ({', '.join(['%s'] * len(ids))})", ids)
+    cursor.close()
+    return len(ids)
+
+
+def run_archival(conn, archive_dir, horizon_days=180, batch_size=5000, max_batches=200, pause=0.2, now=None):
+    """Archive everything older than the horizon, a bounded batch at a time; returns {table: rows moved}.
+
+    Holds a MySQL named lock for the run; returns None if another process holds it.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT GET_LOCK(%s, 0)", (LOCK_NAME,))
+    if not cursor.fetchone()[0]:
+        cursor.close()
+        return None
+    try:
+        cutoff = (now or datetime.now()) - timedelta(days=horizon_days)
+        moved = {}
+        for table in ARCHIVE_TABLES:
+            moved[table] = 0
+            for _ in range(max_batches):
+                n = archive_batch(conn, archive_dir, table, cutoff, batch_size)
+                moved[table] += n
+                if n < batch_size:
+                    break
+                time.sleep(pause)           # let replication and concurrent inserts catch up between batches
+            if moved[table]:
+                with _state_lock:
+                    state = read_state(archive_dir)
+                    entry = state.setdefault(table, {})
+                    entry["archived_before"] = max(entry.get("archived_before", ""), cutoff.isoformat(timespec="seconds"))
+                    entry["rows"] = entry.get("rows", 0) + moved[table]
+                    entry["last_run"] = datetime.now().isoformat(timespec="seconds")
+                    write_state(archive_dir, state)
+        return moved
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+        cursor.fetchall()
+        cursor.close()
+
+
+def _months(archive_dir, table):
+    path = os.path.join(archive_dir, table)
+    return sorted(m for m in os.listdir(path) if len(m) == 7) if os.path.isdir(path) else []
+
+
+def _month_bounds(month):
+    start = datetime.strptime(month, "%Y-%m")
+    return start, (start + timedelta(days=32)).replace(day=1)
+
+
+def read_rows(archive_dir, table, lower=None, upper=None, where=None, newest_first=True, limit=50):
+    """Up to `limit` archived rows with lower <= time <= upper and column == value for each
+    item of `where`, in time order; reads only the months overlapping [lower, upper]."""
+    spec = ARCHIVE_TABLES[table]
+    time_key, key = _bare(spec["time"]), _bare(spec["key"])
+    filters = [(col, "==", value) for col, value in (where or {}).items()]
+    if lower:
+        filters.append((time_key, ">=", pd.Timestamp(lower)))
+    if upper:
+        filters.append((time_key, "<=", pd.Timestamp(upper)))
+
+    frames, found = [], 0
+    for month in sorted(_months(archive_dir, table), reverse=newest_first):
+        start, end = _month_bounds(month)
+        if (lower and end <= lower) or (upper and start > upper):
+            continue
+        month_dir = os.path.join(archive_dir, table, month)
+        paths = [os.path.join(month_dir, f) for f in sorted(os.listdir(month_dir)) if f.endswith(".parquet")]
+        if not paths:
+            continue
+        df = pq.read_table(paths, filters=filters or None).to_pandas()
+        frames.append(df)
+        found += len(df)
+        if found >= limit:
+            break                       # months are disjoint, so later ones sort after everything found
+    if not frames:
+        return pd.DataFrame(columns=list(spec["columns"])).astype(spec["columns"])
+    df = pd.concat(frames, ignore_index=True).drop_duplicates(key)
+    return df.sort_values([time_key, key], ascending=not newest_first).head(limit).reset_index(drop=True)
+
+
+def _records(df):
+    rows = df.astype(object).where(df.notna(), None).to_dict("records")
+    for row in rows:
+        for col, value in row.items():
+            if isinstance(value, pd.Timestamp):
+                row[col] = value.to_pydatetime()
+        row["archived"] = True
+    return rows
+
+
+def merge_page(rows, archive_dir, table, limit, newest_first=True, anchor=None, day_from=None, day_to=None, where=None):
+    """Merge archived rows into one keyset page of hot `rows` (already ordered and cut at `limit`).
+
+    `anchor` is the page's (time, id) cursor: rows strictly older than it when
+    paging newest-first, strictly newer otherwise. `day_to` is exclusive.
+    """
+    spec = ARCHIVE_TABLES[table]
+    time_key, key = _bare(spec["time"]), _bare(spec["key"])
+    archived_before = read_state(archive_dir).get(table, {}).get("archived_before")
+    if archived_before is None:
+        return rows
+    archived_before = datetime.fromisoformat(archived_before)
+    if newest_first and len(rows) >= limit and rows[-1][time_key] >= archived_before:
+        return rows                     # the page is full of rows newer than anything archived
+    if not newest_first and anchor and anchor[0] >= archived_before:
+        return rows
+
+    lower, upper = day_from, day_to - timedelta(microseconds=1) if day_to else None
+    if anchor and newest_first:
+        upper = min(upper, anchor[0]) if upper else anchor[0]
+    elif anchor:
+        lower = max(lower, anchor[0]) if lower else anchor[0]
+    df = read_rows(archive_dir, table, lower, upper, where, newest_first, limit + 1)
+    if anchor:
+        t, i = pd.Timestamp(anchor[0]), anchor[1]
+        beyond = (df[time_key] < t) | ((df[time_key] == t) & (df[key] < i)) if newest_first else \
+                 (df[time_key] > t) | ((df[time_key] == t) & (df[key] > i))
+        df = df[beyond]
+
+    hot_ids = {row[key] for row in rows}
+    merged = rows + [row for row in _records(df) if row[key] not in hot_ids]
+    merged.sort(key=lambda row: (row[time_key], row[key]), reverse=newest_first)
+    return merged[:limit]
+
+
+class ArchiveScheduler(PeriodicWorker):
+    """Runs run_archival every `interval` seconds in a daemon thread (one process wins the named lock)."""
+    name, failure = "archiver", "ARCHIVAL FAILED"
+
+    def __init__(self, pool, archive_dir, horizon_days=180, batch_size=5000, interval=6 * 3600):
+        super().__init__(pool, interval)
+        self.archive_dir, self.horizon_days, self.batch_size = archive_dir, horizon_days, batch_size
+        self.archived = 0
+
+    def work(self, conn):
+        moved = run_archival(conn, self.archive_dir, self.horizon_days, self.batch_size)
+        if moved is not None:
+            self.last_run = moved
+            self.archived += sum(moved.values())
+        return moved
+
+
+if __name__ == "__main__":
+    import app
+    def arg(name, default):
+        return int(sys.argv[sys.argv.index(name) + 1]) if name in sys.argv else default
+    conn = app._connect()
+    moved = run_archival(conn, app.ARCHIVE_DIR, arg("--horizon-days", app.ARCHIVE_HORIZON_DAYS),
+                         arg("--batch", app.ARCHIVE_BATCH), arg("--max-batches", 200))
+    conn.close()
+    if moved is None:
+        print("Another archiver holds the lock; nothing done.")
+    for table, n in (moved or {}).items():
+        print(f"{table}: {n} row(s) archived")
@@ -0,0 +1,196 @@
+"""Write-behind sink for audit_log and login_activity rows.
+
+Request handlers enqueue rows; a background thread flushes them with one
+multi-row executemany per table every `flush_interval` seconds or every
+`max_batch` rows, all tables in one transaction. When MySQL is unreachable
+or busy (or the queue stays full past `put_timeout`) rows are appended to a
+local JSON-lines spill file and replayed on a later flush, so nothing is
+dropped. A batch MySQL rejects outright (bad data, a missing foreign key) is
+retried row by row and the rows that still fail go to a dead-letter file
+beside the spill file, so one bad row cannot hold back the rows after it.
+"""
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+
+from mysql.connector import errors
+
+from db_pool import PoolTimeout
+
+INSERT_SQL = {
+    "audit_log": "INSERT INTO audit_log (action, table_name, record_id, performed_by, event_time) VALUES (%s,%s,%s,%s,%s)",
+    "login_activity": "INSERT INTO login_activity (user_id, ip_address, login_time) VALUES (%s,%s,%s)",
+}
+# Worth retrying later: too many connections, server shutdown, lock wait/deadlock, lost or refused connections.
+TRANSIENT_ERRNOS = {1040, 1053, 1205, 1213, 2003, 2006, 2013, 2055}
+
+
+def _transient(e):
+    return isinstance(e, (PoolTimeout, errors.InterfaceError, errors.OperationalError)) or getattr(e, "errno", None) in TRANSIENT_ERRNOS
+
+
+class AuditWriter:
+    def __init__(self, pool, spill_path, max_batch=200, flush_interval=0.5, max_queue=10000, put_timeout=0.05, dead_letter_path=None):
+        self.pool, self.spill_path = pool, spill_path
+        self.dead_letter_path = dead_letter_path or os.path.splitext(spill_path)[0] + ".dead.jsonl"
+        self.max_batch, self.flush_interval, self.put_timeout = max_batch, flush_interval, put_timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()           # guards thread start and the spill file
+        self._counters = dict(queued=0, written=0, batches=0, spilled=0, replayed=0, backpressure=0, dead_lettered=0)
+
+    def submit(self, table, row):
+        if self._stopping.is_set():
+            self._spill({table: [tuple(row)]})
+            return
+        self._ensure_started()
+        self._counters["queued"] += 1
+        try:
+            self._queue.put((table, tuple(row)), timeout=self.put_timeout)
+        except queue.Full:
+            # Backpressure: the request waited put_timeout; rather than block it further, spill.
+            self._counters["backpressure"] += 1
+            self._spill({table: [tuple(row)]})
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None and not self._stopping.is_set():
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._drain(block=True)
+            if batch:
+                self._flush(batch)
+            elif os.path.exists(self.spill_path) or os.path.exists(self.spill_path + ".replaying"):
+                self._replay_spill()
+        while True:
+            batch = self._drain(block=False)
+            if not batch:
+                break
+            self._flush(batch)
+
+    def _drain(self, block):
+        batch, deadline = [], time.monotonic() + self.flush_interval
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(block=block and timeout > 0, timeout=max(timeout, 0) if block else None))
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch):
+        by_table = {}
+        for table, row in batch:
+            by_table.setdefault(table, []).append(row)
+        if not by_table:
+            return
+        left, dead = self._write(by_table)
+        written = len(batch) - sum(len(rows) for rows in left.values()) - dead
+        if written:
+            self._counters["written"] += written
+            self._counters["batches"] += 1
+        if left:
+            print(f"--- AUDIT LOG FLUSH FAILED, spilling {sum(len(rows) for rows in left.values())} rows ---")
+            self._spill(left)
+
+    def _write(self, by_table):
+        """Insert `by_table`; returns (rows a transient failure left unwritten, number of rows dead-lettered)."""
+        try:
+            self._insert(by_table)
+            return {}, 0
+        except Exception as e:
+            if _transient(e):
+                return by_table, 0
+            print(f"--- AUDIT LOG BATCH REJECTED, retrying row by row --- {e}")
+        rows, dead = [(table, row) for table, table_rows in by_table.items() for row in table_rows], 0
+        for i, (table, row) in enumerate(rows):
+            try:
+                self._insert({table: [row]})
+            except Exception as e:
+                if _transient(e):
+                    left = {}
+                    for t, r in rows[i:]:
+                        left.setdefault(t, []).append(r)
+                    return left, dead
+                self._dead_letter(table, row, e)
+                dead += 1
+        return {}, dead
+
+    def _insert(self, by_table):
+        # One transaction: a failure leaves no table's rows behind to be inserted again on replay.
+        conn = self.pool.acquire()
+        broken = False
+        try:
+            conn.start_transaction()
+            cursor = conn.cursor()
+            for table, rows in by_table.items():
+                cursor.executemany(INSERT_SQL[table], rows)
+            cursor.close()
+            conn.commit()
+        except Exception as e:
+            broken = isinstance(e, (errors.InterfaceError, errors.OperationalError))
+            if not broken:
+                conn.rollback()
+            raise
+        finally:
+            self.pool.release(conn, discard=broken)
+
+    def _spill(self, by_table):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.spill_path), exist_ok=True)
+            with open(self.spill_path, "a", encoding="utf-8") as fh:
+                for table, rows in by_table.items():
+                    for row in rows:
+                        fh.write(json.dumps([table, row], default=str) + "\n")
+                        self._counters["spilled"] += 1
+
+    def _dead_letter(self, table, row, error):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.dead_letter_path), exist_ok=True)
+            with open(self.dead_letter_path, "a", encoding="utf-8") as fh:
+                fh.write(json.dumps([table, row, str(error)], default=str) + "\n")
+            self._counters["dead_lettered"] += 1
+
+    def _replay_spill(self):
+        replaying = self.spill_path + ".replaying"
+        with self._lock:
+            if not os.path.exists(replaying) and os.path.exists(self.spill_path):
+                os.replace(self.spill_path, replaying)
+        by_table, count = {}, 0
+        with open(replaying, encoding="utf-8") as fh:
+            for line in fh:
+                table, row = json.loads(line)
+                by_table.setdefault(table, []).append(tuple(row))
+                count += 1
+        left, dead = self._write(by_table)
+        self._counters["replayed"] += count - sum(len(rows) for rows in left.values()) - dead
+        if left:
+            # Still down: keep what is left for the next attempt.
+            tmp = replaying + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                for table, rows in left.items():
+                    for row in rows:
+                        fh.write(json.dumps([table, row], default=str) + "\n")
+            os.replace(tmp, replaying)
+            return
+        os.remove(replaying)
+
+    def stop(self):
+        """Flush everything still queued and stop the background thread."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        self._thread = None
+
+    def stats(self):
+        return dict(self._counters, pending=self._queue.qsize())
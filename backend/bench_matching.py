@@ -0,0 +1,87 @@
+"""Benchmark for the matching solver in matching.py, on synthetic data (no database).
+
+For each batch size it reports the solve time and the units rescued. It
+compares these against the first-come baseline (matching.first_come), which
+mirrors manual clicking: soonest-expiring item first, nearest NGO with room.
+It also checks that every assignment respects capacity, expiry and the
+excluded pairs. Rescue is reported three ways: solver objective, units, and
+urgent units (expiring within matching.URGENT_MINUTES). Exits non-zero if the
+solver rescues fewer units or fewer urgent units than the baseline at any size.
+
+    python backend/bench_matching.py [--items 500 2000 5000] [--ngos 60] [--repeat 5] [--seed 7]
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+import matching
+
+CATEGORIES = ("Vegetarian", "Non-Vegetarian", "Beverage", "Bakery", "Other")
+URGENT = timedelta(minutes=matching.URGENT_MINUTES)
+PLACES = [f"Block {c}" for c in "ABCDEFGH"]
+
+
+def synthetic(n_items, n_ngos, rng, now):
+    def point():
+        return dict(location=rng.choice(PLACES), latitude=None, longitude=None) if rng.random() < 0.3 else \
+            dict(location=rng.choice(PLACES), latitude=18.5 + rng.random() * 0.1, longitude=73.8 + rng.random() * 0.1)
+    items = [dict(food_id=i + 1, category=rng.choice(CATEGORIES), quantity=rng.randint(1, 40),
+                  expiry_time=now + timedelta(minutes=rng.randint(15, 720)), **point()) for i in range(n_items)]
+    ngos = [dict(ngo_id=j + 1, preferred_categories=",".join(rng.sample(CATEGORIES, rng.randint(0, 3))),
+                 remaining=rng.randint(20, 400), **point()) for j in range(n_ngos)]
+    excluded = {(rng.randint(1, n_items), rng.randint(1, n_ngos)) for _ in range(n_items // 20)}
+    return items, ngos, excluded
+
+
+def greedy(items, ngos, now, excluded):
+    assigned = matching.first_come(items, ngos, matching.score(items, ngos, now, excluded))
+    return [(items[i]["food_id"], ngos[j]["ngo_id"]) for i, j in sorted(assigned.items())]
+
+
+def evaluate(pairs, items, ngos, weight, now):
+    """Checks capacity/expiry/exclusions; returns (objective value, units, urgent units)."""
+    by_food, by_ngo = {i["food_id"]: k for k, i in enumerate(items)}, {g["ngo_id"]: k for k, g in enumerate(ngos)}
+    load, value, total, urgent = [0] * len(ngos), 0.0, 0, 0
+    assert len({f for f, _ in pairs}) == len(pairs), "item assigned twice"
+    for food_id, ngo_id in pairs:
+        i, j = by_food[food_id], by_ngo[ngo_id]
+        assert weight[i, j] > 0, "infeasible pair proposed"
+        load[j] += items[i]["quantity"]
+        value += weight[i, j]
+        total += items[i]["quantity"]
+        if items[i]["expiry_time"] - now <= URGENT:
+            urgent += items[i]["quantity"]
+    assert all(load[j] <= ngos[j]["remaining"] for j in range(len(ngos))), "capacity exceeded"
+    return value, total, urgent
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, nargs="+", default=[500, 2000, 5000])
+    parser.add_argument("--ngos", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    now = datetime(2026, 1, 1, 12, 0)
+    behind = []
+    for n in args.items:
+        items, ngos, excluded = synthetic(n, args.ngos, random.Random(args.seed + n), now)
+        samples = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            pairs = matching.solve(items, ngos, now, excluded)
+            samples.append((time.perf_counter() - start) * 1000)
+        weight = matching.score(items, ngos, now, excluded)
+        value, total, urgent = evaluate(pairs, items, ngos, weight, now)
+        g_value, g_total, g_urgent = evaluate(greedy(items, ngos, now, excluded), items, ngos, weight, now)
+        print(f"items={n:<6} ngos={args.ngos:<4} solve p50={statistics.median(samples):7.1f}ms max={max(samples):7.1f}ms  "
+              f"value={value:9.0f} (greedy {g_value:9.0f})  units={total} (greedy {g_total})  urgent units={urgent} (greedy {g_urgent})")
+        if total < g_total or urgent < g_urgent:
+            behind.append(n)
+    if behind:
+        print(f"Solver rescued less than the first-come baseline at items={', '.join(map(str, behind))}.")
+        sys.exit(1)
@@ -0,0 +1,92 @@
+"""Micro-benchmark: per-call latency of the beneficiary and approve flows.
+
+Compares the old statement-per-round-trip code (kept here as `legacy_*`)
+with the batched transactions in app.py, against a scratch database:
+
+    python backend/bench_round_trips.py [--calls 200] [--db campus_food_waste_bench] [--backend mysql|sqlite] [--keep]
+
+On localhost the gap is mostly per-statement overhead; over a real network
+every saved round trip is worth one RTT. With --backend sqlite there is no
+network at all, so the two variants should come out close.
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import app as webapp
+from check_query_plans import build_scratch_db, drop_scratch_db
+
+
+def legacy_record_beneficiaries(conn, ngo_id, request_id, people_served, location):
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT f.food_id, f.quantity, f.canteen_id
+        FROM food f JOIN donation_request dr ON f.food_id = dr.food_id
+        WHERE dr.request_id = %s
+    """, (request_id,))
+    food_id, quantity, canteen_id = cursor.fetchone()
+    cursor.execute("INSERT INTO meal_beneficiary (donation_id, people_served, location) VALUES (%s, %s, %s)", (request_id, people_served, location))
+    cursor.execute("UPDATE donation_request SET status = 'completed' WHERE request_id = %s", (request_id,))
+    cursor.execute("UPDATE food SET status = 'donated' WHERE food_id = %s", (food_id,))
+    cursor.execute("UPDATE leaderboard SET donated_items = donated_items + %s WHERE canteen_id = %s", (int(quantity), canteen_id))
+    cursor.close()
+
+
+def legacy_approve(conn, canteen_id, request_id, user_id):
+    cursor = conn.cursor()
+    cursor.execute("SELECT food_id FROM donation_request WHERE request_id = %s", (request_id,))
+    food_id = cursor.fetchone()[0]
+    cursor.execute("UPDATE donation_request SET status = 'approved', approved_by = %s, approved_time = NOW() WHERE request_id = %s", (user_id, request_id))
+    cursor.execute("UPDATE donation_request SET status = 'rejected' WHERE food_id = %s AND status = 'pending'", (food_id,))
+    cursor.execute("UPDATE food SET status = 'approved' WHERE food_id = %s", (food_id,))
+    cursor.close()
+
+
+def make_requests(conn, n, ngo_id, status):
+    """Insert n fresh food items for canteen 1, each with one request from `ngo_id` in `status`."""
+    cur, ids = conn.cursor(), []
+    expiry = datetime.now() + timedelta(hours=6)
+    for _ in range(n):
+        cur.execute("INSERT INTO food (canteen_id, item_name, category, quantity, unit, expiry_time, status) VALUES (1, 'Bench Meal', 'Vegetarian', 5, 'plates', %s, 'requested')",
+                    (expiry,))
+        cur.execute("INSERT INTO donation_request (food_id, ngo_id, status) VALUES (%s, %s, %s)", (cur.lastrowid, ngo_id, status))
+        ids.append(cur.lastrowid)
+    cur.close()
+    return ids
+
+
+def timed(label, fn, ids):
+    samples = []
+    for request_id in ids:
+        start = time.perf_counter()
+        fn(request_id)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    p95 = samples[int(len(samples) * 0.95) - 1] if len(samples) >= 20 else samples[-1]
+    print(f"{label:<34} calls={len(samples):<5} mean={statistics.mean(samples):7.3f}ms  p50={statistics.median(samples):7.3f}ms  p95={p95:7.3f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--db", default="campus_food_waste_bench")
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default=webapp.DB_BACKEND)
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    conn = build_scratch_db(args.db, scale=0.01, backend=args.backend)
+    try:
+        ngo_id, user_id = 1, 2
+        timed("record_beneficiaries (legacy)", lambda r: legacy_record_beneficiaries(conn, ngo_id, r, 10, "Bench"),
+              make_requests(conn, args.calls, ngo_id, "approved"))
+        timed("record_beneficiaries (batched)", lambda r: webapp.record_beneficiaries(conn, ngo_id, r, 10, "Bench"),
+              make_requests(conn, args.calls, ngo_id, "approved"))
+        timed("approve request (legacy)", lambda r: legacy_approve(conn, 1, r, user_id),
+              make_requests(conn, args.calls, ngo_id, "pending"))
+        timed("approve request (batched)", lambda r: webapp.decide_requests(conn, 1, [r], "approve", user_id),
+              make_requests(conn, args.calls, ngo_id, "pending"))
+    finally:
+        if not args.keep:
+            drop_scratch_db(conn, args.db, args.backend)
+        conn.close()
@@ -0,0 +1,81 @@
+"""Parsing and validation for bulk food uploads (CSV, JSON array or JSON lines)."""
+import csv
+import io
+import json
+from datetime import datetime
+
+CATEGORIES = ("Vegetarian", "Non-Vegetarian", "Beverage", "Bakery", "Other")
+EXPIRY_FORMATS = ("%Y-%m-%dT%H:%M", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d %H:%M:%S")
+
+
+class UploadError(ValueError):
+    pass
+
+
+def iter_upload(file_storage):
+    """Yield (line_no, row dict) from an upload; CSV and JSON-lines files are read row by row."""
+    name = (file_storage.filename or "").lower()
+    text = io.TextIOWrapper(file_storage.stream, encoding="utf-8-sig", newline="")
+    if name.endswith(".csv"):
+        reader = csv.DictReader(text)
+        if not reader.fieldnames or "item_name" not in reader.fieldnames:
+            raise UploadError("CSV header must include item_name, category, quantity, unit, expiry_time[, notes].")
+        for row in reader:
+            yield reader.line_num, row
+    elif name.endswith((".jsonl", ".ndjson")):
+        for line_no, line in enumerate(text, start=1):
+            if line.strip():
+                try:
+                    yield line_no, json.loads(line)
+                except ValueError:
+                    yield line_no, None
+    elif name.endswith(".json"):
+        try:
+            items = json.load(text)
+        except ValueError as e:
+            raise UploadError(f"Invalid JSON: {e}")
+        if not isinstance(items, list):
+            raise UploadError("JSON upload must be an array of items.")
+        yield from enumerate(items, start=1)
+    else:
+        raise UploadError("Upload a .csv, .json or .jsonl file.")
+
+
+def _parse_expiry(raw):
+    for fmt in EXPIRY_FORMATS:
+        try:
+            return datetime.strptime(raw.strip(), fmt)
+        except ValueError:
+            pass
+    raise ValueError
+
+
+def validate_row(row, now):
+    """Return ((item_name, category, quantity, unit, expiry_time, notes), None) or (None, error message)."""
+    if not isinstance(row, dict):
+        return None, "not a valid item object"
+    item_name = str(row.get("item_name") or "").strip()
+    category = str(row.get("category") or "").strip()
+    unit = str(row.get("unit") or "plates").strip()
+    notes = str(row.get("notes") or "").strip() or None
+    if not item_name or len(item_name) > 100:
+        return None, "item_name is required (max 100 characters)"
+    if category not in CATEGORIES:
+        return None, f"category must be one of {', '.join(CATEGORIES)}"
+    try:
+        quantity = int(row.get("quantity"))
+    except (TypeError, ValueError):
+        return None, "quantity must be a whole number"
+    if quantity <= 0:
+        return None, "quantity must be greater than 0"
+    if len(unit) > 20:
+        return None, "unit is too long (max 20 characters)"
+    if notes and len(notes) > 255:
+        return None, "notes are too long (max 255 characters)"
+    try:
+        expiry_time = _parse_expiry(str(row.get("expiry_time") or ""))
+    except ValueError:
+        return None, "expiry_time must look like YYYY-MM-DD HH:MM"
+    if expiry_time <= now:
+        return None, "expiry_time is already in the past"
+    return (item_name, category, quantity, unit, expiry_time, notes), None
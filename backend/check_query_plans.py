@@ -0,0 +1,538 @@
+"""Query-plan regression check for every SQL statement the app runs.
+
+Builds a scratch copy of the schema (plus db/migrations), seeds it with a
+large synthetic dataset, then runs EXPLAIN on each SELECT/UPDATE/DELETE in
+app.py and the modules it runs SQL through (SCANNED_MODULES). Exits non-zero
+if any statement full-scans a large table or needs a filesort or a temporary
+table, unless the statement is listed in ALLOWED with a reason.
+
+Statements written as string literals or module constants are read from the
+source. SQL assembled at run time (f-strings, joined fragments) is recorded
+by running its function on the scratch database with representative
+arguments (RENDERERS). A call site that is neither, and not inside one of the
+PASS_THROUGH helpers, fails the check.
+
+    python backend/check_query_plans.py [--scale 1.0] [--db campus_food_waste_plancheck] [--keep]
+    python backend/check_query_plans.py --list --backend sqlite    # print the statements, no EXPLAIN
+
+EXPLAIN itself is MySQL-only; the scratch-database helpers below also build
+SQLite copies (backend="sqlite") for --list and for the benchmarks.
+"""
+import argparse
+import ast
+import contextlib
+import importlib
+import itertools
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import mysql.connector
+
+import analytics
+import app as webapp
+import archive
+import expiry
+import matching
+import sqlite_backend
+from migrate import SCHEMA_FILE, apply_migrations, run_sql_file
+
+# app.py and the modules it hands connections to.
+SCANNED_MODULES = ("app", "analytics", "archive", "audit_writer", "counters", "expiry", "exports",
+                   "food_events", "leaderboard", "matching")
+
+# Helpers that run SQL handed to them; it is checked where their callers build it.
+PASS_THROUGH = {
+    "app._fetch_all": "runs the literal its caller passes",
+    "app.execute_batch": "runs the statements its caller passes",
+    "app.keyset_page": "its callers' pages are expanded by _keyset_variants",
+    "exports.stream_rows": "runs the query export_data builds",
+    "audit_writer.AuditWriter._insert": "INSERT_SQL holds INSERTs only",
+}
+
+# Lookup tables with a handful of rows; scanning/sorting them is expected.
+SMALL_TABLES = {"roles", "canteen", "ngo", "leaderboard", "c", "n", "l", "r"}
+
+# normalized-SQL substring -> reason the flagged plan is acceptable
+ALLOWED = {
+    "ORDER BY dr.approved_time DESC LIMIT 5": "sort bounded by one canteen's approved/completed requests",
+    "ORDER BY relevance DESC": "search ranking: sort bounded by the FULLTEXT matches",
+    "SELECT 'global' AS scope": "counters.reconcile recomputes every counter from the base tables (maintenance)",
+    "AS expected_total": "leaderboard rebuild recomputes every canteen's totals (maintenance)",
+    "FROM food ORDER BY": "first analytics snapshot copies the whole table",
+    "FROM donation_request ORDER BY": "first analytics snapshot copies the whole table",
+    "FROM waste_report ORDER BY": "first analytics snapshot copies the whole table",
+    "FROM meal_beneficiary ORDER BY": "first analytics snapshot copies the whole table",
+    "FROM audit_log ORDER BY": "unfiltered export streams the whole table",
+    "wr.reported_by=u.user_id ORDER BY": "unfiltered export streams the whole table",
+    "FROM meal_beneficiary mb ORDER BY": "unfiltered export streams the whole table",
+}
+
+# Sample bind values keyed by the column a %s is compared with; everything else binds 1.
+NOW = datetime.now()
+SAMPLE_VALUES = {
+    "username": "user_1", "role_name": "canteen", "status": "pending", "item_name": "Item 1",
+    "category": "Vegetarian", "unit": "plates", "notes": "", "reason": "spoilage", "email": "user_1@campus.edu",
+    "password": "x", "location": "Campus", "name": "Canteen 1", "action": "seed", "table_name": "food",
+    "ip_address": "127.0.0.1", "canteen_name": "Canteen 1",
+    "expiry_time": NOW, "event_time": NOW - timedelta(days=30), "login_time": NOW - timedelta(days=30),
+    "report_time": NOW - timedelta(days=30), "recorded_time": NOW - timedelta(days=30),
+    "request_time": NOW - timedelta(days=30), "approved_time": NOW - timedelta(days=30),
+}
+
+
+# -------------------------
+# Statement extraction
+# -------------------------
+# call name -> position of its SQL argument
+SQL_ARGS = {"execute": 0, "executemany": 0, "_fetch_all": 0, "execute_batch": 1, "stream_rows": 1}
+
+
+def _normalize(sql):
+    return " ".join(sql.split())
+
+
+def _resolve(node, namespace):
+    """The string `node` evaluates to from literals and module-level names, or None."""
+    if isinstance(node, ast.Constant):
+        return node.value if isinstance(node.value, str) else None
+    if any(isinstance(n, (ast.Call, ast.JoinedStr, ast.Lambda)) for n in ast.walk(node)):
+        return None
+    try:
+        value = eval(compile(ast.Expression(node), "<sql>", "eval"), dict(namespace))
+    except Exception:
+        return None
+    return value if isinstance(value, str) else None
+
+
+def _keyset_variants(select_sql, time_col, id_col, func):
+    """Expand a keyset_page(...) call into its first page and a fully-filtered cursor page."""
+    base, optional = [], []
+    for node in ast.walk(func):
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.Tuple) and isinstance(node.value.elts[0], ast.List):
+            base += [e.value for e in node.value.elts[0].elts if isinstance(e, ast.Constant)]
+        elif isinstance(node, ast.Call) and getattr(node.func, "attr", None) == "append" and getattr(node.func.value, "id", None) == "where":
+            optional += [a.value for a in node.args if isinstance(a, ast.Constant)]
+    order = f" ORDER BY {time_col} DESC, {id_col} DESC LIMIT %s"
+    first = base
+    filtered = base + optional + [f"{time_col} >= %s", f"{time_col} < %s",
+                                  f"({time_col} < %s OR ({time_col} = %s AND {id_col} < %s))"]
+    for where in (first, filtered):
+        yield select_sql + (" WHERE " + " AND ".join(where) if where else "") + order
+
+
+def _functions(tree, module):
+    """(qualified name, node) of each top-level function and method; nested functions belong to them."""
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef):
+            yield f"{module}.{node.name}", node
+        elif isinstance(node, ast.ClassDef):
+            yield from ((f"{module}.{node.name}.{item.name}", item) for item in node.body if isinstance(item, ast.FunctionDef))
+
+
+def _sql_of(node, namespace, func):
+    """The statements a call runs, [] if it runs none, or None if they are only known at run time."""
+    name = getattr(node.func, "attr", getattr(node.func, "id", None))
+    if name == "keyset_page":
+        args = [_resolve(a, namespace) for a in node.args[1:4]]
+        return None if None in args else list(_keyset_variants(*args, func))
+    if name not in SQL_ARGS or len(node.args) <= SQL_ARGS[name]:
+        return []
+    arg = node.args[SQL_ARGS[name]]
+    if name == "execute_batch":
+        if not isinstance(arg, ast.List) or not all(isinstance(t, ast.Tuple) for t in arg.elts):
+            return None
+        sqls = [_resolve(t.elts[0], namespace) for t in arg.elts]
+    else:
+        sqls = [_resolve(arg, namespace)]
+    return None if None in sqls else sqls
+
+
+def _unique(found):
+    """SELECT/UPDATE/DELETE statements, once each; IN lists of any length count as one statement."""
+    seen, unique = set(), []
+    for where, sql, params in found:
+        sql = _normalize(sql)
+        key = re.sub(r"%s(?:\s*,\s*%s)+", "%s, ...", sql)
+        if sql.split(" ", 1)[0].upper() in ("SELECT", "UPDATE", "DELETE") and key not in seen:
+            seen.add(key)
+            unique.append((where, sql, params))
+    return unique
+
+
+def extract_statements(modules=SCANNED_MODULES):
+    """Read the statements out of `modules`' source.
+
+    Returns ([(function, sql, None)], [(function, line)]): the statements, and the
+    call sites whose SQL is only assembled at run time.
+    """
+    found, dynamic = [], []
+    for module in modules:
+        mod = importlib.import_module(module)
+        tree = ast.parse(open(mod.__file__, encoding="utf-8").read())
+        for where, func in _functions(tree, module):
+            for node in ast.walk(func):
+                if not isinstance(node, ast.Call) or not node.args:
+                    continue
+                sqls = _sql_of(node, vars(mod), func)
+                if sqls is None:
+                    dynamic.append((where, node.lineno))
+                else:
+                    found += [(where, sql, None) for sql in sqls]
+    return _unique(found), dynamic
+
+
+def unresolved(dynamic):
+    """Dynamic call sites that neither a renderer nor a pass-through entry accounts for."""
+    return [(where, line) for where, line in dynamic if where not in RENDERERS and where not in PASS_THROUGH]
+
+
+def sample_params(sql):
+    params = []
+    for match in re.finditer(r"%s", sql):
+        head = sql[:match.start()].rstrip()
+        if head.upper().endswith("LIMIT"):
+            params.append(50)
+            continue
+        col = re.search(r"([\w.]+)\s*(?:=|<=|>=|<|>|LIKE)?\s*$", head)
+        key = col.group(1).split(".")[-1] if col else ""
+        params.append(SAMPLE_VALUES.get(key, 1))
+    return params
+
+
+# -------------------------
+# Scratch database
+# -------------------------
+def seed(conn, scale=1.0, log_scale=None):
+    """Insert a semester-sized synthetic dataset; `scale` multiplies every row count.
+
+    `log_scale` (default: `scale`) multiplies the audit_log / login_activity counts
+    separately, e.g. log_scale=10 seeds 2M audit and 1M login rows.
+    """
+    rnd = random.Random(42)
+    n = lambda base, factor=scale: max(1, int(base * factor))
+    canteens, ngos, users, foods = n(20), n(50), n(500), n(50_000)
+    log_scale = scale if log_scale is None else log_scale
+    cur = conn.cursor()
+
+    def bulk(sql, rows, chunk=5000):
+        rows = iter(rows)
+        while True:
+            batch = list(itertools.islice(rows, chunk))
+            if not batch:
+                break
+            cur.executemany(sql, batch)
+
+    ago = lambda days: NOW - timedelta(seconds=rnd.randint(0, days * 86400))
+    bulk("INSERT INTO canteen (name, location, email) VALUES (%s,%s,%s)",
+         [(f"Canteen {i}", f"Block {i % 7}", f"canteen{i}@campus.edu") for i in range(canteens)])
+    bulk("INSERT INTO ngo (name, contact_person, email) VALUES (%s,%s,%s)",
+         [(f"NGO {i}", f"Contact {i}", f"ngo{i}@campus.org") for i in range(ngos)])
+    bulk("INSERT INTO users (username, password, email, role_id, ref_id) VALUES (%s,%s,%s,%s,%s)",
+         [(f"user_{i}", "x", f"user_{i}@campus.edu", rnd.choice((2, 3)), rnd.randint(1, canteens)) for i in range(users)])
+    bulk("INSERT IGNORE INTO leaderboard (canteen_id) VALUES (%s)", [(i,) for i in range(1, canteens + 1)])
+    bulk("INSERT INTO food (canteen_id, item_name, category, quantity, unit, expiry_time, status) VALUES (%s,%s,%s,%s,%s,%s,%s)",
+         [(rnd.randint(1, canteens), f"Item {i}", rnd.choice(("Vegetarian", "Non-Vegetarian", "Beverage", "Bakery", "Other")),
+           rnd.randint(1, 50), "plates", NOW + timedelta(minutes=rnd.randint(-20_000, 2_000)),
+           rnd.choice(("available", "donated", "expired", "requested", "approved"))) for i in range(foods)])
+    # One request per (food, NGO) pair (uq_dr_food_ngo), none clashing with the schema's seed requests.
+    cur.execute("SELECT food_id, ngo_id FROM donation_request")
+    taken = set(cur.fetchall())
+    pairs = [(p // ngos + 1, p % ngos + 1) for p in rnd.sample(range(foods * ngos), min(n(50_000), foods * ngos))]
+    pairs = [pair for pair in pairs if pair not in taken]
+    bulk("INSERT INTO donation_request (food_id, ngo_id, request_time, status, approved_time) VALUES (%s,%s,%s,%s,%s)",
+         [(food_id, ngo_id, ago(180), rnd.choice(("pending", "approved", "completed", "rejected")), ago(180)) for food_id, ngo_id in pairs])
+    bulk("INSERT INTO meal_beneficiary (donation_id, people_served, location, recorded_time) VALUES (%s,%s,%s,%s)",
+         [(rnd.randint(1, len(pairs)), rnd.randint(1, 80), "Campus", ago(180)) for _ in range(n(20_000))])
+    bulk("INSERT INTO waste_report (food_id, reported_by, reason, quantity_wasted, report_time) VALUES (%s,%s,%s,%s,%s)",
+         [(rnd.randint(1, foods), rnd.randint(1, users), "spoilage", rnd.randint(1, 10), ago(180)) for _ in range(n(20_000))])
+    bulk("INSERT INTO audit_log (action, table_name, record_id, performed_by, event_time) VALUES (%s,%s,%s,%s,%s)",
+         (("seed", "food", rnd.randint(1, foods), rnd.randint(1, users), ago(180)) for _ in range(n(200_000, log_scale))))
+    bulk("INSERT INTO login_activity (user_id, login_time, ip_address) VALUES (%s,%s,%s)",
+         ((rnd.randint(1, users), ago(180), "127.0.0.1") for _ in range(n(100_000, log_scale))))
+    for table in ("canteen", "ngo", "users", "food", "donation_request", "meal_beneficiary", "waste_report", "audit_log", "login_activity", "leaderboard"):
+        cur.execute(f"ANALYZE TABLE {table}")
+        cur.fetchall()
+    cur.close()
+
+
+def scratch_path(db_name):
+    return os.path.join(webapp.BASE_DIR, "var", f"{db_name}.sqlite3")
+
+
+def connect_scratch(db_name, backend="mysql"):
+    if backend == "sqlite":
+        return sqlite_backend.connect(scratch_path(db_name))
+    return mysql.connector.connect(host=webapp.DB_HOST, port=webapp.DB_PORT, user=webapp.DB_USER, password=webapp.DB_PASS,
+                                   database=db_name, autocommit=True)
+
+
+def build_scratch_db(db_name, scale, log_scale=None, backend="mysql"):
+    if backend == "sqlite":
+        drop_scratch_db(None, db_name, backend)
+        conn = connect_scratch(db_name, backend)
+    else:
+        conn = mysql.connector.connect(host=webapp.DB_HOST, port=webapp.DB_PORT, user=webapp.DB_USER, password=webapp.DB_PASS, autocommit=True)
+        run_sql_file(conn, SCHEMA_FILE, db_name=db_name)
+        apply_migrations(conn)
+    seed(conn, scale, log_scale)
+    return conn
+
+
+def use_scratch_db(db_name, backend="mysql"):
+    """Point app.py's connection pool at the scratch database."""
+    webapp.DB_BACKEND, webapp.DB_NAME, webapp.SQLITE_PATH = backend, db_name, scratch_path(db_name)
+    webapp.db_pool.dispose()
+
+
+def drop_scratch_db(conn, db_name, backend="mysql"):
+    if backend == "sqlite":
+        if conn is not None:
+            conn.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(scratch_path(db_name) + suffix):
+                os.remove(scratch_path(db_name) + suffix)
+    else:
+        conn.cursor().execute(f"DROP DATABASE IF EXISTS {db_name}")
+
+
+# -------------------------
+# Rendered statements
+# -------------------------
+def _cursor_classes():
+    from mysql.connector.cursor import MySQLCursor
+    classes = [MySQLCursor, sqlite_backend.Cursor]
+    try:
+        from mysql.connector.cursor_cext import CMySQLCursor
+        classes.append(CMySQLCursor)
+    except ImportError:
+        pass
+    return classes
+
+
+def _split_batch(sql, params):
+    """execute_batch's ';\\n'-joined statements back into (sql, params) pairs."""
+    params, statements = list(params or ()), []
+    for part in sql.split(";\n"):
+        n = part.count("%s")
+        statements.append((part, params[:n]))
+        params = params[n:]
+    return statements
+
+
+@contextlib.contextmanager
+def recording(into):
+    """Append (sql, params) to `into` for every statement any cursor runs meanwhile
+    (executemany: its first row of params)."""
+    originals = []
+    for cls in _cursor_classes():
+        execute, executemany = cls.execute, cls.executemany
+
+        def recorded_execute(self, sql, params=None, *args, _execute=execute, **kwargs):
+            into.extend(_split_batch(sql, params))
+            return _execute(self, sql, params, *args, **kwargs)
+
+        def recorded_executemany(self, sql, seq_params, *args, _executemany=executemany, **kwargs):
+            seq_params = list(seq_params)
+            into.extend((sql, params) for params in seq_params[:1])
+            return _executemany(self, sql, seq_params, *args, **kwargs)
+
+        originals.append((cls, execute, executemany))
+        cls.execute, cls.executemany = recorded_execute, recorded_executemany
+    try:
+        yield into
+    finally:
+        for cls, execute, executemany in originals:
+            cls.execute, cls.executemany = execute, executemany
+
+
+def _rows(conn, sql, params=()):
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows
+
+
+def _admin_client():
+    client = webapp.app.test_client()
+    with client.session_transaction() as session:
+        session.update(user_id=1, username="admin", role="admin", ref_id=0)
+    return client
+
+
+def _no_audit(conn, *entry):
+    pass
+
+
+# Each renderer gets (conn, scratch_dir, record) and runs its function's variants
+# inside `with record():`; setup queries stay outside it.
+def _render_search_food(conn, scratch_dir, record):
+    cursor = conn.cursor(dictionary=True)
+    with webapp.app.app_context(), record():
+        for filters in (dict(), dict(category="Vegetarian"), dict(canteen_id=1), dict(category="Vegetarian", canteen_id=1),
+                        dict(within=3, page=2), dict(q="item plates"), dict(q="12", category="Bakery")):
+            webapp.search_food(cursor, **filters)
+    cursor.close()
+
+
+def _render_decide_requests(conn, scratch_dir, record):
+    pending = {}
+    for canteen_id, request_id in _rows(conn, "SELECT f.canteen_id, dr.request_id FROM donation_request dr JOIN food f ON f.food_id = dr.food_id "
+                                              "WHERE dr.status = 'pending' ORDER BY dr.request_id LIMIT 500"):
+        pending.setdefault(canteen_id, []).append(request_id)
+    (approve_at, to_approve), (reject_at, to_reject) = itertools.islice(pending.items(), 2)
+    with webapp.app.app_context(), record():
+        webapp.decide_requests(conn, approve_at, to_approve[:3], "approve", 1)
+        webapp.decide_requests(conn, reject_at, to_reject[:3], "reject", 1)
+
+
+def _render_manage_users(conn, scratch_dir, record):
+    (user_id, username, email), = _rows(conn, "SELECT user_id, username, email FROM users WHERE username = 'user_1'")
+    client = _admin_client()
+    with record():
+        for password in ("", "x"):
+            client.post("/admin/manage_users", data={"edit": user_id, f"username_{user_id}": username, f"email_{user_id}": email,
+                                                     f"password_{user_id}": password, f"role_{user_id}": "canteen",
+                                                     f"canteen_id_{user_id}": 1})
+
+
+def _render_export_data(conn, scratch_dir, record):
+    client, day = _admin_client(), f"{NOW:%Y-%m-%d}"
+    with record():
+        for kind, actor in (("audit_log", "1"), ("waste_report", "user_1"), ("meal_beneficiary", "1")):
+            for query in ("", f"?from={day}&to={day}&actor={actor}"):
+                client.get(f"/admin/export/{kind}{query}").get_data()
+
+
+def _render_refresh_table(conn, scratch_dir, record):
+    with record():
+        for _ in range(2):      # the first refresh copies each table, the second reads from the watermark
+            analytics.refresh_snapshots(conn, os.path.join(scratch_dir, "analytics"))
+
+
+def _render_archive_batch(conn, scratch_dir, record):
+    with record():
+        for table in archive.ARCHIVE_TABLES:
+            archive.archive_batch(conn, os.path.join(scratch_dir, "archive"), table, NOW - timedelta(days=90), 100)
+
+
+def _render_sweep_expired(conn, scratch_dir, record):
+    with record():
+        expiry.sweep_expired(conn, _no_audit, batch_size=100)
+
+
+def _render_dispatch(conn, scratch_dir, record):
+    unclaimed = _rows(conn, "SELECT food_id FROM food WHERE status = 'available' AND expiry_time > %s "
+                            "AND food_id NOT IN (SELECT food_id FROM donation_request WHERE ngo_id = 1) ORDER BY food_id LIMIT 3", (NOW,))
+    with record():
+        matching.dispatch(conn, [(food_id, 1) for food_id, in unclaimed], NOW)
+
+
+# function -> renderer for the functions that assemble SQL at run time
+RENDERERS = {
+    "app.search_food": _render_search_food,
+    "app.decide_requests": _render_decide_requests,
+    "app.manage_users": _render_manage_users,
+    "app.export_data": _render_export_data,
+    "analytics._refresh_table": _render_refresh_table,
+    "archive.archive_batch": _render_archive_batch,
+    "expiry.sweep_expired": _render_sweep_expired,
+    "matching.dispatch": _render_dispatch,
+}
+
+
+def configure_app(scratch_dir):
+    """Rebuild app.py's components for rendering: files under `scratch_dir`, no background jobs."""
+    webapp.create_app(dict(ANALYTICS_DIR=os.path.join(scratch_dir, "analytics"), ARCHIVE_DIR=os.path.join(scratch_dir, "archive"),
+                           FORECAST_PATH=os.path.join(scratch_dir, "forecast", "model.joblib"), AUDIT_ASYNC=False,
+                           FOOD_EVENTS_ENABLED=False, MATCH_ENABLED=False, ARCHIVE_ENABLED=False, FORECAST_ENABLED=False))
+    webapp.expiry_sweeper.stop()        # never started: its statements would land in whichever renderer is running
+
+
+def render_statements(conn, scratch_dir):
+    """Run every renderer on the scratch database; returns [(function, sql, params)]."""
+    found = []
+    for where, render in RENDERERS.items():
+        statements = []
+        render(conn, scratch_dir, lambda: recording(statements))
+        if not statements:
+            raise RuntimeError(f"the renderer for {where} ran no SQL")
+        found += [(where, sql, params) for sql, params in statements]
+    return _unique(found)
+
+
+# -------------------------
+# Plan checks
+# -------------------------
+def plan_problems(rows):
+    problems = []
+    for row in rows:
+        table, extra = row.get("table") or "", row.get("Extra") or ""
+        if table in SMALL_TABLES or table.startswith("<"):
+            continue
+        if row.get("type") == "ALL":
+            problems.append(f"full table scan on {table} (~{row.get('rows')} rows)")
+        if "Using filesort" in extra:
+            problems.append(f"filesort on {table}")
+        if "Using temporary" in extra:
+            problems.append(f"temporary table for {table}")
+    return problems
+
+
+def check(conn, statements):
+    failures = 0
+    cur = conn.cursor(dictionary=True)
+    for where, sql, params in statements:
+        cur.execute("EXPLAIN " + sql, sample_params(sql) if params is None else params)
+        problems = plan_problems(cur.fetchall())
+        allowed = next((reason for key, reason in ALLOWED.items() if key in sql), None)
+        if problems and not allowed:
+            failures += 1
+            print(f"FAIL  {where}: {'; '.join(problems)}\n      {sql}")
+        else:
+            print(f"ok    {where}" + (f" (allowed: {allowed})" if problems else ""))
+    cur.close()
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--db", default="campus_food_waste_plancheck")
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="mysql")
+    parser.add_argument("--list", action="store_true", help="print the statements instead of checking their plans")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database afterwards")
+    args = parser.parse_args()
+    if args.backend == "sqlite" and not args.list:
+        parser.error("plans are checked with MySQL's EXPLAIN; use --list on sqlite")
+
+    statements, dynamic = extract_statements()
+    missing = unresolved(dynamic)
+    for where, line in missing:
+        print(f"FAIL  {where} (line {line}): SQL built at run time; add a renderer to RENDERERS or a PASS_THROUGH entry")
+
+    conn = build_scratch_db(args.db, args.scale, backend=args.backend)
+    scratch_dir = tempfile.mkdtemp(prefix="plancheck_")
+    use_scratch_db(args.db, args.backend)
+    configure_app(scratch_dir)
+    try:
+        statements = _unique(statements + render_statements(conn, scratch_dir))
+        if args.list:
+            for where, sql, params in statements:
+                print(f"{where}: {sql}")
+            failures = len(missing)
+        else:
+            failures = len(missing) + check(conn, statements)
+    finally:
+        webapp.shutdown()
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+        if not args.keep:
+            drop_scratch_db(conn, args.db, args.backend)
+        conn.close()
+    print(f"\n{len(statements)} statements, {len(missing)} unresolved call site(s), {failures} failure(s).")
+    sys.exit(1 if failures else 0)
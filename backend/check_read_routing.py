@@ -0,0 +1,90 @@
+"""Read/write routing check against a primary and one or more replicas.
+
+Point the app at the servers through the environment, e.g. two local MySQL
+instances (a real replica, or just a second server with the same schema):
+
+    DB_PORT=3306 DB_REPLICAS=127.0.0.1:3307 python backend/check_read_routing.py [--reads 20]
+
+Checks that read handles go to the replicas in round-robin order, that a
+session which just wrote reads from the primary until DB_STICKY_SECONDS pass,
+and that reads fall back to the primary when every replica is over the lag
+limit. Exits non-zero on any failure.
+"""
+import argparse
+import collections
+import sys
+import time
+
+import app as webapp
+
+
+def _server(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT @@server_id, @@port")
+    row = cursor.fetchone()
+    cursor.close()
+    return row
+
+
+def _read_server(session_data=None):
+    """Server a read-only request with this session would be routed to."""
+    with webapp.app.test_request_context("/"):
+        webapp.session.update(session_data or {})
+        try:
+            return _server(webapp.get_read_db())
+        finally:
+            webapp.close_db()
+
+
+def check(name, ok, detail=""):
+    print(f"{'ok  ' if ok else 'FAIL'} {name}{': ' + detail if detail else ''}")
+    return ok
+
+
+def run(reads):
+    router = webapp.replica_router
+    if not router.replicas:
+        print("DB_REPLICAS is not set; nothing to route.")
+        return False
+    with webapp.app.app_context():
+        primary = _server(webapp.get_db())
+        webapp.close_db()
+    print(f"primary  server_id={primary[0]} port={primary[1]}")
+    for replica in router.replicas:
+        router.usable(replica)
+        print(f"replica  {replica.name} lag={replica.lag} healthy={replica.healthy} error={replica.error or '-'}")
+
+    ok = True
+    seen = collections.Counter(_read_server() for _ in range(reads))
+    usable = sum(1 for r in router.replicas if router.usable(r))
+    ok &= check("reads go to replicas", primary not in seen and len(seen) == usable, str(dict(seen)))
+    ok &= check("round-robin spread", max(seen.values(), default=0) - min(seen.values(), default=0) <= 1)
+
+    with webapp.app.test_request_context("/", method="POST"):
+        webapp.get_db()
+        webapp.stick_to_primary_after_writes(webapp.app.response_class())
+        wrote = dict(webapp.session)
+        webapp.close_db()
+    ok &= check("write marks the session", "_wrote_at" in wrote)
+    ok &= check("read-your-writes goes to primary", _read_server(wrote) == primary)
+    expired = dict(wrote, _wrote_at=time.time() - webapp.DB_STICKY_SECONDS - 1)
+    ok &= check("stickiness expires", _read_server(expired) != primary)
+
+    max_lag, router.max_lag = router.max_lag, -1
+    try:
+        ok &= check("lagging replicas fall back to primary", _read_server() == primary)
+    finally:
+        router.max_lag = max_lag
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reads", type=int, default=20)
+    args = parser.parse_args()
+    try:
+        ok = run(args.reads)
+    finally:
+        webapp.audit_writer.stop()
+        webapp.expiry_sweeper.stop()
+    sys.exit(0 if ok else 1)
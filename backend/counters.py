@@ -0,0 +1,63 @@
+"""Dashboard counters (see db/migrations/002_dashboard_counters.sql).
+
+Reads are a single primary-key range lookup on dashboard_counter. The
+reconciliation pass recomputes every counter set-based and reports drift:
+
+    python backend/counters.py             # report drift and repair it
+    python backend/counters.py --dry-run   # report only
+"""
+import sys
+
+EXPECTED_COUNTERS_SQL = """
+    SELECT 'global' AS scope, 0 AS scope_id, 'total_users' AS name, COUNT(*) AS value FROM users
+    UNION ALL SELECT 'global', 0, 'total_food', COALESCE(SUM(quantity), 0) FROM food
+    UNION ALL SELECT 'global', 0, 'total_donations', COUNT(*) FROM donation_request WHERE status = 'completed'
+    UNION ALL SELECT 'canteen', canteen_id, 'total', COALESCE(SUM(quantity), 0) FROM food GROUP BY canteen_id
+    UNION ALL SELECT 'canteen', canteen_id, 'available', COALESCE(SUM(IF(status = 'available', quantity, 0)), 0) FROM food GROUP BY canteen_id
+    UNION ALL SELECT 'canteen', canteen_id, 'donated', COALESCE(SUM(IF(status = 'donated', quantity, 0)), 0) FROM food GROUP BY canteen_id
+    UNION ALL SELECT 'canteen', f.canteen_id, 'pending', COUNT(*) FROM donation_request dr JOIN food f ON dr.food_id = f.food_id WHERE dr.status = 'pending' GROUP BY f.canteen_id
+    UNION ALL SELECT 'ngo', ngo_id, 'total_requests', COUNT(*) FROM donation_request GROUP BY ngo_id
+    UNION ALL SELECT 'ngo', ngo_id, 'approved', SUM(IF(status = 'approved', 1, 0)) FROM donation_request GROUP BY ngo_id
+    UNION ALL SELECT 'ngo', ngo_id, 'pending', SUM(IF(status = 'pending', 1, 0)) FROM donation_request GROUP BY ngo_id
+    UNION ALL SELECT 'ngo', dr.ngo_id, 'total_meals', SUM(mb.people_served) FROM meal_beneficiary mb JOIN donation_request dr ON mb.donation_id = dr.request_id GROUP BY dr.ngo_id
+"""
+
+
+def read_counters(cursor, scope, scope_id=0):
+    """Return {name: value} for one dashboard scope ('global', 'canteen' or 'ngo')."""
+    cursor.execute("SELECT name, value FROM dashboard_counter WHERE scope = %s AND scope_id = %s", (scope, scope_id))
+    return {row["name"]: int(row["value"]) for row in cursor.fetchall()}
+
+
+def reconcile(conn, fix=True):
+    """Compare stored counters with a set-based recomputation; returns [(scope, scope_id, name, stored, expected)].
+
+    Both sides are read from one consistent snapshot and repairs are applied as
+    deltas, so writes landing while this runs are not overwritten.
+    """
+    cursor = conn.cursor()
+    cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+    cursor.execute(EXPECTED_COUNTERS_SQL)
+    expected = {(s, int(i), n): int(v or 0) for s, i, n, v in cursor.fetchall()}
+    cursor.execute("SELECT scope, scope_id, name, value FROM dashboard_counter")
+    stored = {(s, int(i), n): int(v) for s, i, n, v in cursor.fetchall()}
+    cursor.execute("COMMIT")
+
+    drift = [(*key, stored.get(key, 0), expected.get(key, 0))
+             for key in sorted(expected.keys() | stored.keys()) if stored.get(key, 0) != expected.get(key, 0)]
+    if fix and drift:
+        cursor.executemany("INSERT INTO dashboard_counter (scope, scope_id, name, value) VALUES (%s,%s,%s,%s) "
+                           "ON DUPLICATE KEY UPDATE value = value + VALUES(value)",
+                           [(s, i, n, want - have) for s, i, n, have, want in drift])
+    cursor.close()
+    return drift
+
+
+if __name__ == "__main__":
+    from app import _connect
+    conn = _connect()
+    drift = reconcile(conn, fix="--dry-run" not in sys.argv)
+    for scope, scope_id, name, have, want in drift:
+        print(f"{scope}:{scope_id}:{name} stored={have} expected={want} drift={have - want:+d}")
+    print(f"{len(drift)} counter(s) drifted" + ("" if "--dry-run" in sys.argv or not drift else ", repaired."))
+    conn.close()
@@ -0,0 +1,122 @@
+"""Process-wide MySQL connection pool used by get_db/close_db."""
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """Fixed-size pool with bounded overflow, ping-on-checkout and recycling.
+
+    `size` connections are kept idle between requests; up to `overflow` extra
+    connections may be opened under load and are closed again on release.
+    Borrowers beyond size + overflow wait up to `timeout` seconds.
+    """
+
+    def __init__(self, connect, size=5, overflow=10, timeout=30, recycle=3600, pre_ping=True):
+        self._connect = connect
+        self.size, self.overflow, self.timeout, self.recycle, self.pre_ping = size, overflow, timeout, recycle, pre_ping
+        self._idle = deque()          # (conn, created_at)
+        self._born = {}               # id(conn) -> created_at for checked-out conns
+        self._open = 0
+        self._cond = threading.Condition()
+        self._counters = dict(checkouts=0, waits=0, timeouts=0, created=0, recycled=0, ping_failures=0)
+
+    def _new(self):
+        conn = self._connect()
+        self._counters["created"] += 1
+        return conn, time.monotonic()
+
+    def _healthy(self, conn, created_at):
+        if self.recycle and time.monotonic() - created_at > self.recycle:
+            self._counters["recycled"] += 1
+            return False
+        if self.pre_ping:
+            try:
+                conn.ping(reconnect=False)
+            except Exception:
+                self._counters["ping_failures"] += 1
+                return False
+        return True
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            waited = False
+            while not self._idle and self._open >= self.size + self.overflow:
+                if not waited:
+                    self._counters["waits"] += 1
+                    waited = True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._counters["timeouts"] += 1
+                    raise PoolTimeout(f"no connection available within {self.timeout}s")
+                self._cond.wait(remaining)
+            item = self._idle.popleft() if self._idle else None
+            if item is None:
+                self._open += 1
+            self._counters["checkouts"] += 1
+
+        # Connect/ping outside the lock so a slow server doesn't stall other borrowers.
+        try:
+            if item is not None and not self._healthy(*item):
+                _close_quietly(item[0])
+                item = None
+            conn, created_at = item or self._new()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._born[id(conn)] = created_at
+        return conn
+
+    def release(self, conn, discard=False):
+        try:
+            if not discard and conn.in_transaction:
+                conn.rollback()
+        except Exception:
+            discard = True
+        with self._cond:
+            created_at = self._born.pop(id(conn), time.monotonic())
+            if discard or len(self._idle) >= self.size:
+                self._open -= 1
+                _close_quietly(conn)
+            else:
+                self._idle.append((conn, created_at))
+            self._cond.notify()
+
+    def dispose(self):
+        with self._cond:
+            while self._idle:
+                _close_quietly(self._idle.popleft()[0])
+                self._open -= 1
+            self._cond.notify_all()
+
+    def forget(self):
+        """Drop connections inherited from a parent process without closing them.
+
+        Called in a freshly forked worker: the sockets are shared with the
+        parent, so closing them here would send COM_QUIT on its connections.
+        """
+        with self._cond:
+            self._idle.clear()
+            self._born.clear()
+            self._open = 0
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return dict(self._counters, size=self.size, overflow=self.overflow,
+                        open=self._open, idle=len(self._idle), in_use=self._open - len(self._idle))
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
@@ -0,0 +1,87 @@
+"""Replica selection behind get_read_db.
+
+Replicas are used round-robin. Each replica's lag is sampled with SHOW REPLICA
+STATUS at most every `check_interval` seconds, on the request that finds the
+sample stale. A replica is skipped until its next check when it lags more
+than `max_lag` seconds, has replication stopped, or cannot be reached. With
+no usable replica, reads fall back to the primary.
+
+A server that reports no replica status at all (e.g. a second standalone
+instance in a test setup) is treated as current.
+"""
+import itertools
+import threading
+import time
+
+
+class Replica:
+    def __init__(self, name, pool):
+        self.name, self.pool = name, pool
+        self.lag, self.healthy, self.checked_at, self.error = None, True, None, None
+        self.reads = 0
+        self._checking = threading.Lock()
+
+
+class ReplicaRouter:
+    def __init__(self, replicas, max_lag=2.0, check_interval=5.0):
+        self.replicas = [Replica(name, pool) for name, pool in replicas]
+        self.max_lag, self.check_interval = max_lag, check_interval
+        self._order = itertools.cycle(range(len(self.replicas))) if self.replicas else None
+        self._lock = threading.Lock()
+        self.fallbacks = 0
+
+    def _check(self, replica):
+        if not replica._checking.acquire(blocking=False):
+            return                      # another request is already sampling it; use the last result
+        conn, broken = None, False
+        try:
+            conn = replica.pool.acquire()
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute("SHOW REPLICA STATUS")
+            status = cursor.fetchone()
+            cursor.fetchall()
+            cursor.close()
+            if status is None:
+                replica.lag, replica.healthy, replica.error = 0, True, None
+            else:
+                lag = status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+                running = status.get("Replica_SQL_Running", status.get("Slave_SQL_Running")) == "Yes"
+                replica.lag = None if lag is None else int(lag)
+                replica.healthy = running and lag is not None
+                replica.error = None if replica.healthy else "replication stopped"
+        except Exception as e:
+            broken, replica.healthy, replica.lag, replica.error = True, False, None, str(e)
+        finally:
+            if conn is not None:
+                replica.pool.release(conn, discard=broken)
+            replica.checked_at = time.monotonic()
+            replica._checking.release()
+
+    def usable(self, replica):
+        if replica.checked_at is None or time.monotonic() - replica.checked_at > self.check_interval:
+            self._check(replica)
+        return replica.healthy and replica.lag is not None and replica.lag <= self.max_lag
+
+    def choose(self):
+        """Next usable replica in round-robin order, or None to read from the primary."""
+        if not self.replicas:
+            return None
+        for _ in range(len(self.replicas)):
+            with self._lock:
+                replica = self.replicas[next(self._order)]
+            if self.usable(replica):
+                replica.reads += 1
+                return replica
+        self.fallbacks += 1
+        return None
+
+    def totals(self):
+        """Flat counters for the metrics endpoint; uses the last lag samples without re-checking."""
+        usable = sum(1 for r in self.replicas if r.healthy and r.lag is not None and r.lag <= self.max_lag)
+        return dict(replicas=len(self.replicas), usable=usable, replica_reads=sum(r.reads for r in self.replicas),
+                    fallbacks=self.fallbacks)
+
+    def stats(self):
+        return dict(fallbacks=self.fallbacks, max_lag=self.max_lag,
+                    replicas=[dict(name=r.name, lag=r.lag, healthy=r.healthy, reads=r.reads, error=r.error,
+                                  pool=r.pool.stats()) for r in self.replicas])
@@ -0,0 +1,61 @@
+"""Expiry sweeper: moves available food past its expiry_time to 'expired'.
+
+Runs in-process on a background thread (started lazily per worker), or once
+from the command line:
+
+    python backend/expiry.py [--batch 500]
+"""
+import sys
+from datetime import datetime
+
+from workers import PeriodicWorker
+
+SELECT_EXPIRED_SQL = "SELECT food_id FROM food WHERE status = 'available' AND expiry_time <= %s ORDER BY expiry_time LIMIT %s"
+
+
+def sweep_expired(conn, audit, batch_size=500, now=None):
+    """Expire overdue food in batches of `batch_size`; `audit(conn, action, table, record_id)` logs one entry per batch.
+
+    Returns the number of food rows expired.
+    """
+    now, total = now or datetime.now(), 0
+    cursor = conn.cursor()
+    while True:
+        cursor.execute(SELECT_EXPIRED_SQL, (now, batch_size))
+        ids = [row[0] for row in cursor.fetchall()]
+        if not ids:
+            break
+        placeholders = ",".join(["%s"] * len(ids))
+        cursor.execute(f"UPDATE food SET status = 'expired' WHERE food_id IN ({placeholders}) AND status = 'available'", ids)
+        if cursor.rowcount:
+            total += cursor.rowcount
+            audit(conn, f"Expiry sweep expired {cursor.rowcount} items (food_id {ids[0]}..{ids[-1]})", "food", ids[0])
+        if len(ids) < batch_size:
+            break
+    cursor.close()
+    return total
+
+
+class ExpirySweeper(PeriodicWorker):
+    name, failure, run_at_start = "expiry-sweeper", "EXPIRY SWEEP FAILED", True
+
+    def __init__(self, pool, audit, interval=60, batch_size=500):
+        super().__init__(pool, interval)
+        self.audit, self.batch_size = audit, batch_size
+        self.expired = 0
+
+    def work(self, conn):
+        expired = sweep_expired(conn, self.audit, self.batch_size)
+        self.expired += expired
+        self.last_run = datetime.now()
+        return expired
+
+
+if __name__ == "__main__":
+    import app
+    batch = int(sys.argv[sys.argv.index("--batch") + 1]) if "--batch" in sys.argv else app.EXPIRY_SWEEP_BATCH
+    conn = app._connect()
+    expired = sweep_expired(conn, app.sweeper_audit, batch)
+    app.audit_writer.stop()
+    print(f"Expired {expired} food item(s).")
+    conn.close()
@@ -0,0 +1,68 @@
+"""Streaming CSV / NDJSON exports.
+
+Rows are read from an unbuffered cursor in chunks and written out as they
+arrive, so memory stays flat however large the table is. The connection is
+borrowed from the pool for the lifetime of the stream, not the request.
+"""
+import csv
+import io
+import json
+import zlib
+
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+class _Line(io.StringIO):
+    """csv.writer target that hands back whatever was written since the last call."""
+    def take(self):
+        value = self.getvalue()
+        self.seek(0)
+        self.truncate()
+        return value
+
+
+def _encode(fmt):
+    if fmt == "csv":
+        buf = _Line()
+        writer = csv.writer(buf)
+
+        def encode(columns, rows):
+            writer.writerows(rows)
+            return buf.take()
+
+        def header(columns):
+            writer.writerow(columns)
+            return buf.take()
+    else:
+        def encode(columns, rows):
+            return "".join(json.dumps(dict(zip(columns, row)), default=str) + "\n" for row in rows)
+
+        def header(columns):
+            return ""
+    return header, encode
+
+
+def stream_rows(pool, sql, params=(), fmt="csv", compress=False, chunk=1000):
+    """Yield `sql`'s result set encoded as `fmt` (optionally gzipped), `chunk` rows at a time."""
+    header, encode = _encode(fmt)
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    emit = (lambda text: gz.compress(text.encode()) + gz.flush(zlib.Z_SYNC_FLUSH)) if gz else (lambda text: text.encode())
+
+    conn, done = pool.acquire(), False
+    try:
+        cursor = conn.cursor(buffered=False)
+        cursor.execute(sql, params)
+        columns = [d[0] for d in cursor.description]
+        yield emit(header(columns))
+        while True:
+            rows = cursor.fetchmany(chunk)
+            if not rows:
+                break
+            yield emit(encode(columns, rows))
+        cursor.close()
+        done = True
+        if gz:
+            yield gz.flush()
+    finally:
+        # An abandoned stream leaves unread rows on the connection; drop it rather than reuse it.
+        pool.release(conn, discard=not done)
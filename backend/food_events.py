@@ -0,0 +1,189 @@
+"""Server-Sent Events feed of available-food changes for NGOs.
+
+Triggers from db/migrations/005_food_events.sql write every change that
+affects the available list into food_event. Each worker runs one asyncio
+(tornado) server on a background thread. It polls food_event once per
+interval, whatever the number of clients, and fans each event out to every
+connected EventSource. An idle client costs one coroutine and a small
+queue, not a thread.
+
+Clients reconnecting with Last-Event-ID get the events they missed from an
+in-memory backlog. If they fell too far behind, they are told to reload.
+"""
+import asyncio
+import json
+import socket
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+
+import tornado.httpserver
+import tornado.iostream
+import tornado.netutil
+import tornado.web
+
+EVENTS_SQL = """
+    SELECT e.event_id, e.kind, e.food_id, f.item_name, f.category, f.quantity, f.unit, f.expiry_time, f.status, c.name AS canteen_name
+    FROM food_event e
+    LEFT JOIN food f ON f.food_id = e.food_id
+    LEFT JOIN canteen c ON c.canteen_id = f.canteen_id
+    WHERE e.event_id > %s ORDER BY e.event_id LIMIT %s
+"""
+BATCH, BACKLOG, CLIENT_QUEUE = 500, 1000, 200
+KEEPALIVE = 15          # seconds between comment pings on an idle stream
+GAP_WAIT = 5            # seconds to wait for an uncommitted lower event_id before skipping it
+RETENTION = timedelta(days=1)
+
+
+def _message(row):
+    event_id, kind, food_id, item_name, category, quantity, unit, expiry_time, status, canteen_name = row
+    food = None if item_name is None else dict(
+        food_id=food_id, item_name=item_name, category=category, quantity=quantity, unit=unit,
+        expiry_time=expiry_time.isoformat(), status=status, canteen_name=canteen_name)
+    data = json.dumps(dict(event_id=event_id, kind=kind, food_id=food_id, food=food))
+    return f"id: {event_id}\nevent: food\ndata: {data}\n\n".encode()
+
+
+class EventsHandler(tornado.web.RequestHandler):
+    def initialize(self, hub):
+        self.hub = hub
+
+    def _allow_origin(self):
+        origin = self.request.headers.get("Origin")
+        if origin and urlparse(origin).hostname == self.request.host_name:
+            self.set_header("Access-Control-Allow-Origin", origin)
+            self.set_header("Access-Control-Allow-Credentials", "true")
+
+    async def get(self):
+        self._allow_origin()
+        if not self.hub.authorize(self.get_cookie(self.hub.cookie_name)):
+            self.set_status(403)
+            return
+        self.set_header("Content-Type", "text/event-stream")
+        self.set_header("Cache-Control", "no-cache")
+        self.set_header("X-Accel-Buffering", "no")
+
+        queue = asyncio.Queue(CLIENT_QUEUE)
+        self.hub.clients.add(queue)
+        try:
+            self.write(b"retry: 3000\n\n")
+            last_id = self.request.headers.get("Last-Event-ID") or self.get_argument("last_event_id", "")
+            if last_id.isdigit():
+                self.write(self.hub.replay(int(last_id)))
+            await self.flush()
+            while queue in self.hub.clients:
+                try:
+                    self.write(await asyncio.wait_for(queue.get(), KEEPALIVE))
+                except asyncio.TimeoutError:
+                    self.write(b": keepalive\n\n")
+                await self.flush()
+        except tornado.iostream.StreamClosedError:
+            pass
+        finally:
+            self.hub.clients.discard(queue)
+
+
+class FoodEventBroadcaster:
+    def __init__(self, pool, authorize, cookie_name="session", host="0.0.0.0", port=5001, poll_interval=1.0):
+        self.pool, self.authorize, self.cookie_name = pool, authorize, cookie_name
+        self.host, self.port, self.poll_interval = host, port, poll_interval
+        self.clients = set()
+        self.backlog = deque(maxlen=BACKLOG)     # (event_id, message)
+        self.sent = 0
+        self._floor, self._seen, self._gap_since = None, set(), None
+        self._thread, self._loop = None, None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="food-events", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            # SO_REUSEPORT lets every worker process bind the same port; the kernel spreads clients across them.
+            sockets = tornado.netutil.bind_sockets(self.port, address=self.host, reuse_port=hasattr(socket, "SO_REUSEPORT"))
+        except OSError as e:
+            print(f"--- FOOD EVENT FEED DISABLED --- {e}")
+            return
+        server = tornado.httpserver.HTTPServer(tornado.web.Application([(r"/ngo/events", EventsHandler, dict(hub=self))]))
+        server.add_sockets(sockets)
+        self._loop.create_task(self._poll())
+        self._loop.run_forever()
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def replay(self, last_id):
+        if self.backlog and last_id < self.backlog[0][0] - 1:
+            return b"event: reset\ndata: {}\n\n"
+        return b"".join(msg for event_id, msg in self.backlog if event_id > last_id)
+
+    def _fetch(self, purge):
+        conn, broken = self.pool.acquire(), False
+        try:
+            cursor = conn.cursor()
+            if self._floor is None:
+                cursor.execute("SELECT COALESCE(MAX(event_id), 0) FROM food_event")
+                self._floor = cursor.fetchone()[0]
+            if purge:
+                cursor.execute("DELETE FROM food_event WHERE created_at < %s", (datetime.now() - RETENTION,))
+            cursor.execute(EVENTS_SQL, (self._floor, BATCH))
+            rows = cursor.fetchall()
+            cursor.close()
+            return rows
+        except Exception as e:
+            broken = True
+            print(f"--- FOOD EVENT POLL FAILED --- {e}")
+            return []
+        finally:
+            self.pool.release(conn, discard=broken)
+
+    def _advance(self):
+        # Events commit out of id order; hold the floor below a gap for GAP_WAIT seconds, then skip it.
+        while self._seen:
+            if self._floor + 1 in self._seen:
+                self._seen.discard(self._floor + 1)
+                self._floor += 1
+                self._gap_since = None
+            elif self._gap_since is None:
+                self._gap_since = time.monotonic()
+                return
+            elif time.monotonic() - self._gap_since > GAP_WAIT:
+                self._floor = min(self._seen) - 1
+                self._gap_since = None
+            else:
+                return
+
+    async def _poll(self):
+        loop, last_purge = asyncio.get_running_loop(), 0.0
+        while True:
+            purge = time.monotonic() - last_purge > 600
+            rows = await loop.run_in_executor(None, self._fetch, purge)
+            if purge:
+                last_purge = time.monotonic()
+            for row in rows:
+                if row[0] in self._seen:
+                    continue
+                self._seen.add(row[0])
+                msg = _message(row)
+                self.backlog.append((row[0], msg))
+                self.sent += 1
+                for queue in list(self.clients):
+                    try:
+                        queue.put_nowait(msg)
+                    except asyncio.QueueFull:
+                        self.clients.discard(queue)     # slow consumer: its handler exits and the browser reconnects
+            self._advance()
+            await asyncio.sleep(self.poll_interval)
+
+    def stats(self):
+        return dict(clients=len(self.clients), events_sent=self.sent, floor=self._floor or 0, running=int(self._loop is not None))
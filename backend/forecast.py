@@ -0,0 +1,258 @@
+"""Surplus forecasts per canteen and category, for scheduling NGO pickups ahead.
+
+Training reads the analytics snapshots (analytics.py), never the live tables.
+Food rows are bucketed into services (breakfast/lunch/dinner) by expiry_time,
+the only time a listing carries, and summed into units listed per canteen,
+category and service, next to the units later reported wasted. Each
+(canteen, category) series gets a ridge regression on the surplus one service,
+one day and one week back, its four-week same-service mean, the waste one day
+back and day-of-week/service indicators. Series too short to fit fall back to
+their four-week same-service mean.
+
+Retraining is incremental: the snapshots are refreshed from their watermarks
+and only series whose observations changed are refit. The bundle is saved to
+var/forecast/model.joblib; ForecastCache reloads it when the file changes and
+predicts from it, so no request ever trains.
+
+    python backend/forecast.py           # refresh snapshots, refit changed series
+    python backend/forecast.py --full    # refit every series
+"""
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import Ridge
+
+from analytics import LOCK_NAME, load_table, refresh_snapshots
+from workers import PeriodicWorker
+
+# A listing expiring before 11:00 is breakfast surplus, before 16:00 lunch, otherwise dinner.
+SERVICES, SERVICE_ENDS = ("breakfast", "lunch", "dinner"), (11, 16)
+SLOTS = len(SERVICES)
+EPOCH = pd.Timestamp("2001-01-01")      # a Monday: service index t is day * SLOTS + slot, day % 7 the weekday
+HISTORY_DAYS = 365
+MEAN_DAYS = 28                          # same-service trailing mean, also the fallback forecast
+WARMUP = 7 * SLOTS                      # first position with every lag available
+MIN_TRAIN = 14 * SLOTS                  # rows needed beyond the warm-up to fit a model
+STALE_DAYS = 28                         # series with no listing for this long are not forecast
+MAX_AHEAD = 7 * SLOTS                   # a bundle forecasts at most a week past its training
+TAIL = (MEAN_DAYS + 1) * SLOTS          # trailing services kept per series for prediction
+RIDGE_ALPHA = 1.0
+
+
+def service_index(when):
+    """Index of the service `when` falls in (the next one to produce surplus)."""
+    when = pd.Timestamp(when)
+    return (when.normalize() - EPOCH).days * SLOTS + int(np.searchsorted(SERVICE_ENDS, when.hour, side="right"))
+
+
+def service_of(index):
+    """(date, service name) of a service index."""
+    return (EPOCH + timedelta(days=index // SLOTS)).date(), SERVICES[index % SLOTS]
+
+
+def service_history(snapshot_dir, end):
+    """Units listed and wasted per (canteen_id, category, t) for the HISTORY_DAYS of services before `end`."""
+    food = load_table(snapshot_dir, "food")
+    waste = load_table(snapshot_dir, "waste_report")
+    food = food[food["expiry_time"].notna()]
+    expiry = food["expiry_time"]
+    t = (expiry.dt.normalize() - EPOCH).dt.days.to_numpy() * SLOTS + np.searchsorted(SERVICE_ENDS, expiry.dt.hour.to_numpy(), side="right")
+    food = food.assign(t=t)[(t < end) & (t >= end - HISTORY_DAYS * SLOTS)]
+    wasted = waste.groupby("food_id")["quantity_wasted"].sum().rename("wasted")
+    food = food.join(wasted, on="food_id")
+    history = food.groupby(["canteen_id", "category", "t"]).agg(listed=("quantity", "sum"), wasted=("wasted", "sum"))
+    return history.fillna(0).reset_index()
+
+
+def _features(y, w, start):
+    """Feature rows for every position of a series (y surplus, w waste, y[0] at service `start`),
+    each built only from the values before it."""
+    n = len(y)
+    idx = np.arange(n)
+
+    def lag(a, k):
+        return np.concatenate([np.zeros(min(k, n)), a[:max(n - k, 0)]])
+
+    cs = np.empty(n)
+    for s in range(SLOTS):
+        cs[s::SLOTS] = np.cumsum(y[s::SLOTS])
+    prev = np.where(idx >= SLOTS, cs[np.maximum(idx - SLOTS, 0)], 0.0)
+    older = np.where(idx >= (MEAN_DAYS + 1) * SLOTS, cs[np.maximum(idx - (MEAN_DAYS + 1) * SLOTS, 0)], 0.0)
+    mean = (prev - older) / np.maximum(np.minimum(idx // SLOTS, MEAN_DAYS), 1)
+
+    t = start + idx
+    return np.column_stack([lag(y, 1), lag(y, SLOTS), lag(y, 7 * SLOTS), mean, lag(w, SLOTS),
+                            np.eye(7)[(t // SLOTS) % 7], np.eye(SLOTS)[t % SLOTS]])
+
+
+def _fallback(y, start):
+    """Mean surplus per service over the series' last MEAN_DAYS days."""
+    recent, first = y[-MEAN_DAYS * SLOTS:], start + max(len(y) - MEAN_DAYS * SLOTS, 0)
+    return np.array([recent[(s - first) % SLOTS::SLOTS].mean() if len(recent) else 0.0 for s in range(SLOTS)])
+
+
+def train(snapshot_dir, previous=None, full=False, now=None):
+    """Fit every series whose observations changed since `previous` (a bundle); returns the new bundle."""
+    started = time.perf_counter()
+    end = service_index(now or datetime.now())
+    history = service_history(snapshot_dir, end)
+    old = {} if full or previous is None else previous["groups"]
+    groups, refit = {}, 0
+    for (canteen_id, category), rows in history.groupby(["canteen_id", "category"], sort=False):
+        t = rows["t"].to_numpy()
+        if t.max() < end - STALE_DAYS * SLOTS:
+            continue
+        start = t.min() - t.min() % SLOTS
+        y, w = np.zeros(end - start), np.zeros(end - start)
+        y[t - start], w[t - start] = rows["listed"].to_numpy(dtype=np.float64), rows["wasted"].to_numpy(dtype=np.float64)
+        fingerprint = (len(rows), float(y.sum()), float(w.sum()), int(t.min()), int(t.max()))
+        key = (int(canteen_id), category)
+        model = None
+        if key in old and old[key]["fingerprint"] == fingerprint:
+            model = old[key]["model"]
+        elif len(y) >= WARMUP + MIN_TRAIN:
+            model = Ridge(alpha=RIDGE_ALPHA).fit(_features(y, w, start)[WARMUP:], y[WARMUP:])
+            refit += 1
+        groups[key] = dict(fingerprint=fingerprint, model=model, fallback=_fallback(y, start),
+                           y=y[-TAIL:], w=w[-TAIL:])
+    return dict(end=end, groups=groups, trained_at=datetime.now(),
+                stats=dict(series=len(groups), refit=refit, fallback=sum(g["model"] is None for g in groups.values()),
+                           services=len(history), seconds=round(time.perf_counter() - started, 3)))
+
+
+def save(bundle, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    joblib.dump(bundle, tmp)
+    os.replace(tmp, path)
+
+
+def load(path):
+    try:
+        return joblib.load(path)
+    except (OSError, EOFError):
+        return None
+
+
+def predict(group, end, target):
+    """Surplus forecast for service `target` (>= end) from a trained series, rolled forward a service at a time."""
+    if group["model"] is None:
+        return float(group["fallback"][target % SLOTS])
+    y, w, start = group["y"], group["w"], end - len(group["y"])
+    for _ in range(end, target + 1):
+        y, w = np.append(y, 0.0), np.append(w, w[-SLOTS] if len(w) >= SLOTS else 0.0)
+        y[-1] = max(float(group["model"].predict(_features(y, w, start)[-1:])[0]), 0.0)
+    return float(y[-1])
+
+
+def forecast(bundle, target):
+    """{canteen_id: {total, categories: [{category, units}]}} for service `target`, or None if the bundle is too old."""
+    if not 0 <= target - bundle["end"] < MAX_AHEAD:
+        return None
+    canteens = {}
+    for (canteen_id, category), group in bundle["groups"].items():
+        units = int(round(predict(group, bundle["end"], target)))
+        if units > 0:
+            entry = canteens.setdefault(canteen_id, dict(total=0, categories=[]))
+            entry["total"] += units
+            entry["categories"].append(dict(category=category, units=units))
+    for entry in canteens.values():
+        entry["categories"].sort(key=lambda c: -c["units"])
+    return canteens
+
+
+def run_training(conn, snapshot_dir, model_path, full=False):
+    """Refresh the snapshots and retrain under the snapshot lock (so neither a refresh nor another
+    trainer runs meanwhile); returns the run's stats, or None if another process holds the lock."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT GET_LOCK(%s, 0)", (LOCK_NAME,))
+    if not cursor.fetchone()[0]:
+        cursor.close()
+        return None
+    try:
+        refresh_snapshots(conn, snapshot_dir)
+        bundle = train(snapshot_dir, None if full else load(model_path), full=full)
+        save(bundle, model_path)
+        return bundle["stats"]
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+        cursor.fetchall()
+        cursor.close()
+
+
+class ForecastCache:
+    """The saved bundle, reloaded when its file changes, with forecasts memoized per service."""
+    def __init__(self, model_path):
+        self.model_path = model_path
+        self._lock = threading.Lock()
+        self._mtime, self._bundle, self._forecasts = None, None, {}
+
+    def _current(self):
+        try:
+            mtime = os.stat(self.model_path).st_mtime_ns
+        except OSError:
+            return None
+        if mtime != self._mtime:
+            self._bundle, self._mtime, self._forecasts = load(self.model_path), mtime, {}
+        return self._bundle
+
+    def next_service(self, now=None):
+        """{date, service, trained_at, canteens} for the service in progress, or None without a fresh model."""
+        with self._lock:
+            bundle = self._current()
+            if bundle is None:
+                return None
+            target = service_index(now or datetime.now())
+            if target not in self._forecasts:
+                canteens = forecast(bundle, target)
+                day, service = service_of(target)
+                self._forecasts = {target: None if canteens is None else
+                                   dict(date=day, service=service, trained_at=bundle["trained_at"], canteens=canteens)}
+            return self._forecasts[target]
+
+    def for_canteen(self, canteen_id, now=None):
+        upcoming = self.next_service(now)
+        if upcoming is None:
+            return None
+        entry = upcoming["canteens"].get(canteen_id, dict(total=0, categories=[]))
+        return dict(entry, date=upcoming["date"], service=upcoming["service"], trained_at=upcoming["trained_at"])
+
+
+class ForecastScheduler(PeriodicWorker):
+    """Runs run_training every `interval` seconds in a daemon thread (one process wins the named lock);
+    trains at start-up when no model has been saved yet."""
+    name, failure = "forecast-trainer", "FORECAST TRAINING FAILED"
+
+    def __init__(self, pool, snapshot_dir, model_path, interval=3600):
+        super().__init__(pool, interval)
+        self.snapshot_dir, self.model_path = snapshot_dir, model_path
+        self.refit = 0
+
+    @property
+    def run_at_start(self):
+        return not os.path.exists(self.model_path)
+
+    def work(self, conn, full=False):
+        stats = run_training(conn, self.snapshot_dir, self.model_path, full=full)
+        if stats is not None:
+            self.last_run = stats
+            self.refit += stats["refit"]
+        return stats
+
+
+if __name__ == "__main__":
+    import app
+    conn = app._connect()
+    stats = run_training(conn, app.ANALYTICS_DIR, app.FORECAST_PATH, full="--full" in sys.argv)
+    conn.close()
+    if stats is None:
+        print("Another trainer holds the lock; nothing done.")
+    else:
+        print(f"{stats['series']} series ({stats['refit']} refit, {stats['fallback']} on the fallback mean) "
+              f"from {stats['services']} service rows in {stats['seconds']}s")
@@ -0,0 +1,63 @@
+"""Rendered-fragment cache, conditional GET helpers and static asset fingerprints.
+
+Fragments are cached by (name, data version, ...): a write that bumps the
+version makes the old entries unreachable, and the TTL/LRU bounds evict them.
+The same versions feed each page's ETag. A revalidating browser then gets
+304 Not Modified without the page being rendered at all.
+"""
+import hashlib
+import os
+import threading
+
+from cachetools import TTLCache
+
+
+class FragmentCache:
+    def __init__(self, maxsize=512, ttl=300):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key, render):
+        """Return the cached HTML for `key`, calling `render()` on a miss."""
+        with self._lock:
+            html = self._cache.get(key)
+            if html is not None:
+                self.hits += 1
+                return html
+            self.misses += 1
+        html = render()
+        with self._lock:
+            self._cache[key] = html
+        return html
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self):
+        with self._lock:
+            return dict(hits=self.hits, misses=self.misses, size=len(self._cache),
+                        maxsize=self._cache.maxsize, ttl=self._cache.ttl)
+
+
+def make_etag(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+
+
+_fingerprints = {}
+
+
+def fingerprint(path):
+    """Short content hash of a static file, recomputed only when its mtime changes."""
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    cached = _fingerprints.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, "rb") as fh:
+        digest = hashlib.sha1(fh.read()).hexdigest()[:12]
+    _fingerprints[path] = (mtime, digest)
+    return digest
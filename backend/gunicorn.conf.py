@@ -0,0 +1,61 @@
+"""Gunicorn settings for running the app as N worker processes.
+
+    gunicorn -c backend/gunicorn.conf.py wsgi:app
+    WEB_WORKERS=8 WEB_THREADS=4 DB_HOST=db.internal gunicorn -c backend/gunicorn.conf.py wsgi:app
+
+The app is imported once in the master (preload_app) and forked, so the
+compiled templates are shared copy-on-write. Nothing connects or starts a
+thread at import; each worker builds its own connections, warms its caches
+and starts its own expiry sweeper, matcher and live-feed
+listener in post_worker_init. On SIGTERM/SIGHUP a worker stops taking requests,
+finishes the in-flight ones (up to graceful_timeout), then app.shutdown()
+finishes background work, flushes audit rows and closes its connections.
+
+Sizing: one worker per core, each with WEB_THREADS request threads. Requests
+mostly wait on MySQL, so threads overlap that wait; more processes beyond the
+core count only add memory and connections. Every worker holds up to
+DB_POOL_SIZE + DB_POOL_OVERFLOW connections (per replica too), so keep
+workers * (DB_POOL_SIZE + DB_POOL_OVERFLOW) under MySQL's max_connections, and
+DB_POOL_SIZE >= WEB_THREADS so a busy worker does not open and close overflow
+connections on every request.
+
+With DB_BACKEND=sqlite every worker opens the same WAL file: reads run in
+parallel, writes queue on the single write lock (sqlite_backend.BUSY_TIMEOUT),
+and named locks only hold within a worker, so one or two workers suit it best.
+
+Per-process state: caches, /admin/metrics and /admin/db_pool describe the
+worker that served the request. The live feed port (FOOD_EVENTS_PORT) is
+bound by every worker with SO_REUSEPORT.
+
+Benchmark a worker count against a seeded database with loadtest.py in HTTP mode:
+
+    python backend/loadtest.py --keep --duration 5                       # seeds campus_food_waste_load
+    DB_NAME=campus_food_waste_load WEB_WORKERS=1 gunicorn -c backend/gunicorn.conf.py wsgi:app &
+    python backend/loadtest.py --reuse --url http://127.0.0.1:8000 --out var/loadtest/w1.json
+    # restart with WEB_WORKERS=$(nproc), rerun with --out var/loadtest/wN.json, then
+    python backend/loadtest.py --compare var/loadtest/w1.json var/loadtest/wN.json
+"""
+import multiprocessing
+import os
+
+chdir = os.path.dirname(os.path.abspath(__file__))      # the app imports its sibling modules by name
+bind = os.environ.get("WEB_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_WORKERS", multiprocessing.cpu_count()))
+worker_class = "gthread"
+threads = int(os.environ.get("WEB_THREADS", "4"))
+preload_app = True
+timeout = 60                    # a worker silent this long is killed and replaced
+graceful_timeout = 30           # in-flight requests get this long after SIGTERM
+keepalive = 5
+max_requests, max_requests_jitter = 10000, 1000       # recycle workers to cap slow leaks, staggered
+accesslog = os.environ.get("WEB_ACCESS_LOG")          # e.g. "-" for stdout
+
+
+def post_worker_init(worker):
+    import app
+    app.init_worker()
+
+
+def worker_exit(server, worker):
+    import app
+    app.shutdown()
@@ -0,0 +1,146 @@
+"""Leaderboard ranking cache and counter rebuild.
+
+The ranking is held in a SortedKeyList ordered by waste_score, so the full
+board, a single canteen's row and its rank are all served from memory.
+Local leaderboard writes adjust the cached row in place; the TTL bounds how
+stale a worker can get from writes made by other workers.
+
+    python backend/leaderboard.py             # rebuild counters from food/waste_report
+    python backend/leaderboard.py --dry-run   # only report drift
+"""
+import hashlib
+import sys
+import threading
+import time
+
+from sortedcontainers import SortedKeyList
+
+REBUILD_DRIFT_SQL = """
+    SELECT l.canteen_id, l.total_items, l.donated_items,
+           COALESCE(f.on_hand, 0) + COALESCE(w.wasted, 0) AS expected_total, COALESCE(f.donated, 0) AS expected_donated
+    FROM leaderboard l
+    LEFT JOIN (SELECT canteen_id, SUM(quantity) AS on_hand, SUM(IF(status = 'donated', quantity, 0)) AS donated
+               FROM food GROUP BY canteen_id) f ON f.canteen_id = l.canteen_id
+    LEFT JOIN (SELECT f.canteen_id, SUM(wr.quantity_wasted) AS wasted
+               FROM waste_report wr JOIN food f ON wr.food_id = f.food_id GROUP BY f.canteen_id) w ON w.canteen_id = l.canteen_id
+"""
+
+# total_items = everything the canteen has listed (still on hand, donated, or reported wasted);
+# donated_items = quantity of food that reached a beneficiary.
+REBUILD_SQL = """
+    UPDATE leaderboard
+    SET total_items = (SELECT COALESCE(SUM(quantity), 0) FROM food WHERE food.canteen_id = leaderboard.canteen_id)
+                    + (SELECT COALESCE(SUM(wr.quantity_wasted), 0) FROM waste_report wr JOIN food f ON wr.food_id = f.food_id
+                       WHERE f.canteen_id = leaderboard.canteen_id),
+        donated_items = (SELECT COALESCE(SUM(CASE WHEN status = 'donated' THEN quantity ELSE 0 END), 0) FROM food
+                         WHERE food.canteen_id = leaderboard.canteen_id)
+"""
+
+
+def waste_score(total_items, donated_items):
+    # Mirrors the generated leaderboard.waste_score column (DECIMAL(6,3)).
+    return 0.0 if not total_items else round(donated_items / total_items * 100, 3)
+
+
+def _rank_key(row):
+    return (-row["waste_score"], row["canteen_id"])
+
+
+def content_version(rows):
+    """Hash of what the ranking shows: equal data gives the same version in every worker and across restarts."""
+    shown = sorted((r["canteen_id"], r.get("canteen_name"), r.get("location"), r["total_items"], r["donated_items"]) for r in rows)
+    return hashlib.sha1(repr(shown).encode()).hexdigest()[:16]
+
+
+class LeaderboardCache:
+    def __init__(self, load, ttl=30):
+        self._load, self.ttl = load, ttl
+        self._rows = SortedKeyList(key=_rank_key)
+        self._by_canteen = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+        self.version = content_version([])
+
+    def _ensure_loaded(self):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+            self.hits += 1
+            return
+        self.misses += 1
+        rows = [dict(r, waste_score=float(r["waste_score"] or 0)) for r in self._load()]
+        self.version = content_version(rows)
+        self._rows = SortedKeyList(rows, key=_rank_key)
+        self._by_canteen = {r["canteen_id"]: r for r in rows}
+        self._loaded_at = time.monotonic()
+
+    def current_version(self):
+        """Content version of the ranking; it only moves when the ranking's data changes."""
+        with self._lock:
+            self._ensure_loaded()
+            return self.version
+
+    def ranked(self):
+        with self._lock:
+            self._ensure_loaded()
+            return [dict(r) for r in self._rows]
+
+    def get(self, canteen_id):
+        with self._lock:
+            self._ensure_loaded()
+            row = self._by_canteen.get(canteen_id)
+            return dict(row) if row else None
+
+    def count(self):
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._rows)
+
+    def rank_of(self, canteen_id):
+        """1-based rank of `canteen_id`, or None if it has no leaderboard row."""
+        with self._lock:
+            self._ensure_loaded()
+            row = self._by_canteen.get(canteen_id)
+            return self._rows.index(row) + 1 if row else None
+
+    def adjust(self, canteen_id, total=0, donated=0):
+        """Apply a leaderboard write already committed to the database."""
+        with self._lock:
+            row = self._by_canteen.get(canteen_id)
+            if self._loaded_at is None or row is None:
+                self._loaded_at = None
+                return
+            self._rows.remove(row)
+            row["total_items"] += total
+            row["donated_items"] += donated
+            row["waste_score"] = waste_score(row["total_items"], row["donated_items"])
+            self._rows.add(row)
+            self.version = content_version(self._rows)
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+
+def rebuild_counters(conn, dry_run=False):
+    """Recompute every canteen's total/donated items in one set-based pass; returns the drifted rows."""
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(REBUILD_DRIFT_SQL)
+    drift = [r for r in cursor.fetchall()
+             if (r["total_items"], r["donated_items"]) != (r["expected_total"], r["expected_donated"])]
+    if not dry_run:
+        cursor.execute("INSERT IGNORE INTO leaderboard (canteen_id) SELECT canteen_id FROM canteen")
+        cursor.execute(REBUILD_SQL)
+    cursor.close()
+    return drift
+
+
+if __name__ == "__main__":
+    from app import _connect
+    conn = _connect()
+    dry_run = "--dry-run" in sys.argv
+    drift = rebuild_counters(conn, dry_run=dry_run)
+    for r in drift:
+        print(f"canteen {r['canteen_id']}: total {r['total_items']} -> {r['expected_total']}, "
+              f"donated {r['donated_items']} -> {r['expected_donated']}")
+    print(f"{len(drift)} canteen(s) drifted" + ("" if dry_run or not drift else ", rebuilt."))
+    conn.close()
@@ -0,0 +1,397 @@
+"""Load test: drives every route of app.py as concurrent admin, canteen and NGO sessions.
+
+Seeds a scratch copy of the schema with check_query_plans.seed (tens of
+thousands of food rows at --scale 1, millions of audit/login rows at
+--log-scale 10), then runs simulated sessions in-process through Flask test
+clients against that local MySQL database (or, with --backend sqlite, a
+scratch SQLite file under var/). Per route it records throughput,
+p50/p95/p99 latency and SQL statements per request, and writes everything to
+a JSON file so runs can be diffed between commits:
+
+    python backend/loadtest.py [--scale 1.0] [--log-scale 1.0] [--admins 2] [--canteens 8] [--ngos 8]
+                               [--duration 60] [--db campus_food_waste_load] [--backend mysql|sqlite] [--reuse] [--keep] [--out FILE]
+    python backend/loadtest.py --compare old.json new.json
+
+--reuse skips seeding and runs against an existing --db (e.g. a copy kept with --keep).
+--url sends the same sessions over HTTP to a running server instead (e.g. gunicorn
+workers started with DB_NAME=<--db>, or DB_BACKEND=sqlite SQLITE_PATH=var/<--db>.sqlite3;
+see gunicorn.conf.py); SQL counts are then 0.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import numpy as np
+import requests
+
+import app as webapp
+import sqlite_backend
+from check_query_plans import build_scratch_db, connect_scratch, drop_scratch_db, use_scratch_db
+
+PASSWORD = "loadtest"
+
+# -------------------------
+# Query counting
+# -------------------------
+# Every cursor.execute/executemany issued while a request is being served counts
+# as one statement (a multi-statement batch is one round trip, so it counts once).
+_local = threading.local()
+
+
+def _counting(method):
+    def wrapper(self, *args, **kwargs):
+        _local.queries = getattr(_local, "queries", 0) + 1
+        return method(self, *args, **kwargs)
+    return wrapper
+
+
+def instrument_cursors():
+    from mysql.connector.cursor import MySQLCursor
+    classes = [MySQLCursor, sqlite_backend.Cursor]
+    try:
+        from mysql.connector.cursor_cext import CMySQLCursor
+        classes.append(CMySQLCursor)
+    except ImportError:
+        pass
+    for cls in classes:
+        cls.execute, cls.executemany = _counting(cls.execute), _counting(cls.executemany)
+
+
+# -------------------------
+# Fixtures
+# -------------------------
+def create_session_users(conn, admins, canteens, ngos):
+    """One login per simulated session; canteen/NGO sessions are spread over the existing canteens/NGOs."""
+    cur = conn.cursor()
+    cur.execute("SELECT role_name, role_id FROM roles")
+    roles = dict(cur.fetchall())
+    cur.execute("SELECT COUNT(*) FROM canteen")
+    n_canteens = cur.fetchone()[0]
+    cur.execute("SELECT COUNT(*) FROM ngo")
+    n_ngos = cur.fetchone()[0]
+    sessions = [("admin", i, 0) for i in range(admins)]
+    sessions += [("canteen", i, i % n_canteens + 1) for i in range(canteens)]
+    sessions += [("ngo", i, i % n_ngos + 1) for i in range(ngos)]
+    cur.executemany("INSERT IGNORE INTO users (username, password, email, role_id, ref_id) VALUES (%s, %s, %s, %s, %s)",
+                    [(f"load_{role}_{i}", PASSWORD, f"load_{role}_{i}@loadtest.local", roles[role], ref_id) for role, i, ref_id in sessions])
+    cur.close()
+    return [dict(role=role, username=f"load_{role}_{i}", ref_id=ref_id) for role, i, ref_id in sessions]
+
+
+def _ids(conn, sql, params=()):
+    cur = conn.cursor()
+    cur.execute(sql, params)
+    ids = [row[0] for row in cur.fetchall()]
+    cur.close()
+    return ids
+
+
+def session_fixtures(conn, session):
+    """Ids the session's write scenarios pick from; lists are popped as rows get consumed."""
+    ref_id = session["ref_id"]
+    if session["role"] == "canteen":
+        return dict(
+            food=_ids(conn, "SELECT food_id FROM food WHERE canteen_id = %s AND status = 'available' ORDER BY food_id DESC LIMIT 500", (ref_id,)),
+            pending=_ids(conn, "SELECT dr.request_id FROM donation_request dr JOIN food f ON dr.food_id = f.food_id WHERE f.canteen_id = %s AND dr.status = 'pending' LIMIT 500", (ref_id,)),
+        )
+    if session["role"] == "ngo":
+        return dict(
+            food=_ids(conn, "SELECT food_id FROM food WHERE status = 'available' AND expiry_time > %s ORDER BY expiry_time LIMIT 500", (datetime.now(),)),
+            approved=_ids(conn, "SELECT request_id FROM donation_request WHERE ngo_id = %s AND status = 'approved' LIMIT 500", (ref_id,)),
+        )
+    return {}
+
+
+# -------------------------
+# Scenarios: (route label, weight, fn(client, fixtures, rnd) -> response)
+# -------------------------
+def _expiry(rnd):
+    return (datetime.now() + timedelta(hours=rnd.randint(2, 48))).strftime("%Y-%m-%dT%H:%M")
+
+
+def _date_range(rnd):
+    end = datetime.now() - timedelta(days=rnd.randint(0, 90))
+    return {"from": (end - timedelta(days=7)).strftime("%Y-%m-%d"), "to": end.strftime("%Y-%m-%d")}
+
+
+def _pick(ids, rnd, pop=False):
+    if not ids:
+        return 0
+    return ids.pop(rnd.randrange(len(ids))) if pop else rnd.choice(ids)
+
+
+def _search_query(rnd):
+    """A search as an NGO would type it: a word, a prefix or a short term (LIKE fallback), sometimes with a
+    facet, an expiry window or a later page. Terms match the seeded item, category and canteen names."""
+    query = dict(q=rnd.choice(["item", "load meal", "veg", "bak", "canteen", "12", ""]))
+    if rnd.random() < 0.3:
+        query["category"] = rnd.choice(["Vegetarian", "Non-Vegetarian", "Beverage", "Bakery", "Other"])
+    if rnd.random() < 0.3:
+        query["within"] = rnd.choice([1, 3, 6, 12, 24])
+    if rnd.random() < 0.2:
+        query["page"] = rnd.randint(2, 5)
+    return query
+
+
+def _bulk_csv(rnd, rows=20):
+    lines = ["item_name,category,quantity,unit,expiry_time"]
+    lines += [f"Load Item {rnd.randint(1, 10**6)},Vegetarian,{rnd.randint(1, 30)},plates,{_expiry(rnd).replace('T', ' ')}" for _ in range(rows)]
+    return (io.BytesIO("\n".join(lines).encode()), "load.csv")
+
+
+ADMIN_SCENARIOS = [
+    ("GET /admin/dashboard", 10, lambda c, f, r: c.get("/admin/dashboard")),
+    ("GET /admin/view_logs", 6, lambda c, f, r: c.get("/admin/view_logs")),
+    ("GET /admin/view_logs?filtered", 3, lambda c, f, r: c.get("/admin/view_logs", query_string=dict(actor=r.randint(1, 500), **_date_range(r)))),
+    ("GET /admin/view_activity", 4, lambda c, f, r: c.get("/admin/view_activity", query_string=_date_range(r))),
+    ("GET /admin/view_reports", 4, lambda c, f, r: c.get("/admin/view_reports")),
+    ("GET /admin/impact", 3, lambda c, f, r: c.get("/admin/impact")),
+    ("GET /admin/view_leaderboard", 4, lambda c, f, r: c.get("/admin/view_leaderboard")),
+    ("GET /admin/manage_users", 1, lambda c, f, r: c.get("/admin/manage_users")),
+    ("GET /admin/add_user", 1, lambda c, f, r: c.get("/admin/add_user")),
+    ("POST /admin/add_user", 1, lambda c, f, r: c.post("/admin/add_user", data=dict(
+        username=f"load_new_{r.randint(1, 10**9)}", email=f"new_{r.randint(1, 10**9)}@loadtest.local", password=PASSWORD, role="ngo", ngo_id=1))),
+    ("GET /admin/db_pool", 1, lambda c, f, r: c.get("/admin/db_pool")),
+    ("GET /admin/cache_stats", 1, lambda c, f, r: c.get("/admin/cache_stats")),
+    ("GET /admin/metrics", 1, lambda c, f, r: c.get("/admin/metrics")),
+    # An unmatched URL is recorded under the "<unmatched>" endpoint; the exposition must still render after it.
+    ("GET /admin/metrics after a 404", 1, lambda c, f, r: (c.get(f"/no-such-page/{r.randint(1, 10**6)}"), c.get("/admin/metrics"))[1]),
+    ("POST /admin/reference_data/refresh", 1, lambda c, f, r: c.post("/admin/reference_data/refresh")),
+    ("GET /admin/export/<kind>", 1, lambda c, f, r: c.get(f"/admin/export/{r.choice(['audit_log', 'waste_report', 'meal_beneficiary'])}",
+                                                         query_string=dict(format=r.choice(["csv", "ndjson"]), **_date_range(r)))),
+    ("GET /admin/analytics", 2, lambda c, f, r: c.get("/admin/analytics")),
+    ("POST /admin/analytics/refresh", 1, lambda c, f, r: c.post("/admin/analytics/refresh")),
+    ("POST /admin/matching/run", 1, lambda c, f, r: c.post("/admin/matching/run")),
+    ("GET /admin/view_logs?archived=1", 1, lambda c, f, r: c.get("/admin/view_logs", query_string=dict(archived=1, **_date_range(r)))),
+    ("POST /admin/archive/run", 1, lambda c, f, r: c.post("/admin/archive/run")),
+    ("POST /admin/forecast/retrain", 1, lambda c, f, r: c.post("/admin/forecast/retrain", data=dict(full=r.choice(["0", "1"])))),
+]
+
+CANTEEN_SCENARIOS = [
+    ("GET /canteen/dashboard", 10, lambda c, f, r: c.get("/canteen/dashboard")),
+    ("GET /canteen/food_list", 8, lambda c, f, r: c.get("/canteen/food_list")),
+    ("GET /canteen/add_food", 2, lambda c, f, r: c.get("/canteen/add_food")),
+    ("POST /canteen/add_food", 3, lambda c, f, r: c.post("/canteen/add_food", data=dict(
+        item_name=f"Load Meal {r.randint(1, 10**6)}", category="Vegetarian", quantity=r.randint(1, 30), unit="plates", expiry_time=_expiry(r), notes=""))),
+    ("POST /canteen/bulk_add_food", 1, lambda c, f, r: c.post("/canteen/bulk_add_food", data=dict(file=_bulk_csv(r)), content_type="multipart/form-data")),
+    ("GET /canteen/edit_food/<id>", 2, lambda c, f, r: c.get(f"/canteen/edit_food/{_pick(f['food'], r)}")),
+    ("POST /canteen/edit_food/<id>", 2, lambda c, f, r: c.post(f"/canteen/edit_food/{_pick(f['food'], r)}", data=dict(
+        item_name="Load Meal (edited)", category="Vegetarian", quantity=r.randint(20, 40), unit="plates", expiry_time=_expiry(r), notes="edited"))),
+    ("GET /canteen/delete_food/<id>", 1, lambda c, f, r: c.get(f"/canteen/delete_food/{_pick(f['food'], r, pop=True)}")),
+    ("GET /canteen/manage_requests", 5, lambda c, f, r: c.get("/canteen/manage_requests")),
+    ("POST /canteen/manage_requests", 2, lambda c, f, r: c.post("/canteen/manage_requests", data=dict(
+        action=r.choice(["approve", "reject"]), request_id=_pick(f["pending"], r, pop=True)))),
+    ("GET /canteen/file_waste_report", 2, lambda c, f, r: c.get("/canteen/file_waste_report")),
+    ("POST /canteen/file_waste_report", 3, lambda c, f, r: c.post("/canteen/file_waste_report", data=dict(
+        food_id=_pick(f["food"], r), reason=r.choice(["spoilage", "late_pickup", "over_preparation", "other"]), quantity_wasted=1))),
+    ("GET /canteen/leaderboard", 4, lambda c, f, r: c.get("/canteen/leaderboard")),
+]
+
+NGO_SCENARIOS = [
+    ("GET /ngo/dashboard", 10, lambda c, f, r: c.get("/ngo/dashboard")),
+    ("GET /ngo/food_list", 8, lambda c, f, r: c.get("/ngo/food_list")),
+    ("GET /ngo/search", 4, lambda c, f, r: c.get("/ngo/search", query_string=_search_query(r))),
+    ("GET /ngo/food_list?filtered", 2, lambda c, f, r: c.get("/ngo/food_list", query_string=_search_query(r))),
+    ("POST /ngo/request", 4, lambda c, f, r: c.post("/ngo/request", data=dict(food_id=_pick(f["food"], r)))),
+    ("GET /ngo/history", 6, lambda c, f, r: c.get("/ngo/history", query_string=r.choice([{}, dict(status="completed"), dict(status="pending")]))),
+    ("GET /ngo/record_beneficiaries", 3, lambda c, f, r: c.get("/ngo/record_beneficiaries")),
+    ("POST /ngo/record_beneficiaries", 1, lambda c, f, r: c.post("/ngo/record_beneficiaries", data=dict(
+        donation_id=_pick(f["approved"], r, pop=True), people_served=r.randint(5, 80), location="Load Test Shelter"))),
+    ("GET /ngo/matching", 2, lambda c, f, r: c.get("/ngo/matching")),
+    ("POST /ngo/matching", 1, lambda c, f, r: c.post("/ngo/matching", data=dict(
+        capacity=r.randint(20, 200), preferred_categories=r.sample(["Vegetarian", "Non-Vegetarian", "Beverage", "Bakery", "Other"], 2),
+        location="Load Test Shelter", latitude=round(18.5 + r.random() / 10, 5), longitude=round(73.8 + r.random() / 10, 5)))),
+]
+
+SCENARIOS = {"admin": ADMIN_SCENARIOS, "canteen": CANTEEN_SCENARIOS, "ngo": NGO_SCENARIOS}
+
+
+# -------------------------
+# Runner
+# -------------------------
+class HttpResponse:
+    def __init__(self, response):
+        self.status_code, self._body = response.status_code, response.content
+
+    def get_data(self):
+        return self._body
+
+
+class HttpClient:
+    """The subset of Flask's test client the scenarios use, sent to a running server."""
+    def __init__(self, base_url):
+        self.base_url, self.http = base_url.rstrip("/"), requests.Session()
+
+    def get(self, path, query_string=None):
+        return HttpResponse(self.http.get(self.base_url + path, params=query_string, allow_redirects=False))
+
+    def post(self, path, data=None, content_type=None):
+        data = dict(data or {})
+        files = {k: (v[1], v[0]) for k, v in data.items() if isinstance(v, tuple)}
+        fields = {k: v for k, v in data.items() if k not in files}
+        return HttpResponse(self.http.post(self.base_url + path, data=fields, files=files or None, allow_redirects=False))
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)     # route -> [(ms, queries, status)]
+
+    def call(self, route, fn):
+        _local.queries = 0
+        start = time.perf_counter()
+        response = fn()
+        response.get_data()                  # drain streamed bodies inside the timing window
+        elapsed = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.samples[route].append((elapsed, _local.queries, response.status_code))
+        return response
+
+
+def run_session(session, seed, deadline, recorder, conn_factory, url=None):
+    rnd = random.Random(seed)
+    client = HttpClient(url) if url else webapp.app.test_client()
+    conn = conn_factory()
+    fixtures = session_fixtures(conn, session)
+    conn.close()
+
+    recorder.call("GET /", lambda: client.get("/"))
+    recorder.call("GET /login", lambda: client.get("/login"))
+    recorder.call("GET /register", lambda: client.get("/register"))
+    recorder.call("POST /login", lambda: client.post("/login", data=dict(username=session["username"], password=PASSWORD)))
+
+    scenarios = SCENARIOS[session["role"]]
+    weights = [w for _, w, _ in scenarios]
+    while time.monotonic() < deadline:
+        route, _, fn = rnd.choices(scenarios, weights)[0]
+        recorder.call(route, lambda: fn(client, fixtures, rnd))
+    recorder.call("GET /logout", lambda: client.get("/logout"))
+
+
+def summarize(samples, wall_seconds):
+    routes = {}
+    for route, rows in sorted(samples.items()):
+        ms = np.array([r[0] for r in rows])
+        queries = np.array([r[1] for r in rows])
+        statuses = [r[2] for r in rows]
+        routes[route] = dict(
+            requests=len(rows), errors=sum(1 for s in statuses if s >= 400),
+            throughput_rps=round(len(rows) / wall_seconds, 2),
+            p50_ms=round(float(np.percentile(ms, 50)), 2), p95_ms=round(float(np.percentile(ms, 95)), 2),
+            p99_ms=round(float(np.percentile(ms, 99)), 2), mean_ms=round(float(ms.mean()), 2),
+            queries_per_request=round(float(queries.mean()), 2), max_queries=int(queries.max()),
+        )
+    total = sum(r["requests"] for r in routes.values())
+    return routes, dict(requests=total, errors=sum(r["errors"] for r in routes.values()),
+                        throughput_rps=round(total / wall_seconds, 2), wall_seconds=round(wall_seconds, 2))
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+
+def compare(old_path, new_path):
+    with open(old_path) as fh:
+        old = json.load(fh)
+    with open(new_path) as fh:
+        new = json.load(fh)
+    print(f"{'route':<40} {'p95 old':>9} {'p95 new':>9} {'Δ%':>7} {'q/req old':>9} {'q/req new':>9}")
+    for route in sorted(set(old["routes"]) | set(new["routes"])):
+        a, b = old["routes"].get(route), new["routes"].get(route)
+        if not a or not b:
+            print(f"{route:<40} {'only in ' + ('new' if b else 'old'):>9}")
+            continue
+        delta = (b["p95_ms"] - a["p95_ms"]) / a["p95_ms"] * 100 if a["p95_ms"] else 0
+        print(f"{route:<40} {a['p95_ms']:>9.2f} {b['p95_ms']:>9.2f} {delta:>+6.1f}% {a['queries_per_request']:>9.2f} {b['queries_per_request']:>9.2f}")
+
+
+if __name__ == "__main__":
+    if "--compare" in sys.argv:
+        i = sys.argv.index("--compare")
+        compare(sys.argv[i + 1], sys.argv[i + 2])
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--log-scale", type=float, default=None)
+    parser.add_argument("--admins", type=int, default=2)
+    parser.add_argument("--canteens", type=int, default=8)
+    parser.add_argument("--ngos", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=60, help="seconds of load after every session has logged in")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--db", default="campus_food_waste_load")
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default=webapp.DB_BACKEND)
+    parser.add_argument("--reuse", action="store_true")
+    parser.add_argument("--keep", action="store_true")
+    parser.add_argument("--url", help="drive a running server at this base URL instead of in-process test clients")
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    if args.reuse:
+        conn = connect_scratch(args.db, args.backend)
+    else:
+        print(f"Seeding {args.db} on {args.backend} (scale={args.scale}, log_scale={args.log_scale or args.scale}) ...")
+        conn = build_scratch_db(args.db, args.scale, args.log_scale, args.backend)
+    use_scratch_db(args.db, args.backend)
+    # Rebuild the app's workers before any session runs, so the archive/retrain/refresh
+    # scenarios write under a scratch directory instead of the checkout's var/.
+    scratch = tempfile.mkdtemp(prefix="loadtest_")
+    webapp.create_app(dict(ANALYTICS_DIR=os.path.join(scratch, "analytics"),
+                           ARCHIVE_DIR=os.path.join(scratch, "archive"),
+                           FORECAST_PATH=os.path.join(scratch, "forecast", "model.joblib")))
+    conn_factory = lambda: connect_scratch(args.db, args.backend)
+
+    try:
+        sessions = create_session_users(conn, args.admins, args.canteens, args.ngos)
+        instrument_cursors()
+        recorder = Recorder()
+        start = time.perf_counter()
+        deadline = time.monotonic() + args.duration
+        threads = [threading.Thread(target=run_session, args=(s, args.seed * 1000 + i, deadline, recorder, conn_factory, args.url))
+                   for i, s in enumerate(sessions)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - start
+        pool_stats = None if args.url else webapp.db_pool.stats()
+    finally:
+        webapp.shutdown()
+        shutil.rmtree(scratch, ignore_errors=True)
+        if not args.keep and not args.reuse:
+            drop_scratch_db(conn, args.db, args.backend)
+        conn.close()
+
+    routes, totals = summarize(recorder.samples, wall)
+    commit = _git_commit()
+    result = dict(
+        meta=dict(commit=commit, timestamp=datetime.now().isoformat(timespec="seconds"), python=platform.python_version(),
+                  scale=args.scale, log_scale=args.log_scale or args.scale, sessions=dict(admin=args.admins, canteen=args.canteens, ngo=args.ngos),
+                  duration=args.duration, seed=args.seed, target=args.url or "in-process", backend=args.backend,
+                  pool=pool_stats),
+        totals=totals, routes=routes,
+    )
+    out = args.out or os.path.join(webapp.BASE_DIR, "var", "loadtest", f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as fh:
+        json.dump(result, fh, indent=2, sort_keys=True)
+
+    print(f"{'route':<40} {'req':>6} {'err':>4} {'rps':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'q/req':>6}")
+    for route, r in routes.items():
+        print(f"{route:<40} {r['requests']:>6} {r['errors']:>4} {r['throughput_rps']:>7} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} {r['queries_per_request']:>6}")
+    print(f"total: {totals['requests']} requests, {totals['errors']} errors, {totals['throughput_rps']} req/s -> {out}")
@@ -0,0 +1,299 @@
+"""Automatic food-to-NGO matching.
+
+Every run takes all available food and every NGO with spare capacity
+(migration 006) and solves one batch assignment that maximizes the food
+rescued before expiry, urgent food counting double. It then files the matches
+as pending donation requests in bulk, and canteens approve them as usual.
+
+The assignment is a capacitated transportation problem: items -> NGOs, each
+item to at most one NGO, each NGO bounded by its remaining capacity in units.
+Its LP relaxation is solved with SciPy's HiGHS over a sparse edge list (see the
+sparsification note in solve). A basic optimal solution
+splits at most one item per capacity-bound NGO. Those few items are rounded
+greedily, and the result is kept only if it beats the first-come pass
+(soonest-expiring item to the nearest NGO with room), which is returned otherwise.
+
+    python backend/matching.py [--dry-run]
+"""
+import sys
+from datetime import datetime
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import linprog
+
+from workers import PeriodicWorker
+
+TOP_K = 4                   # candidate NGOs kept per item outside the contested set
+CAPACITY_COVER = 1.5        # contested items, in units, as a multiple of total NGO capacity
+PICKUP_LEAD_MIN = 20        # approval + handover time before an NGO can leave with the food
+LOCAL_TRAVEL_MIN, DEFAULT_TRAVEL_MIN = 10, 30   # same / different location text, when coordinates are missing
+TRAVEL_SPEED_KMH = 20
+# A match is worth its units, urgent units double: food with hours left can still be placed
+# by a later run, food about to expire cannot. Sooner expiry, the NGO's preferred categories
+# and shorter trips only break near-ties between equally rescued units.
+URGENT_MINUTES = 120        # food expiring within this is urgent
+URGENT_BONUS = 1.0
+URGENCY_TIEBREAK = 0.01     # up to +1% for an item at its deadline
+PREFERRED_TIEBREAK = 0.001  # +0.1% when the category is one the NGO prefers
+TRAVEL_TIEBREAK = 0.001     # up to -0.1% for the longest trip in the batch
+# MySQL named lock: one run at a time across workers. dispatch re-checks each item under
+# FOR UPDATE but not NGO capacity, so two overlapping runs could overfill the same NGO.
+LOCK_NAME = "campus_food_waste_matching"
+
+FOOD_SQL = """
+    SELECT f.food_id, f.category, f.quantity, f.expiry_time, c.location, c.latitude, c.longitude
+    FROM food f JOIN canteen c ON c.canteen_id = f.canteen_id
+    WHERE f.status = 'available' AND f.quantity > 0 AND f.expiry_time > %s
+"""
+NGO_SQL = """
+    SELECT n.ngo_id, n.location, n.latitude, n.longitude, n.preferred_categories,
+           n.capacity - COALESCE(SUM(f.quantity), 0) AS remaining
+    FROM ngo n
+    LEFT JOIN donation_request dr ON dr.ngo_id = n.ngo_id AND dr.status IN ('pending', 'approved')
+    LEFT JOIN food f ON f.food_id = dr.food_id
+    WHERE n.capacity > 0
+    GROUP BY n.ngo_id, n.location, n.latitude, n.longitude, n.preferred_categories, n.capacity
+    HAVING remaining > 0
+"""
+# Earlier (rejected) requests for food that is available again: never re-propose the same pair.
+PAST_PAIRS_SQL = """
+    SELECT dr.food_id, dr.ngo_id FROM donation_request dr JOIN food f ON f.food_id = dr.food_id
+    WHERE f.status = 'available'
+"""
+
+
+def _categories(value):
+    if not value:
+        return set()
+    return set(value.split(",")) if isinstance(value, str) else set(value)
+
+
+def _float(values):
+    return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+
+
+def travel_minutes(items, ngos):
+    """(n_items, n_ngos) travel estimate: haversine over coordinates, else location text equality."""
+    lat1, lon1 = np.radians(_float([i["latitude"] for i in items]))[:, None], np.radians(_float([i["longitude"] for i in items]))[:, None]
+    lat2, lon2 = np.radians(_float([n["latitude"] for n in ngos]))[None, :], np.radians(_float([n["longitude"] for n in ngos]))[None, :]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    km = 2 * 6371.0 * np.arcsin(np.sqrt(a))
+
+    places, codes = np.unique([str(x.get("location") or "").strip().lower() for x in items + ngos], return_inverse=True)
+    codes = codes.reshape(-1)
+    same = (codes[:len(items), None] == codes[None, len(items):]) & (places[codes[:len(items)]] != "")[:, None]
+    fallback = np.where(same, LOCAL_TRAVEL_MIN, DEFAULT_TRAVEL_MIN)
+    return np.where(np.isnan(km), fallback, km / TRAVEL_SPEED_KMH * 60 + LOCAL_TRAVEL_MIN)
+
+
+def score(items, ngos, now, excluded=()):
+    """(n_items, n_ngos) value of each match; 0 where the NGO cannot take the item before it expires."""
+    n, m = len(items), len(ngos)
+    qty = np.array([i["quantity"] for i in items], dtype=np.float64)
+    capacity = np.array([g["remaining"] for g in ngos], dtype=np.float64)
+    minutes_left = np.array([(i["expiry_time"] - now).total_seconds() / 60 for i in items])
+    travel = travel_minutes(items, ngos)
+
+    categories = sorted({i["category"] for i in items} | {c for g in ngos for c in _categories(g["preferred_categories"])}, key=str)
+    cat_index = {c: k for k, c in enumerate(categories)}
+    prefers = np.zeros((m, len(categories)), dtype=bool)
+    for j, g in enumerate(ngos):
+        for c in _categories(g["preferred_categories"]):
+            prefers[j, cat_index[c]] = True
+    preferred = prefers[:, [cat_index[i["category"]] for i in items]].T          # (n, m)
+
+    feasible = (travel + PICKUP_LEAD_MIN < minutes_left[:, None]) & (qty[:, None] <= capacity[None, :])
+    if excluded:
+        food_pos = {i["food_id"]: k for k, i in enumerate(items)}
+        ngo_pos = {g["ngo_id"]: k for k, g in enumerate(ngos)}
+        for food_id, ngo_id in excluded:
+            if food_id in food_pos and ngo_id in ngo_pos:
+                feasible[food_pos[food_id], ngo_pos[ngo_id]] = False
+
+    urgent = minutes_left <= URGENT_MINUTES
+    urgency = 1 / (1 + np.maximum(minutes_left, 0) / 60)
+    weight = qty[:, None] * (1 + URGENT_BONUS * urgent[:, None] + URGENCY_TIEBREAK * urgency[:, None]
+                             + PREFERRED_TIEBREAK * preferred - TRAVEL_TIEBREAK * travel / travel.max())
+    return np.where(feasible, weight, 0.0)
+
+
+def first_come(items, ngos, weight):
+    """{item index: NGO index} taking items soonest-expiring first, each to the nearest NGO with room
+    (the manual baseline); `weight` from score marks the feasible pairs."""
+    nearest = np.argsort(travel_minutes(items, ngos), axis=1)
+    remaining = np.array([g["remaining"] for g in ngos], dtype=np.float64)
+    assigned = {}
+    for i in sorted(range(len(items)), key=lambda i: items[i]["expiry_time"]):
+        for j in nearest[i]:
+            if weight[i, j] > 0 and items[i]["quantity"] <= remaining[j]:
+                remaining[j] -= items[i]["quantity"]
+                assigned[i] = j
+                break
+    return assigned
+
+
+def solve(items, ngos, now=None, excluded=()):
+    """Assign items to NGOs; returns [(food_id, ngo_id)].
+
+    items: dicts with food_id, category, quantity, expiry_time, location, latitude, longitude.
+    ngos: dicts with ngo_id, location, latitude, longitude, preferred_categories, remaining.
+    excluded: (food_id, ngo_id) pairs that must not be proposed.
+    """
+    if not items or not ngos:
+        return []
+    n, m, now = len(items), len(ngos), now or datetime.now()
+    qty = np.array([i["quantity"] for i in items], dtype=np.float64)
+    capacity = np.array([g["remaining"] for g in ngos], dtype=np.float64)
+    weight = score(items, ngos, now, excluded)
+
+    # Sparsify: the most valuable items (per unit) covering CAPACITY_COVER times the total
+    # capacity keep every feasible NGO; they are the ones NGOs compete for. The rest only
+    # keep their TOP_K best NGOs, which is plenty for capacity nobody else wants.
+    k = min(TOP_K, m)
+    keep = np.zeros((n, m), dtype=bool)
+    keep[np.arange(n)[:, None], np.argpartition(-weight, k - 1, axis=1)[:, :k]] = True
+    order = np.argsort(-(weight.max(axis=1) / qty))
+    contested = order[np.cumsum(qty[order]) - qty[order] < CAPACITY_COVER * capacity.sum()]
+    keep[contested] = True
+    rows, cols = np.nonzero(keep & (weight > 0))
+    w = weight[rows, cols]
+    if not len(w):
+        return []
+
+    e = len(w)
+    edges = np.arange(e)
+    a_ub = sparse.vstack([
+        sparse.csr_matrix((np.ones(e), (rows, edges)), shape=(n, e)),      # each item at most once
+        sparse.csr_matrix((qty[rows], (cols, edges)), shape=(m, e)),       # NGO capacity in units
+    ]).tocsr()
+    # Dual simplex returns a vertex, so only the few items split across NGOs are fractional.
+    result = linprog(-w, A_ub=a_ub, b_ub=np.concatenate([np.ones(n), capacity]), bounds=(0, 1), method="highs-ds")
+    x = result.x if result.status == 0 else np.zeros(e)
+
+    # Whole items first; then the split ones and anything left, most valuable per unit first
+    # (sooner expiry on ties), each to the nearest NGO that still has room.
+    assigned, remaining = {}, capacity.copy()
+    for edge in np.flatnonzero(x > 1 - 1e-6):
+        assigned[rows[edge]] = cols[edge]
+        remaining[cols[edge]] -= qty[rows[edge]]
+    travel = travel_minutes(items, ngos)
+    seconds_left = np.array([(i["expiry_time"] - now).total_seconds() for i in items])
+    for i in np.lexsort((seconds_left, -(weight.max(axis=1) / qty))):
+        if i in assigned:
+            continue
+        fits = np.flatnonzero((weight[i] > 0) & (qty[i] <= remaining + 1e-9))
+        if len(fits):
+            j = fits[np.argmin(travel[i, fits])]
+            assigned[i] = j
+            remaining[j] -= qty[i]
+
+    # Compared on rescued units (urgent ones doubled) before the tie-breaks.
+    rescued = qty * (1 + URGENT_BONUS * (seconds_left <= URGENT_MINUTES * 60))
+    value = lambda a: (sum(rescued[i] for i in a), sum(weight[i, j] for i, j in a.items()))
+    baseline = first_come(items, ngos, weight)
+    if value(baseline) > value(assigned):
+        assigned = baseline
+    return [(items[i]["food_id"], ngos[j]["ngo_id"]) for i, j in sorted(assigned.items())]
+
+
+def _dicts(cursor):
+    names = [d[0] for d in cursor.description]
+    return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+
+def load_candidates(conn, now):
+    cursor = conn.cursor()
+    cursor.execute(FOOD_SQL, (now,))
+    items = _dicts(cursor)
+    cursor.execute(NGO_SQL)
+    ngos = _dicts(cursor)
+    cursor.execute(PAST_PAIRS_SQL)
+    excluded = set(cursor.fetchall())
+    cursor.close()
+    return items, ngos, excluded
+
+
+def dispatch(conn, matches, now):
+    """File matches as pending requests in one transaction; food claimed meanwhile is skipped.
+
+    Returns the (food_id, ngo_id) pairs actually filed.
+    """
+    if not matches:
+        return []
+    cursor = conn.cursor()
+    conn.start_transaction()
+    try:
+        placeholders = ",".join(["%s"] * len(matches))
+        cursor.execute(f"SELECT food_id FROM food WHERE food_id IN ({placeholders}) AND status = 'available' AND expiry_time > %s FOR UPDATE",
+                       [food_id for food_id, _ in matches] + [now])
+        still_available = {row[0] for row in cursor.fetchall()}
+        filed = [(food_id, ngo_id) for food_id, ngo_id in matches if food_id in still_available]
+        if filed:
+            cursor.executemany("INSERT INTO donation_request (food_id, ngo_id, auto_matched) VALUES (%s, %s, TRUE)", filed)
+            placeholders = ",".join(["%s"] * len(filed))
+            cursor.execute(f"UPDATE food SET status = 'requested' WHERE food_id IN ({placeholders})", [food_id for food_id, _ in filed])
+        conn.commit()
+        return filed
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def run_matching(conn, audit, now=None, dry_run=False):
+    """Load, solve and dispatch one batch; `audit(conn, action, table, record_id)` logs the run.
+
+    Returns a summary dict, or None if another process holds the matching lock.
+    """
+    now = now or datetime.now()
+    cursor = conn.cursor()
+    cursor.execute("SELECT GET_LOCK(%s, 0)", (LOCK_NAME,))
+    if not cursor.fetchone()[0]:
+        cursor.close()
+        return None
+    try:
+        items, ngos, excluded = load_candidates(conn, now)
+        matches = solve(items, ngos, now, excluded)
+        filed = matches if dry_run else dispatch(conn, matches, now)
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+        cursor.fetchall()
+        cursor.close()
+    if filed and not dry_run:
+        audit(conn, f"Auto-matching filed {len(filed)} requests ({len({n for _, n in filed})} NGOs)", "food", filed[0][0])
+    qty = {i["food_id"]: i["quantity"] for i in items}
+    return dict(items=len(items), ngos=len(ngos), matched=len(filed), units=sum(qty[f] for f, _ in filed), ran_at=now)
+
+
+class MatchScheduler(PeriodicWorker):
+    """Runs run_matching every `interval` seconds on a background thread (started lazily per worker).
+
+    Every worker runs one; the named lock lets a single run proceed at a time.
+    """
+    name, failure = "match-scheduler", "AUTO-MATCHING FAILED"
+
+    def __init__(self, pool, audit, interval=300):
+        super().__init__(pool, interval)
+        self.audit = audit
+        self.matched = 0
+
+    def work(self, conn):
+        summary = run_matching(conn, self.audit)
+        if summary is not None:
+            self.last_run = summary
+            self.matched += summary["matched"]
+        return summary
+
+
+if __name__ == "__main__":
+    import app
+    conn = app._connect()
+    summary = run_matching(conn, app.sweeper_audit, dry_run="--dry-run" in sys.argv)
+    app.audit_writer.stop()
+    conn.close()
+    if summary is None:
+        print("Another matching run holds the lock; nothing done.")
+        sys.exit(0)
+    print(f"{summary['matched']} of {summary['items']} item(s) matched across {summary['ngos']} NGO(s), {summary['units']} units.")
@@ -0,0 +1,193 @@
+"""Request / query instrumentation with Prometheus text exposition.
+
+app.py wraps the connection handed out by get_db() in TracedConnection, whose
+cursors time every statement. Each request carries a RequestTrace that adds
+up its statement count and DB time. Statements are keyed by normalized SQL.
+Anything slower than the slow-query threshold is logged with its bound
+parameters redacted to type and length.
+"""
+import bisect
+import json
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from functools import lru_cache
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = LATENCY_BUCKETS
+COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55)
+MAX_STATEMENTS = 500       # distinct normalized statements tracked; the rest share one series
+UNMATCHED = "<unmatched>"   # endpoint label for requests no route matched
+
+slow_log = logging.getLogger("campus.slow_query")
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(sql):
+    """Collapse whitespace, IN-lists and literals so one statement shape is one series."""
+    sql = " ".join(sql.split())
+    sql = re.sub(r"\(\s*%s(?:\s*,\s*%s)+\s*\)", "(%s, ...)", sql)
+    sql = re.sub(r"'(?:[^'\\]|\\.)*'", "?", sql)
+    sql = re.sub(r"\b\d+\b", "?", sql)
+    return sql[:500]
+
+
+def redact(params):
+    if params is None:
+        return []
+    values = list(params.values() if isinstance(params, dict) else params)[:20]
+    return [f"<{type(v).__name__}:{len(v)}>" if isinstance(v, (str, bytes)) else f"<{type(v).__name__}>" for v in values]
+
+
+class Metrics:
+    def __init__(self, slow_query_ms=200):
+        self.slow_query_ms = slow_query_ms
+        self._lock = threading.Lock()
+        self.requests = defaultdict(lambda: Histogram(LATENCY_BUCKETS))      # (endpoint, method)
+        self.statuses = defaultdict(int)                                     # (endpoint, status)
+        self.request_queries = defaultdict(lambda: Histogram(COUNT_BUCKETS))  # endpoint
+        self.request_db_time = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.statements = defaultdict(lambda: Histogram(QUERY_BUCKETS))     # normalized sql
+        self.slow_queries = 0
+
+    def observe_request(self, endpoint, method, status, seconds, trace):
+        endpoint = endpoint or UNMATCHED        # no route matched (404/405): None would not sort against names
+        with self._lock:
+            self.requests[(endpoint, method)].observe(seconds)
+            self.statuses[(endpoint, status)] += 1
+            self.request_queries[endpoint].observe(trace.queries)
+            self.request_db_time[endpoint].observe(trace.db_time)
+
+    def observe_statement(self, sql, params, seconds, trace):
+        key = normalize_sql(sql)
+        with self._lock:
+            if key not in self.statements and len(self.statements) >= MAX_STATEMENTS:
+                key = "other"
+            self.statements[key].observe(seconds)
+            slow = seconds * 1000 >= self.slow_query_ms
+            if slow:
+                self.slow_queries += 1
+        if trace is not None:
+            trace.queries += 1
+            trace.db_time += seconds
+        if slow:
+            slow_log.warning(json.dumps(dict(time=datetime.now().isoformat(timespec="milliseconds"), ms=round(seconds * 1000, 1),
+                                             endpoint=trace.endpoint if trace else None, sql=key, params=redact(params))))
+
+    def render(self, gauges=()):
+        """Prometheus text exposition format; `gauges` is [(name, help, {labels: value})]."""
+        out = []
+
+        def histogram(name, help_text, series, label_names):
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} histogram")
+            for key, h in sorted(series.items()):
+                labels = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(label_names, key if isinstance(key, tuple) else (key,)))
+                cumulative = 0
+                for bound, n in zip(h.buckets, h.counts):
+                    cumulative += n
+                    out.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                out.append(f'{name}_bucket{{{labels},le="+Inf"}} {h.count}')
+                out.append(f"{name}_sum{{{labels}}} {h.total:.6f}")
+                out.append(f"{name}_count{{{labels}}} {h.count}")
+
+        with self._lock:
+            histogram("http_request_duration_seconds", "Request latency by endpoint.", self.requests, ("endpoint", "method"))
+            out.append("# HELP http_responses_total Responses by endpoint and status.")
+            out.append("# TYPE http_responses_total counter")
+            for (endpoint, status), n in sorted(self.statuses.items()):
+                out.append(f'http_responses_total{{endpoint="{_escape(endpoint)}",status="{status}"}} {n}')
+            histogram("request_db_queries", "SQL statements issued per request.", self.request_queries, ("endpoint",))
+            histogram("request_db_seconds", "Cumulative DB time per request.", self.request_db_time, ("endpoint",))
+            histogram("db_statement_duration_seconds", "Statement latency by normalized SQL.", self.statements, ("sql",))
+            out.append("# HELP db_slow_queries_total Statements over the slow-query threshold.")
+            out.append("# TYPE db_slow_queries_total counter")
+            out.append(f"db_slow_queries_total {self.slow_queries}")
+        for name, help_text, values in gauges:
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} gauge")
+            for label, value in sorted(values.items()):
+                out.append(f'{name}{{stat="{label}"}} {value}')
+        return "\n".join(out) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+class RequestTrace:
+    __slots__ = ("endpoint", "start", "queries", "db_time")
+
+    def __init__(self, endpoint):
+        self.endpoint, self.start, self.queries, self.db_time = endpoint, time.perf_counter(), 0, 0.0
+
+
+class TracedCursor:
+    """Cursor proxy timing execute/executemany and the fetches that follow them."""
+    def __init__(self, cursor, metrics, trace):
+        self._cursor, self._metrics, self._trace = cursor, metrics, trace
+
+    def _timed(self, method, sql, params, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(sql, params, *args, **kwargs)
+        finally:
+            self._metrics.observe_statement(sql, params, time.perf_counter() - start, self._trace)
+
+    def execute(self, sql, params=None, *args, **kwargs):
+        return self._timed(self._cursor.execute, sql, params, *args, **kwargs)
+
+    def executemany(self, sql, seq_params, *args, **kwargs):
+        return self._timed(self._cursor.executemany, sql, seq_params, *args, **kwargs)
+
+    def _fetch(self, method, *args):
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            if self._trace is not None:
+                self._trace.db_time += time.perf_counter() - start
+
+    def fetchone(self):
+        return self._fetch(self._cursor.fetchone)
+
+    def fetchmany(self, *args):
+        return self._fetch(self._cursor.fetchmany, *args)
+
+    def fetchall(self):
+        return self._fetch(self._cursor.fetchall)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class TracedConnection:
+    def __init__(self, conn, metrics, trace):
+        self.raw, self._metrics, self._trace = conn, metrics, trace
+
+    def cursor(self, *args, **kwargs):
+        return TracedCursor(self.raw.cursor(*args, **kwargs), self._metrics, self._trace)
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
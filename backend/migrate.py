@@ -0,0 +1,91 @@
+"""Versioned schema migrations.
+
+db/campus_food_waste_schema.sql is version 0; every db/migrations/NNN_*.sql
+file after it is applied once, in order, and recorded in schema_migrations.
+A migration listed in POST_STEPS is followed by a Python step for repairs
+SQL cannot express.
+
+    python backend/migrate.py            # apply pending migrations
+    python backend/migrate.py --status   # list applied / pending versions
+"""
+import os
+import re
+import sys
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SCHEMA_FILE = os.path.join(BASE_DIR, "db", "campus_food_waste_schema.sql")
+MIGRATIONS_DIR = os.path.join(BASE_DIR, "db", "migrations")
+
+
+def split_sql(text):
+    """Split a .sql script into statements (drops `--` comment lines, splits on `;` at line end)."""
+    lines = [ln for ln in text.splitlines() if not ln.strip().startswith("--")]
+    return [stmt.strip() for stmt in re.split(r";\s*$", "\n".join(lines), flags=re.M) if stmt.strip()]
+
+
+def run_sql_file(conn, path, db_name=None):
+    """Execute every statement of `path`; `db_name` retargets the schema file's DROP/CREATE/USE lines."""
+    with open(path, encoding="utf-8") as fh:
+        text = fh.read()
+    if db_name:
+        text = re.sub(r"^(DROP DATABASE IF EXISTS|CREATE DATABASE|USE)\s+campus_food_waste\b", rf"\1 {db_name}", text, flags=re.M)
+    cursor = conn.cursor()
+    for stmt in split_sql(text):
+        cursor.execute(stmt)
+    cursor.close()
+
+
+def _reconcile_counters(conn):
+    from counters import reconcile
+    reconcile(conn)
+
+
+# version: step run right after that migration's SQL.
+# 003 deletes duplicate donation requests, which the counter triggers only partly see.
+POST_STEPS = {3: _reconcile_counters}
+
+
+def available_migrations():
+    found = []
+    for name in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = re.match(r"(\d+)_.*\.sql$", name)
+        if match:
+            found.append((int(match.group(1)), os.path.join(MIGRATIONS_DIR, name)))
+    return found
+
+
+def applied_versions(conn):
+    cursor = conn.cursor()
+    cursor.execute("CREATE TABLE IF NOT EXISTS schema_migrations (version INT PRIMARY KEY, name VARCHAR(255) NOT NULL, applied_at DATETIME DEFAULT CURRENT_TIMESTAMP)")
+    cursor.execute("SELECT version FROM schema_migrations")
+    versions = {row[0] for row in cursor.fetchall()}
+    cursor.close()
+    return versions
+
+
+def apply_migrations(conn):
+    done, applied = applied_versions(conn), []
+    for version, path in available_migrations():
+        if version in done:
+            continue
+        run_sql_file(conn, path)
+        if version in POST_STEPS:
+            POST_STEPS[version](conn)
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, os.path.basename(path)))
+        cursor.close()
+        applied.append(version)
+    return applied
+
+
+if __name__ == "__main__":
+    from app import _connect
+    conn = _connect()
+    if "--status" in sys.argv:
+        done = applied_versions(conn)
+        for version, path in available_migrations():
+            print(f"{'applied' if version in done else 'pending'}  {os.path.basename(path)}")
+    else:
+        applied = apply_migrations(conn)
+        print(f"Applied migrations: {applied}" if applied else "Schema is up to date.")
+    conn.close()
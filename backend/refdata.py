@@ -0,0 +1,39 @@
+"""TTL cache for rarely-changing lookup tables (roles, canteens, NGOs)."""
+import threading
+
+from cachetools import TTLCache
+
+
+class RefDataCache:
+    def __init__(self, maxsize=256, ttl=300):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key, load):
+        """Return the cached value for `key`, calling `load()` on a miss."""
+        with self._lock:
+            try:
+                value = self._cache[key]
+                self.hits += 1
+                return value
+            except KeyError:
+                self.misses += 1
+        value = load()
+        with self._lock:
+            self._cache[key] = value
+        return value
+
+    def invalidate(self, *kinds):
+        """Drop entries whose key starts with one of `kinds`, or everything if none are given."""
+        with self._lock:
+            if not kinds:
+                self._cache.clear()
+                return
+            for key in [k for k in self._cache if k[0] in kinds]:
+                self._cache.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return dict(hits=self.hits, misses=self.misses, size=len(self._cache),
+                        maxsize=self._cache.maxsize, ttl=self._cache.ttl)
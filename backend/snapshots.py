@@ -0,0 +1,33 @@
+"""File helpers shared by the Parquet stores (analytics snapshots, the retention archive).
+
+Each store keeps a state.json beside its data. Writes go to a .tmp file first
+and are renamed into place, so a reader never sees a half-written file.
+"""
+import json
+import os
+
+
+def state_path(directory):
+    return os.path.join(directory, "state.json")
+
+
+def read_state(directory):
+    try:
+        with open(state_path(directory), encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_state(directory, state):
+    tmp = state_path(directory) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(state, fh)
+    os.replace(tmp, state_path(directory))
+
+
+def write_parquet(df, path, compression="snappy"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    df.to_parquet(tmp, index=False, compression=compression)
+    os.replace(tmp, path)
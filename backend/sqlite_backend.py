@@ -0,0 +1,279 @@
+"""Embedded SQLite storage backend (DB_BACKEND=sqlite): one WAL-mode database file.
+
+connect() returns a connection shaped like the mysql.connector one the rest of
+the app was written against (cursor(dictionary=, buffered=), start_transaction,
+in_transaction, commit/rollback, ping, multi-statement execute + nextset), so
+get_db, the pool and every module run unchanged. The file is created from
+db/sqlite/campus_food_waste_schema.sql (schema, migrations 001-007 and seed
+data) the first time it is opened.
+
+Statements are written for MySQL; translate() rewrites the few expressions
+SQLite spells differently, and NOW()/GET_LOCK()/RELEASE_LOCK() are provided as
+SQL functions. sqlite3 errors are re-raised as the mysql.connector errors the
+app already handles (1062 duplicate key, 1205 lock wait, ...).
+"""
+import contextlib
+import functools
+import itertools
+import os
+import re
+import sqlite3
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+
+from mysql.connector import errors
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SCHEMA_FILE = os.path.join(BASE_DIR, "db", "sqlite", "campus_food_waste_schema.sql")
+
+BUSY_TIMEOUT = 10               # seconds a writer waits for the write lock before failing with errno 1205
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",            # readers never block the writer, nor the writer readers
+    "PRAGMA synchronous = NORMAL",          # fsync at checkpoints only; safe in WAL mode, may lose the last commits on power loss
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA cache_size = -65536",           # 64 MiB page cache per connection
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA mmap_size = 268435456",         # read pages through a 256 MiB memory map instead of read() calls
+)
+
+# Conflict target for ON DUPLICATE KEY UPDATE, which SQLite's upsert has to name.
+UPSERT_KEYS = {"dashboard_counter": "scope, scope_id, name"}
+
+# Stored as ISO text to the second (like MySQL DATETIME), which sorts and compares like the values it stands for.
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" ", "seconds"))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_converter("DATETIME", lambda raw: datetime.fromisoformat(raw.decode()))
+sqlite3.register_converter("DECIMAL", lambda raw: Decimal(raw.decode()))
+
+_REWRITES = [
+    (re.compile(r"\s+FOR UPDATE\b", re.I), ""),                 # BEGIN IMMEDIATE already holds the write lock
+    (re.compile(r"\bINSERT IGNORE\b", re.I), "INSERT OR IGNORE"),
+    (re.compile(r"\bIF\(", re.I), "IIF("),
+    (re.compile(r"\bLAST_INSERT_ID\(\)", re.I), "last_insert_rowid()"),
+    (re.compile(r"\bROW_COUNT\(\)", re.I), "changes()"),
+    (re.compile(r"^START TRANSACTION WITH CONSISTENT SNAPSHOT$", re.I), "BEGIN"),
+    (re.compile(r"^START TRANSACTION$", re.I), "BEGIN IMMEDIATE"),
+    (re.compile(r"^ANALYZE TABLE\b", re.I), "ANALYZE"),
+]
+
+
+def _upsert(sql):
+    head, update = re.split(r"\bON DUPLICATE KEY UPDATE\b", sql, flags=re.I)
+    table = re.search(r"\bINTO\s+(\w+)", head, re.I).group(1)
+    if re.search(r"\bSELECT\b", head, re.I) and not re.search(r"\bWHERE\b", head, re.I):
+        head += " WHERE true"               # otherwise SQLite parses ON CONFLICT as a join constraint
+    update = re.sub(r"\bVALUES\((\w+)\)", r"excluded.\1", update)
+    return f"{head.rstrip()} ON CONFLICT({UPSERT_KEYS[table]}) DO UPDATE SET {update.strip()}"
+
+
+@functools.lru_cache(maxsize=1024)
+def translate(sql):
+    """MySQL statement text -> [(SQLite statement, number of parameters), ...].
+
+    execute_batch's multi-statement batches (joined with ";\\n") come back split.
+    """
+    out = []
+    for stmt in re.split(r";\s*\n", sql.strip().rstrip(";")):
+        stmt = stmt.strip()
+        if not stmt:
+            continue
+        if re.search(r"\bON DUPLICATE KEY UPDATE\b", stmt, re.I):
+            stmt = _upsert(stmt)
+        for pattern, replacement in _REWRITES:
+            stmt = pattern.sub(replacement, stmt)
+        out.append((stmt.replace("%s", "?"), stmt.count("%s")))
+    return out
+
+
+# SQLite extended result code -> MySQL errno
+_ERRNOS = {2067: 1062, 1555: 1062, 787: 1452, 275: 3819, 1299: 1048, 5: 1205, 6: 1205, 517: 1205}
+
+
+@contextlib.contextmanager
+def _errors():
+    try:
+        yield
+    except sqlite3.IntegrityError as e:
+        raise errors.IntegrityError(msg=str(e), errno=_ERRNOS.get(getattr(e, "sqlite_errorcode", 0))) from e
+    except sqlite3.OperationalError as e:
+        code = getattr(e, "sqlite_errorcode", 0)
+        if code & 0xff in (5, 6):
+            # Not OperationalError: close_db would throw away a perfectly good connection.
+            raise errors.DatabaseError(msg=str(e), errno=1205) from e
+        if code == 1:
+            raise errors.ProgrammingError(msg=str(e), errno=1064) from e
+        raise errors.OperationalError(msg=str(e), errno=code or None) from e
+    except sqlite3.ProgrammingError as e:
+        cls = errors.OperationalError if "closed" in str(e) else errors.ProgrammingError
+        raise cls(msg=str(e)) from e
+    except sqlite3.Error as e:
+        raise errors.DatabaseError(msg=str(e), errno=getattr(e, "sqlite_errorcode", None)) from e
+
+
+# GET_LOCK/RELEASE_LOCK: named locks held by a connection, within this process.
+_named_locks, _named_locks_guard = {}, threading.Lock()
+
+
+def _get_lock(owner, name, timeout):
+    with _named_locks_guard:
+        return int(_named_locks.setdefault(name, owner) == owner)
+
+
+def _release_lock(owner, name):
+    with _named_locks_guard:
+        if _named_locks.get(name) != owner:
+            return 0
+        del _named_locks[name]
+        return 1
+
+
+def _release_all_locks(owner):
+    with _named_locks_guard:
+        for name in [n for n, o in _named_locks.items() if o == owner]:
+            del _named_locks[name]
+
+
+class Cursor:
+    """Results are fetched eagerly, like a buffered MySQL cursor; buffered=False streams
+    a single SELECT (used by the exports), which holds a read snapshot until closed."""
+    def __init__(self, conn, dictionary=False, buffered=True):
+        self._conn, self._dictionary, self._buffered = conn, dictionary, buffered
+        self._cursor = conn.raw.cursor()
+        self._sets, self._rows = [], iter(())
+        self.description, self.rowcount, self.lastrowid = None, -1, None
+
+    def execute(self, sql, params=None):
+        statements, params = translate(sql), tuple(params or ())
+        buffered = self._buffered or len(statements) > 1
+        sets, pos = [], 0
+        with _errors():
+            for stmt, n in statements:
+                self._cursor.execute(stmt, params[pos:pos + n])
+                pos += n
+                rows = self._cursor if not buffered else self._cursor.fetchall() if self._cursor.description else []
+                sets.append((self._cursor.description, rows, self._cursor.rowcount, self._cursor.lastrowid))
+        self._sets = sets
+        self.nextset()
+
+    def executemany(self, sql, seq_params):
+        (stmt, _), = translate(sql)
+        with _errors():
+            self._cursor.executemany(stmt, seq_params)
+            self.description, self._rows, self.rowcount = None, iter(()), self._cursor.rowcount
+            if stmt.lstrip()[:6].upper() == "INSERT" and self.rowcount > 0:
+                # Like MySQL: the id of the first row inserted.
+                self.lastrowid = self._conn.raw.execute("SELECT last_insert_rowid()").fetchone()[0] - self.rowcount + 1
+
+    def nextset(self):
+        if not self._sets:
+            return None
+        self.description, rows, self.rowcount, self.lastrowid = self._sets.pop(0)
+        self._rows = iter(rows)
+        return True
+
+    @property
+    def with_rows(self):
+        return self.description is not None
+
+    @property
+    def column_names(self):
+        return tuple(d[0] for d in self.description or ())
+
+    def _row(self, row):
+        return dict(zip(self.column_names, row)) if self._dictionary and row is not None else row
+
+    def fetchone(self):
+        with _errors():
+            return self._row(next(self._rows, None))
+
+    def fetchmany(self, size=1):
+        with _errors():
+            return [self._row(r) for r in itertools.islice(self._rows, size)]
+
+    def fetchall(self):
+        with _errors():
+            return [self._row(r) for r in self._rows]
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._sets, self._rows = [], iter(())
+        self._cursor.close()
+
+
+class Connection:
+    def __init__(self, raw):
+        self.raw = raw
+        raw.create_function("NOW", 0, lambda: datetime.now().isoformat(" ", "seconds"))
+        raw.create_function("GET_LOCK", 2, functools.partial(_get_lock, id(self)))
+        raw.create_function("RELEASE_LOCK", 1, functools.partial(_release_lock, id(self)))
+
+    def cursor(self, dictionary=False, buffered=None, **kwargs):
+        return Cursor(self, dictionary, buffered is not False)
+
+    def start_transaction(self, consistent_snapshot=False, **kwargs):
+        # IMMEDIATE takes the write lock up front: the transactions in app.py read
+        # (SELECT ... FOR UPDATE) before they write, and a deferred transaction
+        # could not upgrade to a writer once another connection had committed.
+        with _errors():
+            self.raw.execute("BEGIN" if consistent_snapshot else "BEGIN IMMEDIATE")
+
+    @property
+    def in_transaction(self):
+        return self.raw.in_transaction
+
+    def commit(self):
+        with _errors():
+            self.raw.commit()
+
+    def rollback(self):
+        with _errors():
+            self.raw.rollback()
+
+    def ping(self, reconnect=False):
+        with _errors():
+            self.raw.execute("SELECT 1").fetchone()
+
+    def close(self):
+        _release_all_locks(id(self))
+        self.raw.close()
+
+
+def _statements(script):
+    buffer = ""
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            yield buffer.strip()
+            buffer = ""
+
+
+def _ensure_schema(raw):
+    if raw.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_migrations'").fetchone():
+        return
+    raw.execute("BEGIN IMMEDIATE")          # serializes workers racing to create the same file
+    try:
+        if not raw.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_migrations'").fetchone():
+            with open(SCHEMA_FILE, encoding="utf-8") as fh:
+                for stmt in _statements(fh.read()):
+                    raw.execute(stmt)
+        raw.execute("COMMIT")
+    except Exception:
+        raw.execute("ROLLBACK")
+        raise
+
+
+def connect(path, timeout=BUSY_TIMEOUT):
+    """Open (creating and seeding it if needed) the database at `path` in autocommit mode."""
+    if path != ":memory:":
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with _errors():
+        raw = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False,
+                              detect_types=sqlite3.PARSE_DECLTYPES)
+        for pragma in PRAGMAS:
+            raw.execute(pragma)
+        _ensure_schema(raw)
+    return Connection(raw)
@@ -0,0 +1,126 @@
+"""Concurrency stress check for the inventory write paths.
+
+Creates a scratch database, then hammers a single food item from many
+threads through the real routes:
+
+  * waste: every thread files 1-unit waste reports against the same item;
+    the final quantity must equal the start quantity minus accepted reports.
+  * pickup: every NGO thread requests the same item at once; each NGO must
+    end up with exactly one donation_request.
+
+    python backend/stress_inventory.py [--threads 32] [--quantity 1000] [--db campus_food_waste_stress] [--backend mysql|sqlite] [--keep]
+
+Exits non-zero if any invariant is violated.
+"""
+import argparse
+import sys
+import threading
+from datetime import datetime, timedelta
+
+import app as webapp
+from check_query_plans import build_scratch_db, drop_scratch_db, use_scratch_db
+
+
+def _client(role, user_id, ref_id):
+    client = webapp.app.test_client()
+    with client.session_transaction() as s:
+        s.update(user_id=user_id, username=f"stress_{user_id}", role=role, ref_id=ref_id)
+    return client
+
+
+def _post(client, path, data):
+    # The routes answer 302 (or 200 with a flash) for handled outcomes; anything else is a failure.
+    response = client.post(path, data=data)
+    if response.status_code not in (200, 302):
+        raise AssertionError(f"POST {path} -> {response.status_code}")
+    return response
+
+
+def _hammer(threads, fn):
+    barrier, errors = threading.Barrier(threads), []
+
+    def run(i):
+        barrier.wait()
+        try:
+            fn(i)
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=run, args=(i,)) for i in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return errors
+
+
+def stress_waste(conn, threads, quantity, reports_per_thread):
+    cur = conn.cursor()
+    cur.execute("INSERT INTO food (canteen_id, item_name, category, quantity, unit, expiry_time) VALUES (1, 'Stress Rice', 'Vegetarian', %s, 'plates', %s)",
+                (quantity, datetime.now() + timedelta(hours=6)))
+    food_id = cur.lastrowid
+
+    def worker(_):
+        client = _client("canteen", 2, 1)
+        for _ in range(reports_per_thread):
+            _post(client, "/canteen/file_waste_report", dict(food_id=food_id, reason="spoilage", quantity_wasted=1))
+
+    errors = _hammer(threads, worker)
+    cur.execute("SELECT quantity FROM food WHERE food_id = %s", (food_id,))
+    row = cur.fetchone()
+    cur.execute("SELECT COUNT(*), COALESCE(SUM(quantity_wasted), 0) FROM waste_report WHERE food_id = %s", (food_id,))
+    reports, wasted = cur.fetchone()
+    cur.close()
+    final = row[0] if row else 0
+    # A fully wasted item is deleted together with its reports, so only check the ledger while it still exists.
+    ok = not errors and (row is None or final + wasted == quantity) and final >= 0
+    print(f"waste:  start={quantity} final={final if row else 'removed'} reports={reports} wasted={wasted} errors={len(errors)} -> {'ok' if ok else 'FAIL'}")
+    return ok
+
+
+def stress_pickup(conn, threads):
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) FROM ngo")
+    ngos = min(threads, cur.fetchone()[0])
+    cur.execute("INSERT INTO food (canteen_id, item_name, category, quantity, unit, expiry_time) VALUES (1, 'Stress Thali', 'Vegetarian', 10, 'plates', %s)",
+                (datetime.now() + timedelta(hours=6),))
+    food_id = cur.lastrowid
+
+    def worker(i):
+        client = _client("ngo", 5, i % ngos + 1)
+        for _ in range(3):      # repeat requests must be rejected by uq_dr_food_ngo
+            _post(client, "/ngo/request", dict(food_id=food_id))
+
+    errors = _hammer(threads, worker)
+    cur.execute("SELECT ngo_id, COUNT(*) FROM donation_request WHERE food_id = %s GROUP BY ngo_id", (food_id,))
+    per_ngo = dict(cur.fetchall())
+    cur.execute("SELECT status FROM food WHERE food_id = %s", (food_id,))
+    status = cur.fetchone()[0]
+    cur.close()
+    ok = not errors and len(per_ngo) == ngos and all(n == 1 for n in per_ngo.values()) and status == "requested"
+    print(f"pickup: ngos={ngos} requests={sum(per_ngo.values())} food_status={status} errors={len(errors)} -> {'ok' if ok else 'FAIL'}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--quantity", type=int, default=1000)
+    parser.add_argument("--reports-per-thread", type=int, default=20)
+    parser.add_argument("--db", default="campus_food_waste_stress")
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default=webapp.DB_BACKEND)
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    conn = build_scratch_db(args.db, scale=0.01, backend=args.backend)
+    use_scratch_db(args.db, args.backend)
+    try:
+        ok = stress_waste(conn, args.threads, args.quantity, args.reports_per_thread)
+        ok = stress_pickup(conn, args.threads) and ok
+    finally:
+        webapp.audit_writer.stop()
+        webapp.expiry_sweeper.stop()
+        if not args.keep:
+            drop_scratch_db(conn, args.db, args.backend)
+        conn.close()
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,51 @@
+"""Fixtures for the route and transaction tests: every test gets a fresh SQLite
+database (DB_BACKEND=sqlite, seeded like db/campus_food_waste_schema.sql)."""
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DB_BACKEND"] = "sqlite"             # app.py picks its backend (and replicas) at import
+
+import app as webapp  # noqa: E402
+from leaderboard import rebuild_counters  # noqa: E402
+
+USERS = {"admin": ("admin1", "admin@123"), "canteen": ("canteen_central", "canteen@123"),
+         "canteen_hostel": ("canteen_hostel", "canteen@123"), "ngo": ("ngo_feedinghands", "ngo@123"),
+         "ngo_greenplate": ("ngo_greenplate", "ngo@123"), "ngo_helpinghearts": ("ngo_helpinghearts", "ngo@123")}
+
+
+@pytest.fixture
+def campus(tmp_path):
+    """app.py rebuilt on an empty database file under tmp_path, background jobs off."""
+    webapp.db_pool.dispose()
+    webapp.create_app(dict(TESTING=True, SQLITE_PATH=str(tmp_path / "campus.sqlite3"), AUDIT_ASYNC=False,
+                           ANALYTICS_DIR=str(tmp_path / "analytics"), ARCHIVE_DIR=str(tmp_path / "archive"),
+                           FORECAST_PATH=str(tmp_path / "forecast" / "model.joblib"),
+                           FOOD_EVENTS_ENABLED=False, MATCH_ENABLED=False, ARCHIVE_ENABLED=False, FORECAST_ENABLED=False))
+    webapp.expiry_sweeper.stop()
+    conn = webapp.sqlite_backend.connect(webapp.SQLITE_PATH)        # creates the schema and seed rows
+    rebuild_counters(conn)                                           # the seed leaves the leaderboard at zero
+    conn.close()
+    yield webapp
+    webapp.shutdown()
+
+
+@pytest.fixture
+def db(campus):
+    """A plain sqlite3 connection for asserting on what the routes wrote."""
+    conn = sqlite3.connect(campus.SQLITE_PATH, isolation_level=None)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def login(campus):
+    def login(who):
+        client = campus.app.test_client()
+        username, password = USERS[who]
+        assert client.post("/login", data=dict(username=username, password=password)).status_code == 302
+        return client
+    return login
@@ -0,0 +1,87 @@
+import io
+import json
+from datetime import datetime, timedelta
+
+from leaderboard import rebuild_counters
+
+
+def leaderboard_total(db, canteen_id):
+    return db.execute("SELECT total_items FROM leaderboard WHERE canteen_id = ?", (canteen_id,)).fetchone()[0]
+
+
+def quantity(db, food_id):
+    row = db.execute("SELECT quantity FROM food WHERE food_id = ?", (food_id,)).fetchone()
+    return row and row[0]
+
+
+def upload(client, name, body):
+    return client.post("/canteen/bulk_add_food", data={"file": (io.BytesIO(body.encode()), name)},
+                       content_type="multipart/form-data", follow_redirects=True)
+
+
+def test_bulk_upload_inserts_valid_rows_and_reports_the_rest(login, db):
+    expiry = (datetime.now() + timedelta(hours=4)).strftime("%Y-%m-%d %H:%M")
+    before = leaderboard_total(db, 1)
+    body = ("item_name,category,quantity,unit,expiry_time,notes\n"
+            f"Lemon Rice,Vegetarian,12,plates,{expiry},\n"
+            f"Tea,Beverage,8,cups,{expiry},hot\n"
+            f"Stale Bread,Bakery,3,pieces,2020-01-01 10:00,\n"
+            f"Mystery,Soup,1,bowls,{expiry},\n")
+
+    response = upload(login("canteen"), "menu.csv", body)
+
+    assert b"2 item(s) added, 2 rejected." in response.data
+    assert b"expiry_time is already in the past" in response.data
+    assert b"category must be one of" in response.data
+    rows = db.execute("SELECT item_name, canteen_id, quantity, status FROM food WHERE item_name IN ('Lemon Rice', 'Tea', 'Stale Bread')").fetchall()
+    assert sorted(rows) == [("Lemon Rice", 1, 12, "available"), ("Tea", 1, 8, "available")]
+    assert leaderboard_total(db, 1) == before + 20
+
+
+def test_bulk_upload_of_json_lines(login, db):
+    expiry = (datetime.now() + timedelta(hours=2)).isoformat(timespec="minutes")
+    body = "\n".join(json.dumps(dict(item_name=f"Wrap {i}", category="Other", quantity=i, expiry_time=expiry)) for i in (1, 2, 3))
+
+    response = upload(login("canteen"), "menu.jsonl", body + "\nnot json\n")
+
+    assert b"3 item(s) added, 1 rejected." in response.data
+    assert db.execute("SELECT COUNT(*), SUM(quantity) FROM food WHERE item_name LIKE 'Wrap %'").fetchone() == (3, 6)
+
+
+def test_unreadable_upload_adds_nothing(login, db):
+    count = db.execute("SELECT COUNT(*) FROM food").fetchone()[0]
+
+    response = upload(login("canteen"), "menu.json", '{"item_name": "not a list"}')
+
+    assert b"JSON upload must be an array of items." in response.data
+    assert db.execute("SELECT COUNT(*) FROM food").fetchone()[0] == count
+
+
+def test_partial_waste_decrements_and_full_waste_removes(campus, login, db):
+    canteen = login("canteen")
+    before = leaderboard_total(db, 1)
+
+    canteen.post("/canteen/file_waste_report", data=dict(food_id=9, reason="spoilage", quantity_wasted="20"))
+    assert quantity(db, 9) == 30
+
+    response = canteen.post("/canteen/file_waste_report", data=dict(food_id=9, reason="spoilage", quantity_wasted="31"),
+                            follow_redirects=True)
+    assert b"Cannot report more waste than available quantity." in response.data
+    assert quantity(db, 9) == 30
+
+    canteen.post("/canteen/file_waste_report", data=dict(food_id=9, reason="over_preparation", quantity_wasted="30"))
+    assert quantity(db, 9) is None
+    assert db.execute("SELECT COUNT(*), SUM(quantity_wasted) FROM waste_report WHERE food_id = 9").fetchone() == (0, None)
+    # The food row is gone, and with it (cascaded) its reports and its 50 units on the leaderboard.
+    assert leaderboard_total(db, 1) == before - 50
+    conn = campus.sqlite_backend.connect(campus.SQLITE_PATH)
+    assert rebuild_counters(conn, dry_run=True) == []
+    conn.close()
+
+
+def test_waste_of_another_canteens_food_is_refused(login, db):
+    response = login("canteen").post("/canteen/file_waste_report", data=dict(food_id=13, reason="spoilage", quantity_wasted="1"),
+                                     follow_redirects=True)
+
+    assert b"Food item not found." in response.data
+    assert quantity(db, 13) == 20
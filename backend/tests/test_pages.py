@@ -0,0 +1,76 @@
+import html
+import re
+from datetime import datetime, timedelta
+
+ACTOR = 9           # student_kavya: no other audit rows are written for this user
+
+
+def seed_audit_rows(db, n=120):
+    """n audit rows for ACTOR, three per timestamp so pages have to break ties on log_id."""
+    base = datetime.now().replace(microsecond=0) - timedelta(days=1)
+    db.executemany("INSERT INTO audit_log (action, table_name, record_id, performed_by, event_time) VALUES (?, ?, ?, ?, ?)",
+                   [(f"row {i}", "food", i, ACTOR, (base - timedelta(minutes=i // 3)).isoformat(" ")) for i in range(n)])
+    return [r[0] for r in db.execute("SELECT log_id FROM audit_log WHERE performed_by = ? ORDER BY event_time DESC, log_id DESC", (ACTOR,))]
+
+
+def page(client, url):
+    body = client.get(url).data.decode()
+    ids = [int(i) for i in re.findall(r"<tr>\s*<td>(\d+)", body)]
+    links = {label: html.unescape(href) for href, label in re.findall(r'<a href="([^"]+)"[^>]*>(?:<i [^>]*></i> )?(Newer|Older)', body)}
+    return ids, links.get("Older"), links.get("Newer")
+
+
+def test_keyset_pages_cover_every_row_once_in_both_directions(login, db):
+    expected = seed_audit_rows(db)
+    admin = login("admin")
+
+    pages, url, newer = [], f"/admin/view_logs?actor={ACTOR}&size=50", None
+    while url:
+        ids, url, newer = page(admin, url)
+        pages.append(ids)
+    assert [len(p) for p in pages] == [50, 50, 20]
+    assert sum(pages, []) == expected
+
+    back = []
+    while newer:
+        ids, _, newer = page(admin, newer)
+        back.append(ids)
+    assert back == [pages[1], pages[0]]
+
+
+def test_keyset_page_honours_the_day_range(login, db):
+    expected = seed_audit_rows(db)
+    day = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+    in_range = [r[0] for r in db.execute("SELECT log_id FROM audit_log WHERE performed_by = ? AND date(event_time) = ? "
+                                         "ORDER BY event_time DESC, log_id DESC", (ACTOR, day))]
+
+    ids, _, _ = page(login("admin"), f"/admin/view_logs?actor={ACTOR}&size=500&from={day}&to={day}")
+
+    assert ids == in_range and set(ids) <= set(expected)
+
+
+def test_food_list_revalidates_with_etag_until_food_changes(login):
+    ngo, canteen = login("ngo"), login("canteen")
+    first = ngo.get("/ngo/food_list")
+    etag = first.headers["ETag"]
+
+    assert ngo.get("/ngo/food_list", headers={"If-None-Match": etag}).status_code == 304
+    assert ngo.get("/ngo/food_list?category=Bakery", headers={"If-None-Match": etag}).status_code == 200
+
+    expiry = (datetime.now() + timedelta(hours=3)).strftime("%Y-%m-%dT%H:%M")
+    canteen.post("/canteen/add_food", data=dict(item_name="Upma", category="Vegetarian", quantity="9", unit="plates", expiry_time=expiry))
+    changed = ngo.get("/ngo/food_list", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+    assert b"Upma" in changed.data
+
+
+def test_leaderboard_etag_follows_the_ranking(login):
+    canteen = login("canteen")
+    etag = canteen.get("/canteen/leaderboard").headers["ETag"]
+
+    assert canteen.get("/canteen/leaderboard", headers={"If-None-Match": etag}).status_code == 304
+
+    expiry = (datetime.now() + timedelta(hours=3)).strftime("%Y-%m-%dT%H:%M")
+    canteen.post("/canteen/add_food", data=dict(item_name="Upma", category="Vegetarian", quantity="9", unit="plates", expiry_time=expiry))
+    canteen.get("/canteen/dashboard")                        # shows (and so clears) the flash message
+    assert canteen.get("/canteen/leaderboard", headers={"If-None-Match": etag}).status_code == 200
@@ -0,0 +1,24 @@
+import check_query_plans as plans
+
+
+def test_every_runtime_sql_call_site_is_accounted_for():
+    _, dynamic = plans.extract_statements()
+    dynamic_sites = {where for where, _ in dynamic}
+
+    assert plans.unresolved(dynamic) == []
+    assert set(plans.RENDERERS) <= dynamic_sites
+    assert set(plans.PASS_THROUGH) <= dynamic_sites
+
+
+def test_renderers_reach_their_sql_on_sqlite(campus, tmp_path, monkeypatch):
+    monkeypatch.setattr(plans, "scratch_path", lambda db_name: str(tmp_path / f"{db_name}.sqlite3"))
+    conn = plans.build_scratch_db("plancheck", 0.05, backend="sqlite")
+    try:
+        plans.use_scratch_db("plancheck", "sqlite")
+        plans.configure_app(str(tmp_path))
+        rendered = plans.render_statements(conn, str(tmp_path))
+    finally:
+        conn.close()
+
+    assert set(plans.RENDERERS) <= {where for where, _, _ in rendered}
+    assert all(sql.split(" ", 1)[0].upper() in ("SELECT", "UPDATE", "DELETE") for _, sql, _ in rendered)
@@ -0,0 +1,31 @@
+import pytest
+
+PRIMARY_ONLY = None
+
+
+@pytest.fixture
+def replica(campus, monkeypatch):
+    """A stand-in replica that replica_router always picks."""
+    chosen = object()
+    monkeypatch.setattr(campus.replica_router, "choose", lambda: chosen)
+    return chosen
+
+
+def test_reads_go_to_the_replica_until_the_session_writes(campus, replica):
+    with campus.app.test_request_context("/"):
+        assert campus.read_replica() is replica
+        campus.session["_wrote_at"] = campus.time.time()
+        assert campus.read_replica() is PRIMARY_ONLY
+        campus.session["_wrote_at"] = campus.time.time() - campus.DB_STICKY_SECONDS - 1
+        assert campus.read_replica() is replica
+
+
+def test_exports_route_through_read_your_writes(campus, login, monkeypatch):
+    admin = login("admin")
+    calls = []
+    monkeypatch.setattr(campus, "read_replica", lambda: calls.append(1))
+
+    response = admin.get("/admin/export/waste_report?format=csv")
+
+    assert response.status_code == 200 and calls == [1]
+    assert response.data.decode().splitlines()[0].startswith("report_id")
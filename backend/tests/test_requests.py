@@ -0,0 +1,88 @@
+import threading
+
+from counters import reconcile
+from leaderboard import rebuild_counters
+
+
+def status(db, request_id):
+    return db.execute("SELECT status FROM donation_request WHERE request_id = ?", (request_id,)).fetchone()[0]
+
+
+def food_status(db, food_id):
+    return db.execute("SELECT status FROM food WHERE food_id = ?", (food_id,)).fetchone()[0]
+
+
+def request_food(client, db, food_id, ngo_id):
+    client.post("/ngo/request", data=dict(food_id=food_id))
+    return db.execute("SELECT request_id FROM donation_request WHERE food_id = ? AND ngo_id = ?", (food_id, ngo_id)).fetchone()[0]
+
+
+def test_approve_keeps_earliest_selected_request_and_rejects_competitors(login, db):
+    # Idli Sambar (food 2, Central canteen) already has Green Plate's pending request 2.
+    first = request_food(login("ngo"), db, 2, 1)
+    second = request_food(login("ngo_helpinghearts"), db, 2, 3)
+
+    response = login("canteen").post("/canteen/manage_requests", data=dict(action="approve", request_ids=[second, first]),
+                                      follow_redirects=True)
+
+    assert (status(db, first), status(db, second), status(db, 2)) == ("approved", "rejected", "rejected")
+    assert food_status(db, 2) == "approved"
+    assert b"2 competing request(s) for the same food were rejected." in response.data
+
+
+def test_reject_frees_the_food_once_no_request_is_left(login, db):
+    request_id = request_food(login("ngo"), db, 13, 1)          # Veg Pulao, Hostel Food Court
+    assert food_status(db, 13) == "requested"
+
+    login("canteen_hostel").post("/canteen/manage_requests", data=dict(action="reject", request_ids=[request_id]))
+
+    assert status(db, request_id) == "rejected"
+    assert food_status(db, 13) == "available"
+
+
+def test_requests_of_another_canteen_are_skipped(login, db):
+    request_id = request_food(login("ngo"), db, 13, 1)
+
+    response = login("canteen").post("/canteen/manage_requests", data=dict(action="approve", request_ids=[request_id]),
+                                     follow_redirects=True)
+
+    assert status(db, request_id) == "pending"
+    assert b"0 request(s) approved." in response.data
+
+
+def test_concurrent_approvals_for_the_same_food_approve_one(campus, login, db):
+    ngo, other = login("ngo"), login("ngo_greenplate")
+    request_ids = [request_food(ngo, db, 13, 1), request_food(other, db, 13, 2)]
+    results, barrier = {}, threading.Barrier(2)
+
+    def approve(request_id):
+        conn = campus.sqlite_backend.connect(campus.SQLITE_PATH)
+        barrier.wait()
+        results[request_id] = campus.decide_requests(conn, 2, [request_id], "approve", 3)
+        conn.close()
+
+    threads = [threading.Thread(target=approve, args=(r,)) for r in request_ids]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    statuses = sorted(status(db, r) for r in request_ids)
+    assert statuses == ["approved", "rejected"]
+    assert sorted(len(r["decided"]) for r in results.values()) == [0, 1]
+    assert food_status(db, 13) == "approved"
+
+
+def test_counters_follow_the_request_lifecycle(campus, login, db):
+    ngo, canteen = login("ngo"), login("canteen")
+
+    request_id = request_food(ngo, db, 9, 1)                    # Samosa, 50 pieces
+    canteen.post("/canteen/manage_requests", data=dict(action="approve", request_ids=[request_id]))
+    ngo.post("/ngo/record_beneficiaries", data=dict(donation_id=request_id, people_served="30", location="Shelter"))
+    canteen.post("/canteen/file_waste_report", data=dict(food_id=15, reason="spoilage", quantity_wasted="5"))
+
+    assert (status(db, request_id), food_status(db, 9)) == ("completed", "donated")
+    conn = campus.sqlite_backend.connect(campus.SQLITE_PATH)
+    assert reconcile(conn, fix=False) == []
+    assert rebuild_counters(conn, dry_run=True) == []
+    conn.close()
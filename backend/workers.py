@@ -0,0 +1,70 @@
+"""Background jobs that run on a pooled connection every `interval` seconds.
+
+Each app worker process starts its own on first request (ensure_started) and
+joins it at shutdown (stop). Jobs that must not overlap across processes take
+a MySQL named lock inside work(); run_once() only owns the connection.
+"""
+import abc
+import threading
+
+
+class PeriodicWorker(abc.ABC):
+    """Calls work(conn) every `interval` seconds on a daemon thread named `name`.
+
+    Subclasses set `name` and `failure` (the log label) and implement work();
+    `run_at_start` makes the first run happen before the first wait.
+    """
+    name, failure, run_at_start = "worker", "BACKGROUND JOB FAILED", False
+
+    def __init__(self, pool, interval):
+        self.pool, self.interval = pool, interval
+        self._thread, self._manual = None, None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.last_run = None
+
+    @abc.abstractmethod
+    def work(self, conn, **kwargs):
+        """One run on a pooled connection; its return value is run_once's."""
+
+    def ensure_started(self):
+        if self._thread is not None or self._stop.is_set():
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def run_once(self, **kwargs):
+        conn = self.pool.acquire()
+        broken = False
+        try:
+            return self.work(conn, **kwargs)
+        except Exception as e:
+            broken = True
+            print(f"--- {self.failure} --- {e}")
+        finally:
+            self.pool.release(conn, discard=broken)
+
+    def run_soon(self, **kwargs):
+        """Start a run_once on its own daemon thread, for admin buttons that must not hold
+        the request; returns False if the previous one started here has not finished."""
+        with self._lock:
+            if self._manual is not None and self._manual.is_alive():
+                return False
+            self._manual = threading.Thread(target=self.run_once, kwargs=kwargs, name=f"{self.name}-now", daemon=True)
+            self._manual.start()
+            return True
+
+    def _run(self):
+        if self.run_at_start:
+            self.run_once()
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+    def stop(self):
+        self._stop.set()
+        for thread in (self._thread, self._manual):
+            if thread is not None:
+                thread.join(timeout=10)
+        self._thread = None
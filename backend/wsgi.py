@@ -0,0 +1,11 @@
+"""WSGI entry point for production serving.
+
+    gunicorn -c backend/gunicorn.conf.py wsgi:app
+
+Any WSGI server works (`wsgi:app`); with a pre-fork server, call
+app_module.init_worker() in each worker after fork and
+app_module.shutdown() before it exits, as gunicorn.conf.py does.
+"""
+import app as app_module
+
+app = app_module.create_app()
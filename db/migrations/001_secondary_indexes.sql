@@ -0,0 +1,33 @@
+-- 001: secondary indexes for the hot filters/sorts in backend/app.py.
+-- InnoDB appends the primary key to every secondary index, so (time) indexes
+-- also serve the (time, id) keyset pagination order.
+
+ALTER TABLE food
+  ADD INDEX idx_food_canteen_status_expiry (canteen_id, status, expiry_time),
+  ADD INDEX idx_food_canteen_expiry (canteen_id, expiry_time),
+  -- ngo_food_list: status = 'available' ORDER BY expiry_time, quantity > 0 checked in-index
+  ADD INDEX idx_food_status_expiry_qty (status, expiry_time, quantity);
+
+ALTER TABLE donation_request
+  ADD INDEX idx_dr_ngo_status_approved (ngo_id, status, approved_time),
+  ADD INDEX idx_dr_ngo_request_time (ngo_id, request_time),
+  ADD INDEX idx_dr_food_ngo (food_id, ngo_id),
+  ADD INDEX idx_dr_status_request_time (status, request_time);
+
+ALTER TABLE leaderboard
+  ADD INDEX idx_lb_waste_score (waste_score);
+
+ALTER TABLE audit_log
+  ADD INDEX idx_audit_event_time (event_time),
+  ADD INDEX idx_audit_actor_time (performed_by, event_time);
+
+ALTER TABLE login_activity
+  ADD INDEX idx_login_time (login_time),
+  ADD INDEX idx_login_user_time (user_id, login_time);
+
+ALTER TABLE waste_report
+  ADD INDEX idx_waste_report_time (report_time),
+  ADD INDEX idx_waste_reporter_time (reported_by, report_time);
+
+ALTER TABLE meal_beneficiary
+  ADD INDEX idx_beneficiary_recorded_time (recorded_time);
@@ -0,0 +1,123 @@
+-- 002: incrementally maintained dashboard counters.
+-- Triggers keep dashboard_counter in step with users/food/donation_request/
+-- meal_beneficiary inside the writing statement's own transaction, so the
+-- admin/canteen/NGO dashboards read their numbers with one primary-key lookup.
+-- backend/counters.py recomputes the same numbers set-based to repair drift.
+
+CREATE TABLE dashboard_counter (
+  scope ENUM('global','canteen','ngo') NOT NULL,
+  scope_id INT NOT NULL,
+  name VARCHAR(32) NOT NULL,
+  value BIGINT NOT NULL DEFAULT 0,
+  PRIMARY KEY (scope, scope_id, name)
+);
+
+CREATE TRIGGER users_ai_counters AFTER INSERT ON users FOR EACH ROW
+INSERT INTO dashboard_counter (scope, scope_id, name, value) VALUES ('global', 0, 'total_users', 1)
+ON DUPLICATE KEY UPDATE value = value + VALUES(value);
+
+CREATE TRIGGER users_ad_counters AFTER DELETE ON users FOR EACH ROW
+INSERT INTO dashboard_counter (scope, scope_id, name, value) VALUES ('global', 0, 'total_users', -1)
+ON DUPLICATE KEY UPDATE value = value + VALUES(value);
+
+CREATE TRIGGER food_ai_counters AFTER INSERT ON food FOR EACH ROW
+INSERT INTO dashboard_counter (scope, scope_id, name, value) VALUES
+  ('global', 0, 'total_food', IFNULL(NEW.quantity, 0)),
+  ('canteen', NEW.canteen_id, 'total', IFNULL(NEW.quantity, 0)),
+  ('canteen', NEW.canteen_id, 'available', IF(NEW.status = 'available', IFNULL(NEW.quantity, 0), 0)),
+  ('canteen', NEW.canteen_id, 'donated', IF(NEW.status = 'donated', IFNULL(NEW.quantity, 0), 0))
+ON DUPLICATE KEY UPDATE value = value + VALUES(value);
+
+CREATE TRIGGER food_au_counters AFTER UPDATE ON food FOR EACH ROW
+INSERT INTO dashboard_counter (scope, scope_id, name, value) VALUES
+  ('global', 0, 'total_food', IFNULL(NEW.quantity, 0) - IFNULL(OLD.quantity, 0)),
+  ('canteen', OLD.canteen_id, 'total', -IFNULL(OLD.quantity, 0)),
+  ('canteen', NEW.canteen_id, 'total', IFNULL(NEW.quantity, 0)),
+  ('canteen', OLD.canteen_id, 'available', -IF(OLD.status = 'available', IFNULL(OLD.quantity, 0), 0)),
+  ('canteen', NEW.canteen_id, 'available', IF(NEW.status = 'available', IFNULL(NEW.quantity, 0), 0)),
+  ('canteen', OLD.canteen_id, 'donated', -IF(OLD.status = 'donated', IFNULL(OLD.quantity, 0), 0)),
+  ('canteen', NEW.canteen_id, 'donated', IF(NEW.status = 'donated', IFNULL(NEW.quantity, 0), 0))
+ON DUPLICATE KEY UPDATE value = value + VALUES(value);
+
+CREATE TRIGGER food_ad_counters AFTER DELETE ON food FOR EACH ROW
+INSERT INTO dashboard_counter (scope, scope_id, name, value) VALUES
+  ('global', 0, 'total_food', -IFNULL(OLD.quantity, 0)),
+  ('canteen', OLD.canteen_id, 'total', -IFNULL(OLD.quantity, 0)),
+  ('canteen', OLD.canteen_id, 'available', -IF(OLD.status = 'available', IFNULL(OLD.quantity, 0), 0)),
+  ('canteen', OLD.canteen_id, 'donated', -IF(OLD.status = 'donated', IFNULL(OLD.quantity, 0), 0))
+ON DUPLICATE KEY UPDATE value = value + VALUES(value);
+
+-- Foreign-key cascades do not fire triggers, so deleting a food row backs out
+-- the counters of the donation requests and beneficiaries it is about to cascade away.
+CREATE TRIGGER food_bd_cascade_counters BEFORE DELETE ON food FOR EACH ROW
+INSERT INTO dashboard_counter (scope, scope_id, name, value)
+SELECT * FROM (
+  SELECT 'ngo' AS d_scope, dr.ngo_id AS d_id, 'total_requests' AS d_name, -COUNT(*) AS delta
+    FROM donation_request dr WHERE dr.food_id = OLD.food_id GROUP BY dr.ngo_id
+  UNION ALL SELECT 'ngo', dr.ngo_id, 'approved', -SUM(IF(dr.status = 'approved', 1, 0))
+    FROM donation_request dr WHERE dr.food_id = OLD.food_id GROUP BY dr.ngo_id
+  UNION ALL SELECT 'ngo', dr.ngo_id, 'pending', -SUM(IF(dr.status = 'pending', 1, 0))
+    FROM donation_request dr WHERE dr.food_id = OLD.food_id GROUP BY dr.ngo_id
+  UNION ALL SELECT 'ngo', dr.ngo_id, 'total_meals', -SUM(mb.people_served)
+    FROM meal_beneficiary mb JOIN donation_request dr ON mb.donation_id = dr.request_id WHERE dr.food_id = OLD.food_id GROUP BY dr.ngo_id
+  UNION ALL SELECT 'canteen', OLD.canteen_id, 'pending', -COALESCE(SUM(IF(dr.status = 'pending', 1, 0)), 0)
+    FROM donation_request dr WHERE dr.food_id = OLD.food_id
+  UNION ALL SELECT 'global', 0, 'total_donations', -COALESCE(SUM(IF(dr.status = 'completed', 1, 0)), 0)
+    FROM donation_request dr WHERE dr.food_id = OLD.food_id
+) AS d
+ON DUPLICATE KEY UPDATE value = value + delta;
+
+CREATE TRIGGER donation_request_ai_counters AFTER INSERT ON donation_request FOR EACH ROW
+INSERT INTO dashboard_counter (scope, scope_id, name, value) VALUES
+  ('ngo', NEW.ngo_id, 'total_requests', 1),
+  ('ngo', NEW.ngo_id, 'approved', IF(NEW.status = 'approved', 1, 0)),
+  ('ngo', NEW.ngo_id, 'pending', IF(NEW.status = 'pending', 1, 0)),
+  ('canteen', (SELECT canteen_id FROM food WHERE food_id = NEW.food_id), 'pending', IF(NEW.status = 'pending', 1, 0)),
+  ('global', 0, 'total_donations', IF(NEW.status = 'completed', 1, 0))
+ON DUPLICATE KEY UPDATE value = value + VALUES(value);
+
+CREATE TRIGGER donation_request_au_counters AFTER UPDATE ON donation_request FOR EACH ROW
+INSERT INTO dashboard_counter (scope, scope_id, name, value) VALUES
+  ('ngo', OLD.ngo_id, 'total_requests', -1),
+  ('ngo', NEW.ngo_id, 'total_requests', 1),
+  ('ngo', OLD.ngo_id, 'approved', -IF(OLD.status = 'approved', 1, 0)),
+  ('ngo', NEW.ngo_id, 'approved', IF(NEW.status = 'approved', 1, 0)),
+  ('ngo', OLD.ngo_id, 'pending', -IF(OLD.status = 'pending', 1, 0)),
+  ('ngo', NEW.ngo_id, 'pending', IF(NEW.status = 'pending', 1, 0)),
+  ('canteen', (SELECT canteen_id FROM food WHERE food_id = OLD.food_id), 'pending', -IF(OLD.status = 'pending', 1, 0)),
+  ('canteen', (SELECT canteen_id FROM food WHERE food_id = NEW.food_id), 'pending', IF(NEW.status = 'pending', 1, 0)),
+  ('global', 0, 'total_donations', IF(NEW.status = 'completed', 1, 0) - IF(OLD.status = 'completed', 1, 0))
+ON DUPLICATE KEY UPDATE value = value + VALUES(value);
+
+CREATE TRIGGER donation_request_ad_counters AFTER DELETE ON donation_request FOR EACH ROW
+INSERT INTO dashboard_counter (scope, scope_id, name, value) VALUES
+  ('ngo', OLD.ngo_id, 'total_requests', -1),
+  ('ngo', OLD.ngo_id, 'approved', -IF(OLD.status = 'approved', 1, 0)),
+  ('ngo', OLD.ngo_id, 'pending', -IF(OLD.status = 'pending', 1, 0)),
+  ('canteen', (SELECT canteen_id FROM food WHERE food_id = OLD.food_id), 'pending', -IF(OLD.status = 'pending', 1, 0)),
+  ('global', 0, 'total_donations', -IF(OLD.status = 'completed', 1, 0))
+ON DUPLICATE KEY UPDATE value = value + VALUES(value);
+
+CREATE TRIGGER meal_beneficiary_ai_counters AFTER INSERT ON meal_beneficiary FOR EACH ROW
+INSERT INTO dashboard_counter (scope, scope_id, name, value)
+SELECT 'ngo', ngo_id, 'total_meals', NEW.people_served FROM donation_request WHERE request_id = NEW.donation_id
+ON DUPLICATE KEY UPDATE value = value + NEW.people_served;
+
+CREATE TRIGGER meal_beneficiary_ad_counters AFTER DELETE ON meal_beneficiary FOR EACH ROW
+INSERT INTO dashboard_counter (scope, scope_id, name, value)
+SELECT 'ngo', ngo_id, 'total_meals', -OLD.people_served FROM donation_request WHERE request_id = OLD.donation_id
+ON DUPLICATE KEY UPDATE value = value - OLD.people_served;
+
+-- Initial values; same set-based computation as backend/counters.py.
+INSERT INTO dashboard_counter (scope, scope_id, name, value)
+SELECT 'global', 0, 'total_users', COUNT(*) FROM users
+UNION ALL SELECT 'global', 0, 'total_food', COALESCE(SUM(quantity), 0) FROM food
+UNION ALL SELECT 'global', 0, 'total_donations', COUNT(*) FROM donation_request WHERE status = 'completed'
+UNION ALL SELECT 'canteen', canteen_id, 'total', COALESCE(SUM(quantity), 0) FROM food GROUP BY canteen_id
+UNION ALL SELECT 'canteen', canteen_id, 'available', COALESCE(SUM(IF(status = 'available', quantity, 0)), 0) FROM food GROUP BY canteen_id
+UNION ALL SELECT 'canteen', canteen_id, 'donated', COALESCE(SUM(IF(status = 'donated', quantity, 0)), 0) FROM food GROUP BY canteen_id
+UNION ALL SELECT 'canteen', f.canteen_id, 'pending', COUNT(*) FROM donation_request dr JOIN food f ON dr.food_id = f.food_id WHERE dr.status = 'pending' GROUP BY f.canteen_id
+UNION ALL SELECT 'ngo', ngo_id, 'total_requests', COUNT(*) FROM donation_request GROUP BY ngo_id
+UNION ALL SELECT 'ngo', ngo_id, 'approved', SUM(IF(status = 'approved', 1, 0)) FROM donation_request GROUP BY ngo_id
+UNION ALL SELECT 'ngo', ngo_id, 'pending', SUM(IF(status = 'pending', 1, 0)) FROM donation_request GROUP BY ngo_id
+UNION ALL SELECT 'ngo', dr.ngo_id, 'total_meals', SUM(mb.people_served) FROM meal_beneficiary mb JOIN donation_request dr ON mb.donation_id = dr.request_id GROUP BY dr.ngo_id;
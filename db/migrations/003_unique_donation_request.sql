@@ -0,0 +1,31 @@
+-- 003: one donation request per (food, NGO), enforced by the database instead of
+-- request_pickup's SELECT-then-INSERT check. Duplicates that slipped through
+-- concurrent requests are collapsed onto the one furthest along (completed >
+-- approved > pending > rejected, oldest first among equals); beneficiaries
+-- recorded against the others move to it before they are deleted, so none
+-- are lost to the cascade. migrate.py reconciles the dashboard counters after
+-- this file.
+
+CREATE TEMPORARY TABLE dr_survivor AS
+SELECT d.food_id, d.ngo_id, d.request_id
+FROM donation_request d
+WHERE NOT EXISTS (
+  SELECT 1 FROM donation_request o
+  WHERE o.food_id = d.food_id AND o.ngo_id = d.ngo_id AND o.request_id <> d.request_id
+    AND (FIELD(o.status, 'rejected', 'pending', 'approved', 'completed') > FIELD(d.status, 'rejected', 'pending', 'approved', 'completed')
+         OR (FIELD(o.status, 'rejected', 'pending', 'approved', 'completed') = FIELD(d.status, 'rejected', 'pending', 'approved', 'completed')
+             AND o.request_id < d.request_id)));
+
+UPDATE meal_beneficiary mb
+JOIN donation_request d ON mb.donation_id = d.request_id
+JOIN dr_survivor s ON s.food_id = d.food_id AND s.ngo_id = d.ngo_id AND s.request_id <> d.request_id
+SET mb.donation_id = s.request_id;
+
+DELETE d FROM donation_request d
+JOIN dr_survivor s ON s.food_id = d.food_id AND s.ngo_id = d.ngo_id AND s.request_id <> d.request_id;
+
+DROP TEMPORARY TABLE dr_survivor;
+
+ALTER TABLE donation_request
+  ADD UNIQUE KEY uq_dr_food_ngo (food_id, ngo_id),
+  DROP INDEX idx_dr_food_ngo;
@@ -0,0 +1,11 @@
+-- 004: updated_at on the mutable tables so backend/analytics.py can snapshot
+-- them incrementally (rows changed since the last watermark).
+-- waste_report and meal_beneficiary are append-only and use their own times.
+
+ALTER TABLE food
+  ADD COLUMN updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  ADD INDEX idx_food_updated_at (updated_at);
+
+ALTER TABLE donation_request
+  ADD COLUMN updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  ADD INDEX idx_dr_updated_at (updated_at);
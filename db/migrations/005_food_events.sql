@@ -0,0 +1,31 @@
+-- 005: food_event change log behind the NGO live feed (backend/food_events.py).
+-- Triggers append one row per change that can affect the list of available food,
+-- inside the writing statement's transaction; the feed polls it by event_id.
+
+CREATE TABLE food_event (
+  event_id BIGINT PRIMARY KEY AUTO_INCREMENT,
+  food_id INT NOT NULL,
+  kind ENUM('added','updated','claimed','expired','removed') NOT NULL,
+  created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  INDEX idx_food_event_created (created_at)
+);
+
+CREATE TRIGGER food_ai_events AFTER INSERT ON food FOR EACH ROW
+INSERT INTO food_event (food_id, kind)
+SELECT NEW.food_id, 'added' FROM DUAL WHERE NEW.status = 'available';
+
+CREATE TRIGGER food_au_events AFTER UPDATE ON food FOR EACH ROW
+INSERT INTO food_event (food_id, kind)
+SELECT NEW.food_id,
+       CASE WHEN NEW.status = 'expired' THEN 'expired'
+            WHEN OLD.status = 'available' AND NEW.status <> 'available' THEN 'claimed'
+            WHEN OLD.status <> 'available' AND NEW.status = 'available' THEN 'added'
+            ELSE 'updated' END
+FROM DUAL
+WHERE (OLD.status = 'available' OR NEW.status = 'available')
+  AND NOT (OLD.status <=> NEW.status AND OLD.quantity <=> NEW.quantity AND OLD.expiry_time <=> NEW.expiry_time
+           AND OLD.item_name <=> NEW.item_name AND OLD.category <=> NEW.category AND OLD.unit <=> NEW.unit);
+
+CREATE TRIGGER food_ad_events AFTER DELETE ON food FOR EACH ROW
+INSERT INTO food_event (food_id, kind)
+SELECT OLD.food_id, 'removed' FROM DUAL WHERE OLD.status = 'available';
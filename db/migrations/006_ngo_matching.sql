@@ -0,0 +1,18 @@
+-- 006: NGO profile used by the automatic matcher (backend/matching.py).
+-- capacity is the most food (in units) an NGO can have in pending/approved
+-- requests at once; 0 opts the NGO out of automatic matching.
+-- Coordinates are optional; without them travel time falls back to comparing location text.
+
+ALTER TABLE ngo
+  ADD COLUMN location VARCHAR(100),
+  ADD COLUMN latitude DECIMAL(9,6),
+  ADD COLUMN longitude DECIMAL(9,6),
+  ADD COLUMN capacity INT NOT NULL DEFAULT 0,
+  ADD COLUMN preferred_categories SET('Vegetarian','Non-Vegetarian','Beverage','Bakery','Other');
+
+ALTER TABLE canteen
+  ADD COLUMN latitude DECIMAL(9,6),
+  ADD COLUMN longitude DECIMAL(9,6);
+
+ALTER TABLE donation_request
+  ADD COLUMN auto_matched BOOLEAN NOT NULL DEFAULT FALSE;
@@ -0,0 +1,18 @@
+-- 007: FULLTEXT indexes behind food search (search_food in backend/app.py).
+-- InnoDB maintains them inside each writing transaction, so search never lags food writes.
+
+ALTER TABLE food ADD FULLTEXT INDEX ft_food_search (item_name, unit, notes);
+
+ALTER TABLE canteen ADD FULLTEXT INDEX ft_canteen_search (name, location);
+
+-- Result pages are ordered (expiry_time, food_id): the primary key InnoDB appends has to follow
+-- expiry_time directly, so 001's (status, expiry_time, quantity) is replaced; its in-index
+-- quantity check moves to the facet indexes, the only queries that still read no rows.
+-- The facet indexes lead with the GROUP BY column after status, so the counts are read in group
+-- order (no temporary table) with every other filter checked in-index.
+ALTER TABLE food
+  DROP INDEX idx_food_status_expiry_qty,
+  ADD INDEX idx_food_status_expiry (status, expiry_time),
+  ADD INDEX idx_food_status_category_expiry (status, category, expiry_time),
+  ADD INDEX idx_food_status_canteen_facet (status, canteen_id, category, expiry_time, quantity),
+  ADD INDEX idx_food_status_category_facet (status, category, canteen_id, expiry_time, quantity);
@@ -0,0 +1,456 @@
+-- SQLite twin of db/campus_food_waste_schema.sql with db/migrations 001-007 folded in,
+-- loaded by backend/sqlite_backend.py the first time a database file is opened.
+-- A new MySQL migration needs its SQLite equivalent added here (and recorded in schema_migrations).
+--
+-- Differences from MySQL:
+--   ENUM/SET columns are TEXT (ENUM with a CHECK); DATETIME values are ISO text in local time.
+--   No FULLTEXT indexes: search_food falls back to LIKE on this backend.
+--   ON UPDATE CURRENT_TIMESTAMP is an AFTER UPDATE trigger, so the counter and
+--   event triggers on food/donation_request skip updates that change nothing they track.
+--   Foreign-key cascades DO fire triggers here, after the parent row is gone, so
+--   food/donation_request back out what their cascaded children can no longer look up
+--   in BEFORE DELETE triggers instead of MySQL's food_bd_cascade_counters.
+
+CREATE TABLE roles (
+  role_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  role_name TEXT NOT NULL UNIQUE CHECK (role_name IN ('admin','canteen','ngo','student'))
+);
+
+CREATE TABLE canteen (
+  canteen_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  name VARCHAR(100) NOT NULL,
+  location VARCHAR(100) NOT NULL,
+  contact_no VARCHAR(15),
+  email VARCHAR(100) UNIQUE,
+  latitude DECIMAL(9,6),
+  longitude DECIMAL(9,6)
+);
+
+CREATE TABLE ngo (
+  ngo_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  name VARCHAR(100) NOT NULL,
+  contact_person VARCHAR(100),
+  phone VARCHAR(15),
+  email VARCHAR(100) UNIQUE,
+  type TEXT DEFAULT 'ngo' CHECK (type IN ('ngo','student_group')),
+  location VARCHAR(100),
+  latitude DECIMAL(9,6),
+  longitude DECIMAL(9,6),
+  capacity INT NOT NULL DEFAULT 0,
+  preferred_categories TEXT             -- comma-separated, as MySQL returns a SET
+);
+
+CREATE TABLE users (
+  user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  username VARCHAR(50) UNIQUE NOT NULL,
+  password VARCHAR(255) NOT NULL,
+  email VARCHAR(100) UNIQUE NOT NULL,
+  role_id INT NOT NULL,
+  ref_id INT,
+  created_at DATETIME DEFAULT (datetime('now', 'localtime')),
+  FOREIGN KEY (role_id) REFERENCES roles(role_id)
+    ON UPDATE CASCADE ON DELETE CASCADE
+);
+
+CREATE TABLE food (
+  food_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  canteen_id INT NOT NULL,
+  item_name VARCHAR(100) NOT NULL,
+  category TEXT CHECK (category IN ('Vegetarian','Non-Vegetarian','Beverage','Bakery','Other')),
+  quantity INT CHECK (quantity > 0),
+  unit VARCHAR(20) DEFAULT 'plates',
+  expiry_time DATETIME NOT NULL,
+  status TEXT DEFAULT 'available' CHECK (status IN ('available','donated','expired','requested','approved')),
+  notes VARCHAR(255),
+  updated_at DATETIME NOT NULL DEFAULT (datetime('now', 'localtime')),
+  FOREIGN KEY (canteen_id) REFERENCES canteen(canteen_id)
+    ON UPDATE CASCADE ON DELETE CASCADE
+);
+
+CREATE TABLE donation_request (
+  request_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  food_id INT NOT NULL,
+  ngo_id INT NOT NULL,
+  request_time DATETIME DEFAULT (datetime('now', 'localtime')),
+  status TEXT DEFAULT 'pending' CHECK (status IN ('pending','approved','completed','rejected')),
+  approved_by INT,
+  approved_time DATETIME,
+  completed_time DATETIME,
+  updated_at DATETIME NOT NULL DEFAULT (datetime('now', 'localtime')),
+  auto_matched BOOLEAN NOT NULL DEFAULT FALSE,
+  CONSTRAINT uq_dr_food_ngo UNIQUE (food_id, ngo_id),
+  FOREIGN KEY (food_id) REFERENCES food(food_id)
+    ON UPDATE CASCADE ON DELETE CASCADE,
+  FOREIGN KEY (ngo_id) REFERENCES ngo(ngo_id)
+    ON UPDATE CASCADE ON DELETE CASCADE,
+  FOREIGN KEY (approved_by) REFERENCES users(user_id)
+    ON UPDATE CASCADE ON DELETE SET NULL
+);
+
+CREATE TABLE donation_history (
+  donation_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  food_id INT NOT NULL,
+  ngo_id INT NOT NULL,
+  quantity INT NOT NULL,
+  donated_time DATETIME DEFAULT (datetime('now', 'localtime')),
+  FOREIGN KEY (food_id) REFERENCES food(food_id)
+    ON UPDATE CASCADE ON DELETE CASCADE,
+  FOREIGN KEY (ngo_id) REFERENCES ngo(ngo_id)
+    ON UPDATE CASCADE ON DELETE CASCADE
+);
+
+CREATE TABLE leaderboard (
+  lb_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  canteen_id INT NOT NULL UNIQUE,
+  total_items INT DEFAULT 0,
+  donated_items INT DEFAULT 0,
+  waste_score DECIMAL(6,3)
+    GENERATED ALWAYS AS (
+      CASE WHEN total_items = 0 THEN 0
+           ELSE ROUND(donated_items * 100.0 / total_items, 3) END
+    ) STORED,
+  FOREIGN KEY (canteen_id) REFERENCES canteen(canteen_id)
+    ON UPDATE CASCADE ON DELETE CASCADE
+);
+
+CREATE TABLE audit_log (
+  log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  action VARCHAR(100) NOT NULL,
+  table_name VARCHAR(50) NOT NULL,
+  record_id INT NOT NULL,
+  performed_by INT,
+  event_time DATETIME DEFAULT (datetime('now', 'localtime')),
+  FOREIGN KEY (performed_by) REFERENCES users(user_id)
+    ON UPDATE CASCADE ON DELETE SET NULL
+);
+
+CREATE TABLE login_activity (
+  activity_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  user_id INT NOT NULL,
+  login_time DATETIME DEFAULT (datetime('now', 'localtime')),
+  logout_time DATETIME,
+  ip_address VARCHAR(45),
+  FOREIGN KEY (user_id) REFERENCES users(user_id)
+    ON UPDATE CASCADE ON DELETE CASCADE
+);
+
+CREATE TABLE meal_beneficiary (
+  beneficiary_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  donation_id INT NOT NULL,
+  people_served INT NOT NULL,
+  location VARCHAR(100),
+  recorded_time DATETIME DEFAULT (datetime('now', 'localtime')),
+  FOREIGN KEY (donation_id) REFERENCES donation_request(request_id)
+    ON UPDATE CASCADE ON DELETE CASCADE
+);
+
+CREATE TABLE waste_report (
+  report_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  food_id INT NOT NULL,
+  reported_by INT NOT NULL,
+  reason TEXT CHECK (reason IN ('spoilage','late_pickup','over_preparation','other')),
+  quantity_wasted INT,
+  report_time DATETIME DEFAULT (datetime('now', 'localtime')),
+  FOREIGN KEY (food_id) REFERENCES food(food_id)
+    ON UPDATE CASCADE ON DELETE CASCADE,
+  FOREIGN KEY (reported_by) REFERENCES users(user_id)
+    ON UPDATE CASCADE ON DELETE CASCADE
+);
+
+-- 001: secondary indexes (rowid tables append the rowid, so (time) indexes serve (time, id) order too)
+CREATE INDEX idx_food_canteen_status_expiry ON food (canteen_id, status, expiry_time);
+CREATE INDEX idx_food_canteen_expiry ON food (canteen_id, expiry_time);
+CREATE INDEX idx_dr_ngo_status_approved ON donation_request (ngo_id, status, approved_time);
+CREATE INDEX idx_dr_ngo_request_time ON donation_request (ngo_id, request_time);
+CREATE INDEX idx_dr_status_request_time ON donation_request (status, request_time);
+CREATE INDEX idx_lb_waste_score ON leaderboard (waste_score);
+CREATE INDEX idx_audit_event_time ON audit_log (event_time);
+CREATE INDEX idx_audit_actor_time ON audit_log (performed_by, event_time);
+CREATE INDEX idx_login_time ON login_activity (login_time);
+CREATE INDEX idx_login_user_time ON login_activity (user_id, login_time);
+CREATE INDEX idx_waste_report_time ON waste_report (report_time);
+CREATE INDEX idx_waste_reporter_time ON waste_report (reported_by, report_time);
+CREATE INDEX idx_beneficiary_recorded_time ON meal_beneficiary (recorded_time);
+
+-- 004: change tracking
+CREATE INDEX idx_food_updated_at ON food (updated_at);
+CREATE INDEX idx_dr_updated_at ON donation_request (updated_at);
+
+-- 007: search page and facet indexes (001's idx_food_status_expiry_qty is dropped there)
+CREATE INDEX idx_food_status_expiry ON food (status, expiry_time);
+CREATE INDEX idx_food_status_category_expiry ON food (status, category, expiry_time);
+CREATE INDEX idx_food_status_canteen_facet ON food (status, canteen_id, category, expiry_time, quantity);
+CREATE INDEX idx_food_status_category_facet ON food (status, category, canteen_id, expiry_time, quantity);
+
+CREATE TRIGGER food_au_updated_at AFTER UPDATE ON food FOR EACH ROW
+WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+  UPDATE food SET updated_at = datetime('now', 'localtime') WHERE food_id = NEW.food_id;
+END;
+
+CREATE TRIGGER donation_request_au_updated_at AFTER UPDATE ON donation_request FOR EACH ROW
+WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+  UPDATE donation_request SET updated_at = datetime('now', 'localtime') WHERE request_id = NEW.request_id;
+END;
+
+-- 002: dashboard counters
+CREATE TABLE dashboard_counter (
+  scope TEXT NOT NULL CHECK (scope IN ('global','canteen','ngo')),
+  scope_id INT NOT NULL,
+  name VARCHAR(32) NOT NULL,
+  value BIGINT NOT NULL DEFAULT 0,
+  PRIMARY KEY (scope, scope_id, name)
+) WITHOUT ROWID;
+
+CREATE TRIGGER users_ai_counters AFTER INSERT ON users FOR EACH ROW
+BEGIN
+  INSERT INTO dashboard_counter (scope, scope_id, name, value) VALUES ('global', 0, 'total_users', 1)
+  ON CONFLICT (scope, scope_id, name) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER users_ad_counters AFTER DELETE ON users FOR EACH ROW
+BEGIN
+  INSERT INTO dashboard_counter (scope, scope_id, name, value) VALUES ('global', 0, 'total_users', -1)
+  ON CONFLICT (scope, scope_id, name) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER food_ai_counters AFTER INSERT ON food FOR EACH ROW
+BEGIN
+  INSERT INTO dashboard_counter (scope, scope_id, name, value) VALUES
+    ('global', 0, 'total_food', IFNULL(NEW.quantity, 0)),
+    ('canteen', NEW.canteen_id, 'total', IFNULL(NEW.quantity, 0)),
+    ('canteen', NEW.canteen_id, 'available', IIF(NEW.status = 'available', IFNULL(NEW.quantity, 0), 0)),
+    ('canteen', NEW.canteen_id, 'donated', IIF(NEW.status = 'donated', IFNULL(NEW.quantity, 0), 0))
+  ON CONFLICT (scope, scope_id, name) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER food_au_counters AFTER UPDATE ON food FOR EACH ROW
+WHEN OLD.quantity IS NOT NEW.quantity OR OLD.status IS NOT NEW.status OR OLD.canteen_id IS NOT NEW.canteen_id
+BEGIN
+  INSERT INTO dashboard_counter (scope, scope_id, name, value) VALUES
+    ('global', 0, 'total_food', IFNULL(NEW.quantity, 0) - IFNULL(OLD.quantity, 0)),
+    ('canteen', OLD.canteen_id, 'total', -IFNULL(OLD.quantity, 0)),
+    ('canteen', NEW.canteen_id, 'total', IFNULL(NEW.quantity, 0)),
+    ('canteen', OLD.canteen_id, 'available', -IIF(OLD.status = 'available', IFNULL(OLD.quantity, 0), 0)),
+    ('canteen', NEW.canteen_id, 'available', IIF(NEW.status = 'available', IFNULL(NEW.quantity, 0), 0)),
+    ('canteen', OLD.canteen_id, 'donated', -IIF(OLD.status = 'donated', IFNULL(OLD.quantity, 0), 0)),
+    ('canteen', NEW.canteen_id, 'donated', IIF(NEW.status = 'donated', IFNULL(NEW.quantity, 0), 0))
+  ON CONFLICT (scope, scope_id, name) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER food_ad_counters AFTER DELETE ON food FOR EACH ROW
+BEGIN
+  INSERT INTO dashboard_counter (scope, scope_id, name, value) VALUES
+    ('global', 0, 'total_food', -IFNULL(OLD.quantity, 0)),
+    ('canteen', OLD.canteen_id, 'total', -IFNULL(OLD.quantity, 0)),
+    ('canteen', OLD.canteen_id, 'available', -IIF(OLD.status = 'available', IFNULL(OLD.quantity, 0), 0)),
+    ('canteen', OLD.canteen_id, 'donated', -IIF(OLD.status = 'donated', IFNULL(OLD.quantity, 0), 0))
+  ON CONFLICT (scope, scope_id, name) DO UPDATE SET value = value + excluded.value;
+END;
+
+-- The cascaded donation requests can no longer look up this food's canteen.
+CREATE TRIGGER food_bd_counters BEFORE DELETE ON food FOR EACH ROW
+BEGIN
+  INSERT INTO dashboard_counter (scope, scope_id, name, value)
+  SELECT 'canteen', OLD.canteen_id, 'pending', -COUNT(*) FROM donation_request WHERE food_id = OLD.food_id AND status = 'pending'
+  ON CONFLICT (scope, scope_id, name) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER donation_request_ai_counters AFTER INSERT ON donation_request FOR EACH ROW
+BEGIN
+  INSERT INTO dashboard_counter (scope, scope_id, name, value) VALUES
+    ('ngo', NEW.ngo_id, 'total_requests', 1),
+    ('ngo', NEW.ngo_id, 'approved', IIF(NEW.status = 'approved', 1, 0)),
+    ('ngo', NEW.ngo_id, 'pending', IIF(NEW.status = 'pending', 1, 0)),
+    ('global', 0, 'total_donations', IIF(NEW.status = 'completed', 1, 0))
+  ON CONFLICT (scope, scope_id, name) DO UPDATE SET value = value + excluded.value;
+  -- A missing food row fails the foreign key (1452) at the end of the statement, as in MySQL.
+  INSERT INTO dashboard_counter (scope, scope_id, name, value)
+  SELECT 'canteen', canteen_id, 'pending', IIF(NEW.status = 'pending', 1, 0) FROM food WHERE food_id = NEW.food_id
+  ON CONFLICT (scope, scope_id, name) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER donation_request_au_counters AFTER UPDATE ON donation_request FOR EACH ROW
+WHEN OLD.status IS NOT NEW.status OR OLD.ngo_id IS NOT NEW.ngo_id OR OLD.food_id IS NOT NEW.food_id
+BEGIN
+  INSERT INTO dashboard_counter (scope, scope_id, name, value) VALUES
+    ('ngo', OLD.ngo_id, 'total_requests', -1),
+    ('ngo', NEW.ngo_id, 'total_requests', 1),
+    ('ngo', OLD.ngo_id, 'approved', -IIF(OLD.status = 'approved', 1, 0)),
+    ('ngo', NEW.ngo_id, 'approved', IIF(NEW.status = 'approved', 1, 0)),
+    ('ngo', OLD.ngo_id, 'pending', -IIF(OLD.status = 'pending', 1, 0)),
+    ('ngo', NEW.ngo_id, 'pending', IIF(NEW.status = 'pending', 1, 0)),
+    ('global', 0, 'total_donations', IIF(NEW.status = 'completed', 1, 0) - IIF(OLD.status = 'completed', 1, 0))
+  ON CONFLICT (scope, scope_id, name) DO UPDATE SET value = value + excluded.value;
+  INSERT INTO dashboard_counter (scope, scope_id, name, value)
+  SELECT 'canteen', canteen_id, 'pending', -IIF(OLD.status = 'pending', 1, 0) FROM food WHERE food_id = OLD.food_id
+  UNION ALL SELECT 'canteen', canteen_id, 'pending', IIF(NEW.status = 'pending', 1, 0) FROM food WHERE food_id = NEW.food_id
+  ON CONFLICT (scope, scope_id, name) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER donation_request_ad_counters AFTER DELETE ON donation_request FOR EACH ROW
+BEGIN
+  INSERT INTO dashboard_counter (scope, scope_id, name, value) VALUES
+    ('ngo', OLD.ngo_id, 'total_requests', -1),
+    ('ngo', OLD.ngo_id, 'approved', -IIF(OLD.status = 'approved', 1, 0)),
+    ('ngo', OLD.ngo_id, 'pending', -IIF(OLD.status = 'pending', 1, 0)),
+    ('global', 0, 'total_donations', -IIF(OLD.status = 'completed', 1, 0))
+  ON CONFLICT (scope, scope_id, name) DO UPDATE SET value = value + excluded.value;
+  -- No row when the food is being deleted: food_bd_counters has already counted it.
+  INSERT INTO dashboard_counter (scope, scope_id, name, value)
+  SELECT 'canteen', canteen_id, 'pending', -IIF(OLD.status = 'pending', 1, 0) FROM food WHERE food_id = OLD.food_id
+  ON CONFLICT (scope, scope_id, name) DO UPDATE SET value = value + excluded.value;
+END;
+
+-- The cascaded beneficiaries can no longer look up this request's NGO.
+CREATE TRIGGER donation_request_bd_counters BEFORE DELETE ON donation_request FOR EACH ROW
+BEGIN
+  INSERT INTO dashboard_counter (scope, scope_id, name, value)
+  SELECT 'ngo', OLD.ngo_id, 'total_meals', -SUM(people_served) FROM meal_beneficiary WHERE donation_id = OLD.request_id
+  HAVING COUNT(*) > 0
+  ON CONFLICT (scope, scope_id, name) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER meal_beneficiary_ai_counters AFTER INSERT ON meal_beneficiary FOR EACH ROW
+BEGIN
+  INSERT INTO dashboard_counter (scope, scope_id, name, value)
+  SELECT 'ngo', ngo_id, 'total_meals', NEW.people_served FROM donation_request WHERE request_id = NEW.donation_id
+  ON CONFLICT (scope, scope_id, name) DO UPDATE SET value = value + excluded.value;
+END;
+
+CREATE TRIGGER meal_beneficiary_ad_counters AFTER DELETE ON meal_beneficiary FOR EACH ROW
+BEGIN
+  INSERT INTO dashboard_counter (scope, scope_id, name, value)
+  SELECT 'ngo', ngo_id, 'total_meals', -OLD.people_served FROM donation_request WHERE request_id = OLD.donation_id
+  ON CONFLICT (scope, scope_id, name) DO UPDATE SET value = value + excluded.value;
+END;
+
+-- 005: food_event change log (AUTOINCREMENT: event ids are never reused after the retention purge)
+CREATE TABLE food_event (
+  event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  food_id INT NOT NULL,
+  kind TEXT NOT NULL CHECK (kind IN ('added','updated','claimed','expired','removed')),
+  created_at DATETIME NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX idx_food_event_created ON food_event (created_at);
+
+CREATE TRIGGER food_ai_events AFTER INSERT ON food FOR EACH ROW
+WHEN NEW.status = 'available'
+BEGIN
+  INSERT INTO food_event (food_id, kind) VALUES (NEW.food_id, 'added');
+END;
+
+CREATE TRIGGER food_au_events AFTER UPDATE ON food FOR EACH ROW
+WHEN (OLD.status = 'available' OR NEW.status = 'available')
+  AND NOT (OLD.status IS NEW.status AND OLD.quantity IS NEW.quantity AND OLD.expiry_time IS NEW.expiry_time
+           AND OLD.item_name IS NEW.item_name AND OLD.category IS NEW.category AND OLD.unit IS NEW.unit)
+BEGIN
+  INSERT INTO food_event (food_id, kind) VALUES (NEW.food_id,
+    CASE WHEN NEW.status = 'expired' THEN 'expired'
+         WHEN OLD.status = 'available' AND NEW.status <> 'available' THEN 'claimed'
+         WHEN OLD.status <> 'available' AND NEW.status = 'available' THEN 'added'
+         ELSE 'updated' END);
+END;
+
+CREATE TRIGGER food_ad_events AFTER DELETE ON food FOR EACH ROW
+WHEN OLD.status = 'available'
+BEGIN
+  INSERT INTO food_event (food_id, kind) VALUES (OLD.food_id, 'removed');
+END;
+
+-- Seed data (as db/campus_food_waste_schema.sql)
+INSERT INTO roles (role_name)
+VALUES ('admin'), ('canteen'), ('ngo'), ('student');
+
+INSERT INTO canteen (name, location, contact_no, email)
+VALUES
+('Symbi Central Canteen', 'Main Block - Ground Floor', '9876543210', 'centralcanteen@sit.edu'),
+('Hostel Food Court', 'Hostel Zone', '9765432109', 'hostelcanteen@sit.edu'),
+('Tech Café', 'Innovation Centre', '9988776655', 'techcafe@sit.edu');
+
+INSERT INTO ngo (name, contact_person, phone, email, type)
+VALUES
+('Feeding Hands', 'Amit Sharma', '9812345678', 'feedinghands@gmail.com', 'ngo'),
+('Green Plate', 'Priya Desai', '9822334455', 'greenplate@gmail.com', 'ngo'),
+('Helping Hearts', 'Raj Mehta', '9898765432', 'helpinghearts@gmail.com', 'student_group');
+
+INSERT INTO users (username, password, email, role_id)
+VALUES ('admin1', 'admin@123', 'admin@sit.edu', 1);
+
+INSERT INTO users (username, password, email, role_id, ref_id)
+VALUES
+('canteen_central', 'canteen@123', 'centralcanteen@sit.edu', 2, 1),
+('canteen_hostel', 'canteen@123', 'hostelcanteen@sit.edu', 2, 2),
+('canteen_tech', 'canteen@123', 'techcafe@sit.edu', 2, 3);
+
+INSERT INTO users (username, password, email, role_id, ref_id)
+VALUES
+('ngo_feedinghands', 'ngo@123', 'feedinghands@gmail.com', 3, 1),
+('ngo_greenplate', 'ngo@123', 'greenplate@gmail.com', 3, 2),
+('ngo_helpinghearts', 'ngo@123', 'helpinghearts@gmail.com', 3, 3);
+
+INSERT INTO users (username, password, email, role_id)
+VALUES
+('student_raj', 'student@123', 'raj@student.edu', 4),
+('student_kavya', 'student@123', 'kavya@student.edu', 4);
+
+INSERT INTO food (canteen_id, item_name, category, quantity, unit, expiry_time, status)
+VALUES
+(1, 'Veg Thali', 'Vegetarian', 15, 'plates', datetime('now', 'localtime', '+2 hours'), 'available'),
+(1, 'Idli Sambar', 'Vegetarian', 20, 'plates', datetime('now', 'localtime', '+3 hours'), 'available'),
+(2, 'Paneer Roll', 'Vegetarian', 10, 'pieces', datetime('now', 'localtime', '+1 hours'), 'available'),
+(3, 'Cold Coffee', 'Beverage', 25, 'cups', datetime('now', 'localtime', '+4 hours'), 'available'),
+(3, 'Veg Sandwich', 'Vegetarian', 12, 'pieces', datetime('now', 'localtime', '+30 minutes'), 'expired'),
+(1, 'Chicken Biryani', 'Non-Vegetarian', 30, 'plates', datetime('now', 'localtime', '+2 hours'), 'available'),
+(2, 'Masala Dosa', 'Vegetarian', 25, 'plates', datetime('now', 'localtime', '+1 hours'), 'available'),
+(3, 'Pasta', 'Vegetarian', 10, 'plates', datetime('now', 'localtime', '+5 hours'), 'available'),
+(1, 'Samosa', 'Vegetarian', 50, 'pieces', datetime('now', 'localtime', '+6 hours'), 'available'),
+(2, 'Chole Bhature', 'Vegetarian', 15, 'plates', datetime('now', 'localtime', '+3 hours'), 'available'),
+(3, 'Brownie', 'Bakery', 20, 'pieces', datetime('now', 'localtime', '+12 hours'), 'available'),
+(1, 'Dal Fry', 'Vegetarian', 10, 'plates', datetime('now', 'localtime', '+2 hours'), 'available'),
+(2, 'Veg Pulao', 'Vegetarian', 20, 'plates', datetime('now', 'localtime', '+4 hours'), 'available'),
+(3, 'Iced Tea', 'Beverage', 30, 'cups', datetime('now', 'localtime', '+24 hours'), 'available'),
+(1, 'Gulab Jamun', 'Other', 40, 'pieces', datetime('now', 'localtime', '+48 hours'), 'available'),
+(2, 'Misal Pav', 'Vegetarian', 15, 'plates', datetime('now', 'localtime', '+1 hours'), 'available');
+
+INSERT INTO donation_request (food_id, ngo_id, status) VALUES (1, 1, 'approved');
+INSERT INTO donation_request (food_id, ngo_id, status) VALUES (2, 2, 'pending');
+INSERT INTO donation_request (food_id, ngo_id, status) VALUES (3, 3, 'completed');
+INSERT INTO donation_request (food_id, ngo_id, status) VALUES (4, 1, 'rejected');
+INSERT INTO donation_request (food_id, ngo_id, status) VALUES (6, 2, 'pending');
+INSERT INTO donation_request (food_id, ngo_id, status) VALUES (7, 1, 'approved');
+INSERT INTO donation_request (food_id, ngo_id, status) VALUES (8, 3, 'pending');
+INSERT INTO donation_request (food_id, ngo_id, status) VALUES (9, 2, 'approved');
+INSERT INTO donation_request (food_id, ngo_id, status) VALUES (10, 1, 'pending');
+INSERT INTO donation_request (food_id, ngo_id, status) VALUES (11, 3, 'rejected');
+INSERT INTO donation_request (food_id, ngo_id, status) VALUES (12, 2, 'pending');
+
+INSERT INTO leaderboard (canteen_id, total_items, donated_items)
+VALUES (1, 0, 0), (2, 0, 0), (3, 0, 0);
+
+INSERT INTO meal_beneficiary (donation_id, people_served, location)
+VALUES
+(1, 25, 'Sinhgad NGO Center'),
+(3, 20, 'Orphanage Home Pune'),
+(7, 22, 'City Shelter');
+
+INSERT INTO waste_report (food_id, reported_by, reason, quantity_wasted)
+VALUES
+(5, 2, 'spoilage', 12),
+(4, 3, 'late_pickup', 5),
+(11, 3, 'over_preparation', 10);
+
+INSERT INTO audit_log (action, table_name, record_id, performed_by)
+VALUES ('Seeded admin user', 'users', 1, 1);
+INSERT INTO login_activity (user_id, ip_address) VALUES (1, '127.0.0.1');
+
+-- Same bookkeeping as backend/migrate.py, so `migrate.py --status` reads the same on both backends.
+CREATE TABLE schema_migrations (
+  version INT PRIMARY KEY,
+  name VARCHAR(255) NOT NULL,
+  applied_at DATETIME DEFAULT (datetime('now', 'localtime'))
+);
+INSERT INTO schema_migrations (version, name) VALUES
+(1, '001_secondary_indexes.sql'), (2, '002_dashboard_counters.sql'), (3, '003_unique_donation_request.sql'),
+(4, '004_change_tracking.sql'), (5, '005_food_events.sql'), (6, '006_ngo_matching.sql'), (7, '007_food_search.sql');